@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "recipe_manager.settings")
+# Use the async scraper views; set to "0" to keep the thread-pool versions
+os.environ.setdefault("RECIPES_ASYNC_VIEWS", "1")
 
 application = get_asgi_application()
@@ -43,6 +43,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    'recipes.middleware.QueryBudgetMiddleware',
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -63,6 +64,8 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "recipes.context_processors.fragment_cache",
+                "recipes.context_processors.categories",
             ],
         },
     },
@@ -81,6 +84,33 @@ DATABASES = {
     }
 }
 
+# 👈 SQLite production profile: WAL and SQLITE_PRAGMAS on every connection
+# (recipes/utils/sqlite.py), persistent connections, and write transactions
+# that take the lock up front so concurrent writers queue on busy_timeout
+# instead of failing with "database is locked"
+SQLITE_PRODUCTION = os.environ.get('RECIPES_SQLITE_PRODUCTION') == '1'
+# Overrides for the defaults in recipes/utils/sqlite.py
+SQLITE_PRAGMAS = {}
+# Also serve reads of GET/HEAD requests from a read-only connection alias
+SQLITE_READ_ALIAS = 'read' if os.environ.get('RECIPES_SQLITE_READ_ALIAS') == '1' else None
+
+if SQLITE_PRODUCTION:
+    DATABASES["default"].update({
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {"transaction_mode": "IMMEDIATE"},
+    })
+    if SQLITE_READ_ALIAS:
+        DATABASES[SQLITE_READ_ALIAS] = {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": f"file:{BASE_DIR / 'db.sqlite3'}?mode=ro",
+            "CONN_MAX_AGE": 600,
+            "CONN_HEALTH_CHECKS": True,
+            "TEST": {"MIRROR": "default"},
+        }
+        DATABASE_ROUTERS = ['recipes.routers.ReadWriteRouter']
+        MIDDLEWARE.insert(1, 'recipes.middleware.ReadOnlyRequestMiddleware')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -128,4 +158,119 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'recipe_list'
 LOGOUT_REDIRECT_URL = 'login'
 
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+# 👈 Per-request SQL budgets (URL name -> max queries), see QueryBudgetMiddleware
+QUERY_BUDGET_DEFAULT = 20
+QUERY_BUDGETS = {
+    'home': 6,
+    'recipe_list': 6,
+    'recipe_detail': 8,
+    'search': 6,
+    'category_recipes': 7,
+    'profile': 9,
+    'saved_recipes': 8,
+    'pantry_search': 6,
+    'ingredient_suggest': 3,
+    'search_job_status': 0,
+    # Session, user, then insert (or insert + delete) and the count update
+    'like_recipe_toggle': 7,
+    'source_health': 4,
+    # Rows stream after the view returns, so only the auth queries count here
+    'export_recipes': 2,
+}
+# Raise instead of warn when a view goes over budget (the test suite turns this on)
+QUERY_BUDGET_STRICT = False
+# Add X-Query-Count / Server-Timing headers to responses
+QUERY_BUDGET_HEADERS = DEBUG
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'recipes.queries': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
+
+# 👈 Listing pagination
+RECIPES_PER_PAGE = 24
+# Seconds to reuse a listing's total count
+RECIPES_COUNT_CACHE_TTL = 60
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# 👈 Recipe scraper settings
+# Serve search/category/external views with the asyncio scraper (set by asgi.py)
+RECIPES_ASYNC_VIEWS = os.environ.get('RECIPES_ASYNC_VIEWS') == '1'
+# Seconds a web search waits for sources before returning what it has
+SCRAPER_SEARCH_DEADLINE = 12
+# Threads shared by all concurrent web searches in this process
+SCRAPER_MAX_WORKERS = 12
+# Keep-alive connections per host, and retries for connect errors / 502-504
+SCRAPER_POOL_MAXSIZE = 10
+SCRAPER_HTTP_RETRIES = 1
+SCRAPER_HTTP_BACKOFF = 0.3
+# Cache alias holding web search results
+SCRAPER_CACHE_ALIAS = 'scraper'
+# Background search jobs are polled through any worker, so their state must be shared
+SCRAPER_JOBS_CACHE_ALIAS = 'shared'
+# Seconds to keep non-empty and empty search results
+SCRAPER_SEARCH_CACHE_TTL = 60 * 60
+SCRAPER_SEARCH_NEGATIVE_TTL = 5 * 60
+# External recipe details: revalidate after FRESH_FOR, drop after CACHE_TTL
+SCRAPER_DETAIL_FRESH_FOR = 60 * 60
+SCRAPER_DETAIL_CACHE_TTL = 7 * 24 * 60 * 60
+SCRAPER_FALLBACK_CACHE_TTL = 10 * 60
+# Per-request timeout ceiling/floor; the actual timeout adapts to each source's p95 latency
+SCRAPER_TIMEOUT = 10
+SCRAPER_MIN_TIMEOUT = 2
+# Skip a source for COOLDOWN seconds after FAILURES failed fetches in a row
+SCRAPER_BREAKER_FAILURES = 3
+SCRAPER_BREAKER_COOLDOWN = 5 * 60
+# Breakers and latency samples are shared by every worker process
+SCRAPER_HEALTH_CACHE_ALIAS = 'shared'
+# Recent fetches kept per source for success rate and latency percentiles
+SCRAPER_HEALTH_WINDOW = 50
+# HTML backend (None picks lxml when installed) and max bytes read per page
+SCRAPER_HTML_PARSER = None
+SCRAPER_MAX_PAGE_BYTES = 2 * 1024 * 1024
+
+# 👈 Uploaded image derivatives (AVIF/WebP/JPEG per width, built in the background)
+IMAGE_DERIVATIVE_WIDTHS = {
+    'recipe': (320, 640, 960, 1280),
+    'avatar': (32, 64, 96),
+}
+IMAGE_DERIVATIVE_WORKERS = 2
+# False builds them synchronously after commit (handy for tests and scripts)
+IMAGE_DERIVATIVES_ASYNC = True
+
+# 👈 Template fragment caching (versions are bumped by recipes/signals.py)
+# The versions must live in a cache every worker process reads, or a bump
+# made in one process leaves the others serving stale fragments. The 'shared'
+# file cache covers one host; point it at Redis/Memcached across hosts.
+FRAGMENT_CACHE_ALIAS = 'shared'
+FRAGMENT_CACHE_TTL = 10 * 60
+
+# 👈 Caches (local memory evicts least recently used once MAX_ENTRIES is hit;
+# swap in FileBasedCache or DatabaseCache to share results between processes)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'scraper': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'recipe-scraper',
+        'TIMEOUT': SCRAPER_SEARCH_CACHE_TTL,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    },
+    # State every worker process must agree on: fragment versions, search
+    # jobs and source health (circuit breakers). One host only; use Redis or
+    # Memcached across hosts, which also makes the breaker probe lock atomic
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'shared',
+    },
+}
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Category, Recipe, Profile
+from .models import Category, Recipe, Profile, Ingredient
+from .utils.search import RecipeSearch
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -12,6 +13,21 @@ class RecipeAdmin(admin.ModelAdmin):
     list_filter = ['category', 'created_date']
     search_fields = ['title', 'description', 'ingredients']
     readonly_fields = ['total_likes']
+    # category is nullable, so the changelist would not join it by itself
+    list_select_related = ['created_by', 'category']
+    # Skip the unfiltered COUNT(*) (a full scan) on every filtered page
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        """Use the full-text index instead of LIKE across the text fields"""
+        if not search_term or not RecipeSearch.is_available():
+            return super().get_search_results(request, queryset, search_term)
+        return RecipeSearch.filter(queryset, search_term), False
+
+@admin.register(Ingredient)
+class IngredientAdmin(admin.ModelAdmin):
+    list_display = ['name']
+    search_fields = ['name']
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
@@ -0,0 +1,137 @@
+"""Async versions of the scrape-bound views, used under ASGI.
+
+Enabled with ``RECIPES_ASYNC_VIEWS`` (on by default in asgi.py). Scraping
+awaits AsyncRecipeScraper, so a single event loop can hold many slow
+searches at once; ORM work and template rendering go through
+sync_to_async. The search page still renders local matches at once and
+leaves the web to a background SearchJobs job, unless ``?wait=1`` asks
+for the blocking search.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.shortcuts import aget_object_or_404, redirect, render
+
+from .models import Category, Recipe
+from .utils.async_scraper import AsyncRecipeScraper
+from .utils.jobs import SearchJobs
+from .utils.pagination import KeysetPaginator
+from .utils.ranking import ResultMerger
+from .utils.search import RecipeSearch
+from .views import clean_external_url, external_fallback_recipe
+
+
+async def search_recipes(request):
+    """Search recipes from web and local database"""
+    query = request.GET.get('q', '').strip()
+    web_recipes = []
+    local_recipes = []
+    search_job = None
+
+    if query:
+        local_search = sync_to_async(lambda: list(RecipeSearch.search(
+            Recipe.objects.select_related('created_by', 'category'), query
+        )))
+        if request.GET.get('wait'):
+            # Blocking search for clients without JavaScript
+            local_recipes, web_recipes = await asyncio.gather(
+                local_search(),
+                AsyncRecipeScraper.search_recipes(query),
+                return_exceptions=True,
+            )
+            if isinstance(local_recipes, Exception):
+                raise local_recipes
+            if isinstance(web_recipes, Exception):
+                print(f"Web search error: {web_recipes}")
+                web_recipes = []
+        else:
+            local_recipes = await local_search()
+            # Answer from cache or hand off to a background job the page polls
+            try:
+                search_job, cached = await sync_to_async(SearchJobs.start)(
+                    query, [recipe.title for recipe in local_recipes]
+                )
+                web_recipes = cached or []
+            except Exception as e:
+                print(f"Could not start web search job: {e}")
+
+    results = ResultMerger.merge(query, local_recipes, web_recipes)
+    total_local = sum(1 for result in results if result['kind'] == 'local')
+    context = {
+        'results': results,
+        'search_job': search_job,
+        'query': query,
+        'total_local': total_local,
+        'total_web': len(results) - total_local,
+        'has_results': len(results) > 0 or search_job is not None
+    }
+    return await sync_to_async(render)(request, 'recipes/search_results.html', context)
+
+
+async def recipe_detail_external(request):
+    """Show recipe from external URL"""
+    url = request.GET.get('url')
+    if not url:
+        messages.error(request, 'No URL provided')
+        return redirect('search')
+
+    url = clean_external_url(url)
+
+    try:
+        recipe = await AsyncRecipeScraper.get_recipe_details(url) or external_fallback_recipe(url)
+    except Exception as e:
+        print(f"Error in recipe_detail_external: {e}")
+        recipe = external_fallback_recipe(url, failed=True)
+
+    context = {
+        'recipe': recipe,
+        'source_url': url
+    }
+    return await sync_to_async(render)(request, 'recipes/external_recipe.html', context)
+
+
+async def category_recipes(request, category_id):
+    """Show recipes by category - both local and web"""
+    category = await aget_object_or_404(Category, pk=category_id)
+
+    def local_page():
+        page = KeysetPaginator.paginate(
+            Recipe.objects.filter(category=category).select_related('created_by', 'category'), request
+        )
+        page.total  # evaluate the count while still in a sync thread
+        return page
+
+    async def web_search():
+        # Web recipes are merged into the first page only. A forward cursor
+        # is never page 1; a backward one may be, so it searches and the
+        # results are dropped below if it was not.
+        direction, key = KeysetPaginator.decode_cursor(request.GET.get('cursor'))
+        if key is not None and direction == 'n':
+            return []
+        return await AsyncRecipeScraper.search_recipes(category.name)
+
+    page, web_recipes = await asyncio.gather(
+        sync_to_async(local_page)(),
+        web_search(),
+        return_exceptions=True,
+    )
+    if isinstance(page, Exception):
+        raise page
+    if isinstance(web_recipes, Exception):
+        print(f"Error fetching web recipes for category: {web_recipes}")
+        web_recipes = []
+    if page.has_previous:
+        web_recipes = []
+
+    results = ResultMerger.merge(category.name, page.object_list, web_recipes, web_limit=8)
+    total_web = sum(1 for result in results if result['kind'] == 'web')
+    context = {
+        'category': category,
+        'results': results,
+        'page': page,
+        'total_local': page.total,
+        'total_web': total_web,
+        'has_recipes': page.total > 0 or total_web > 0
+    }
+    return await sync_to_async(render)(request, 'recipes/category_recipes.html', context)
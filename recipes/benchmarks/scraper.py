@@ -0,0 +1,217 @@
+import gc
+import io
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.test import override_settings
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from ..utils import http
+from ..utils.cache import SearchCache
+from ..utils.health import percentile
+from ..utils.scraper import RecipeScraper
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+
+# Search results page for each source (synthetic; see fixtures/README.md)
+SEARCH_FIXTURES = {
+    'RecipeTin Eats': 'recipetineats.html',
+    'Simply Recipes': 'simplyrecipes.html',
+    'BBC Good Food': 'bbcgoodfood.html',
+    'Tasty': 'tasty.html',
+    'Allrecipes': 'allrecipes.html',
+    'Food Network': 'foodnetwork.html',
+}
+
+# Recipe pages served from DETAIL_HOST, one with schema.org JSON-LD and one without
+DETAIL_HOST = 'recipes.fixtures.invalid'
+DETAIL_FIXTURES = {
+    'jsonld': 'detail_jsonld.html',
+    'html': 'detail_html.html',
+}
+
+BENCHMARK_CACHE = 'scraper-benchmark'
+
+
+class FixtureAdapter(BaseAdapter):
+    """requests transport that answers from saved pages instead of the network.
+
+    ``pages`` maps (host, path) to a fixture body; a path of '' matches any
+    path on that host. Unknown URLs get a 404.
+    """
+
+    def __init__(self, pages):
+        super().__init__()
+        self.pages = pages
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        parts = urlsplit(request.url)
+        host = parts.netloc.lower()
+        body = self.pages.get((host, parts.path), self.pages.get((host, '')))
+
+        response = Response()
+        response.status_code = 200 if body is not None else 404
+        response.reason = 'OK' if body is not None else 'Not Found'
+        response.headers = CaseInsensitiveDict({'Content-Type': 'text/html; charset=utf-8'})
+        response.raw = io.BytesIO(body or b'')
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+
+def load_pages(fixtures_dir=FIXTURES_DIR):
+    """Map every fixture onto the URL the scrapers will request"""
+    fixtures_dir = Path(fixtures_dir)
+    pages = {}
+    for source_name, filename in SEARCH_FIXTURES.items():
+        host = urlsplit(RecipeScraper.SEARCH_URLS[source_name]).netloc
+        pages[(host, '')] = (fixtures_dir / filename).read_bytes()
+    for name, filename in DETAIL_FIXTURES.items():
+        pages[(DETAIL_HOST, '/' + name)] = (fixtures_dir / filename).read_bytes()
+    return pages
+
+
+def detail_url(name):
+    return f'https://{DETAIL_HOST}/{name}'
+
+
+@contextmanager
+def offline(pages):
+    """Serve every scraper request from pages, with private caches.
+
+    SessionPool's sessions are swapped for ones mounted on a FixtureAdapter,
+    and the scraper and source health caches point at a throwaway
+    local-memory cache so real cached state is neither read nor clobbered.
+    """
+    caches = dict(settings.CACHES)
+    caches[BENCHMARK_CACHE] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': BENCHMARK_CACHE,
+    }
+    adapter = FixtureAdapter(pages)
+    with http._sessions_lock:
+        saved = dict(http._sessions)
+        http._sessions.clear()
+        for host, _ in pages:
+            session = http.SessionPool.build_session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            http._sessions[host] = session
+    try:
+        with override_settings(CACHES=caches, SCRAPER_CACHE_ALIAS=BENCHMARK_CACHE,
+                               SCRAPER_HEALTH_CACHE_ALIAS=BENCHMARK_CACHE):
+            yield
+    finally:
+        with http._sessions_lock:
+            http._sessions.clear()
+            http._sessions.update(saved)
+
+
+def measure(func, repeat):
+    """Time func() repeat times, then trace one more call's memory.
+
+    The scraper cache is cleared before each call so every run fetches and
+    parses the page. Timing runs are not traced (tracemalloc slows Python
+    code down several times); peak is the most memory held at once during
+    the traced call and retained what was still allocated when it returned.
+    ``results`` counts the recipes found, or a recipe's ingredients.
+    """
+    cache = SearchCache.get_cache()
+    func()  # warm up imports, regexes and parser state
+
+    timings = []
+    for _ in range(repeat):
+        cache.clear()
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+
+    cache.clear()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    if isinstance(result, dict):
+        result = result.get('ingredients') or []
+    return {
+        'results': len(result),
+        'mean_ms': statistics.fmean(timings) * 1000,
+        'median_ms': statistics.median(timings) * 1000,
+        'p95_ms': percentile(timings, 0.95) * 1000,
+        'min_ms': min(timings) * 1000,
+        'peak_kib': (peak - baseline) / 1024,
+        'retained_kib': (current - baseline) / 1024,
+    }
+
+
+def cases():
+    """(name, fixture, callable) for every scraper entry point benchmarked"""
+    for source_name, scrape in RecipeScraper.get_sources():
+        yield scrape.__name__, SEARCH_FIXTURES[source_name], lambda scrape=scrape: scrape('chicken')
+    for name, filename in DETAIL_FIXTURES.items():
+        url = detail_url(name)
+        yield f'get_recipe_details[{name}]', filename, lambda url=url: RecipeScraper.get_recipe_details(url)
+
+
+def run(repeat=50, fixtures_dir=FIXTURES_DIR, only=None):
+    """Benchmark each case against the fixtures; returns a list of result dicts"""
+    pages = load_pages(fixtures_dir)
+    sizes = {filename: (Path(fixtures_dir) / filename).stat().st_size
+             for filename in (*SEARCH_FIXTURES.values(), *DETAIL_FIXTURES.values())}
+    results = []
+    with offline(pages):
+        for name, filename, func in cases():
+            if only and not any(part in name for part in only):
+                continue
+            row = {'case': name, 'fixture': filename, 'bytes': sizes[filename]}
+            row.update(measure(func, repeat))
+            results.append(row)
+    return results
+
+
+def record(query, fixtures_dir=FIXTURES_DIR):
+    """Save each source's live search page for query as its fixture.
+
+    Pages are fetched with the scrapers' URLs and header sets but not
+    through fetch_search_page: an open circuit breaker cannot skip a
+    source, failures are not recorded in SourceHealth, and the whole body
+    is kept rather than the first SCRAPER_MAX_PAGE_BYTES. Returns the names
+    of the sources that could not be fetched; their existing fixtures are
+    left alone.
+    """
+    timeout = getattr(settings, 'SCRAPER_TIMEOUT', 10)
+    failed = []
+    for source_name, filename in SEARCH_FIXTURES.items():
+        url = RecipeScraper.search_url(source_name, query)
+        body = None
+        for headers in RecipeScraper.search_headers(source_name):
+            try:
+                response = http.SessionPool.get(url, headers=headers, timeout=timeout)
+            except Exception:
+                continue
+            if response.status_code == 200:
+                body = response.content
+                break
+        if body is None:
+            failed.append(source_name)
+            continue
+        (Path(fixtures_dir) / filename).write_bytes(body)
+    return failed
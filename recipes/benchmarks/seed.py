@@ -0,0 +1,203 @@
+import itertools
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ..models import Category, Profile, Recipe
+from ..utils.fragments import FragmentCache
+from ..utils.importer import content_hash
+from ..utils.ingredients import IngredientIndex
+
+CATEGORY_NAMES = [
+    'Breakfast', 'Lunch', 'Dinner', 'Dessert', 'Snacks', 'Soups', 'Salads', 'Vegetarian',
+    'Vegan', 'Seafood', 'Baking', 'Drinks', 'Pasta', 'Curry', 'Grill', 'Slow Cooker',
+]
+ADJECTIVES = [
+    'Easy', 'Creamy', 'Spicy', 'Crispy', 'Smoky', 'Quick', 'Healthy', 'Classic', 'Garlic',
+    'Lemon', 'Honey', 'Roasted', 'Slow-Cooked', 'One-Pan', 'Sticky', 'Herby',
+]
+DISHES = [
+    'Chicken', 'Pasta', 'Salmon', 'Curry', 'Stew', 'Soup', 'Salad', 'Tacos', 'Risotto', 'Pie',
+    'Noodles', 'Burgers', 'Pancakes', 'Brownies', 'Lasagne', 'Chilli', 'Stir-Fry', 'Bread',
+]
+INGREDIENTS = [
+    'chicken breast', 'olive oil', 'garlic', 'onion', 'tomato', 'butter', 'flour', 'sugar',
+    'eggs', 'milk', 'salt', 'black pepper', 'lemon', 'parmesan', 'rice', 'pasta', 'basil',
+    'ginger', 'soy sauce', 'honey', 'coconut milk', 'potatoes', 'carrots', 'spinach',
+    'mushrooms', 'beef mince', 'salmon fillet', 'chickpeas', 'cumin', 'paprika', 'cream',
+    'cheddar', 'bell pepper', 'chilli flakes', 'thyme', 'rosemary', 'yoghurt', 'oats',
+]
+WORDS = (
+    'stir simmer bake roast season whisk fold chop slice drain serve until golden tender '
+    'minutes heat pan oven bowl gently warm fresh sauce mixture add the and with over'
+).split()
+
+
+class SeedData:
+    """Fill a (throwaway) database with realistic volumes of fake data.
+
+    Users, categories, recipes and likes are inserted with bulk_create in
+    batches of ``batch_size``. Recipes get content hashes, FTS rows (via the
+    triggers) and ingredient index rows like imported ones. Authorship and
+    likes are skewed so a few users and recipes dominate, as on a real
+    site; ``seed`` makes runs repeatable.
+    """
+
+    PASSWORD = 'benchmark-pass'
+
+    def __init__(self, users=200, categories=12, recipes=5000, likes=20000, seed=0,
+                 batch_size=5000, stdout=None):
+        self.counts = {'users': users, 'categories': categories, 'recipes': recipes, 'likes': likes}
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.stdout = stdout
+
+    def log(self, message):
+        if self.stdout:
+            self.stdout.write(message)
+
+    def run(self):
+        """Create everything; returns {kind: rows created}"""
+        started = time.perf_counter()
+        created = {
+            'users': self.create_users(),
+            'categories': self.create_categories(),
+        }
+        created['recipes'] = self.create_recipes()
+        created['likes'] = self.create_likes()
+        FragmentCache.bump(*FragmentCache.GROUPS)
+        self.log(f"Seeded {created} in {time.perf_counter() - started:.1f}s")
+        return created
+
+    def batches(self, iterable):
+        iterator = iter(iterable)
+        while batch := list(itertools.islice(iterator, self.batch_size)):
+            yield batch
+
+    def skewed(self, count, exponent=1.1):
+        """Cumulative Zipf-like weights for picking among count items"""
+        return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+    def create_users(self):
+        # Hashing once keeps 100k users from taking minutes
+        password = make_password(self.PASSWORD)
+        offset = User.objects.count()
+        users = (
+            User(username=f'bench{offset + i}', email=f'bench{offset + i}@example.com', password=password)
+            for i in range(self.counts['users'])
+        )
+        total = 0
+        for batch in self.batches(users):
+            with transaction.atomic():
+                created = User.objects.bulk_create(batch)
+                Profile.objects.bulk_create([Profile(user=user) for user in created])
+            total += len(created)
+        self.log(f"{total} users")
+        return total
+
+    def create_categories(self):
+        existing = set(Category.objects.values_list('name', flat=True))
+        names = (
+            CATEGORY_NAMES[i] if i < len(CATEGORY_NAMES) else f'{self.random.choice(ADJECTIVES)} {i}'
+            for i in range(self.counts['categories'])
+        )
+        created = Category.objects.bulk_create([Category(name=name) for name in names if name not in existing])
+        self.log(f"{len(created)} categories")
+        return len(created)
+
+    def build_recipe(self, author_ids, category_ids, now):
+        pick = self.random.choice
+        title = f'{pick(ADJECTIVES)} {pick(ADJECTIVES)} {pick(DISHES)}'
+        ingredients = '\n'.join(
+            f'{self.random.randint(1, 4)} {unit} {name}'
+            for unit, name in zip(
+                itertools.cycle(['cups', 'tbsp', 'tsp', 'g']),
+                self.random.sample(INGREDIENTS, self.random.randint(4, 12)),
+            )
+        )
+        instructions = '\n'.join(
+            ' '.join(self.random.choices(WORDS, k=self.random.randint(8, 25))).capitalize() + '.'
+            for _ in range(self.random.randint(3, 8))
+        )
+        return Recipe(
+            title=title,
+            description=' '.join(self.random.choices(WORDS, k=self.random.randint(10, 40))).capitalize(),
+            ingredients=ingredients,
+            instructions=instructions,
+            preparation_time=self.random.randint(5, 45),
+            cooking_time=self.random.randint(0, 180),
+            servings=self.random.randint(1, 8),
+            category_id=pick(category_ids) if self.random.random() > 0.05 else None,
+            created_by_id=author_ids(),
+            created_date=now - timedelta(minutes=self.random.randint(0, 3 * 365 * 24 * 60)),
+            content_hash=content_hash(title, ingredients, instructions),
+        )
+
+    def create_recipes(self):
+        user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+        category_ids = list(Category.objects.values_list('pk', flat=True))
+        if not user_ids or not category_ids:
+            return 0
+        weights = self.skewed(len(user_ids))
+
+        def author_ids():
+            return self.random.choices(user_ids, cum_weights=weights)[0]
+
+        now = timezone.now()
+        recipes = (self.build_recipe(author_ids, category_ids, now) for _ in range(self.counts['recipes']))
+
+        total = 0
+        for batch in self.batches(recipes):
+            with transaction.atomic():
+                created = Recipe.objects.bulk_create(batch)
+                IngredientIndex.update_many(created)
+            total += len(created)
+            self.log(f"{total} recipes")
+        return total
+
+    def create_likes(self):
+        """Insert likes, then set every recipe's like_count with one UPDATE"""
+        user_ids = list(User.objects.values_list('pk', flat=True))
+        recipe_ids = list(Recipe.objects.order_by('pk').values_list('pk', flat=True))
+        if not user_ids or not recipe_ids:
+            return 0
+        Like = Recipe.likes.through
+        weights = self.skewed(len(recipe_ids), exponent=0.8)
+        per_user = max(1, self.counts['likes'] // len(user_ids))
+        # Liking more than half the recipes would make distinct draws crawl
+        per_user_cap = max(1, len(recipe_ids) // 2)
+
+        def likes():
+            remaining = self.counts['likes']
+            for user_id in itertools.cycle(user_ids):
+                if remaining <= 0:
+                    return
+                wanted = min(remaining, per_user_cap, max(1, int(self.random.expovariate(1 / per_user))))
+                liked = set()
+                while len(liked) < wanted:
+                    liked.update(self.random.choices(recipe_ids, cum_weights=weights, k=wanted - len(liked)))
+                remaining -= len(liked)
+                for recipe_id in liked:
+                    yield Like(user_id=user_id, recipe_id=recipe_id)
+
+        before = Like.objects.count()
+        inserted = 0
+        for batch in self.batches(likes()):
+            Like.objects.bulk_create(batch, ignore_conflicts=True)
+            inserted += len(batch)
+            self.log(f"{inserted} likes")
+
+        counts = (
+            Like.objects.filter(recipe_id=OuterRef('pk'))
+            .order_by().values('recipe_id').annotate(total=Count('pk')).values('total')
+        )
+        Recipe.objects.update(like_count=Coalesce(Subquery(counts, output_field=IntegerField()), 0))
+        # A user drawn twice may repeat a like; those were ignored
+        return Like.objects.count() - before
@@ -0,0 +1,172 @@
+import contextlib
+import gc
+import io
+import logging
+import statistics
+import time
+import tracemalloc
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from .. import urls
+from ..models import Category, Recipe
+from ..utils.health import percentile
+from ..utils.jobs import SearchJobs
+from ..utils.scraper import RecipeScraper
+
+# Query string sent with every request, covering the views that read one
+QUERY = {
+    'q': 'creamy chicken',
+    'url': 'https://www.example.com/recipes/creamy-chicken/',
+    'ingredients': 'garlic,onion,tomato',
+}
+
+
+def url_kwargs(user):
+    """Values for every URL converter: the user's most liked recipe, the biggest category"""
+    recipe = Recipe.objects.filter(created_by=user).order_by('-like_count').first() or Recipe.objects.first()
+    category = Category.objects.annotate(size=Count('recipe')).order_by('-size').first()
+    return {
+        'pk': recipe.pk if recipe else 0,
+        'category_id': category.pk if category else 0,
+        'job_id': 'benchmark',
+    }
+
+
+def benchmark_user():
+    """Staff user who authored the most recipes, so owner and staff views render"""
+    user = User.objects.annotate(size=Count('recipes')).order_by('-size', 'pk').first()
+    if user is None:
+        raise ValueError('The database has no users; seed it first')
+    if not user.is_staff:
+        User.objects.filter(pk=user.pk).update(is_staff=True)
+    return user
+
+
+def targets(only=None):
+    """(view name, path) for every URL in recipes/urls.py"""
+    values = url_kwargs(benchmark_user())
+    for pattern in urls.urlpatterns:
+        if only and not any(part in pattern.name for part in only):
+            continue
+        kwargs = {name: values[name] for name in pattern.pattern.converters}
+        yield pattern.name, reverse(pattern.name, kwargs=kwargs)
+
+
+@contextlib.contextmanager
+def local_only():
+    """Stub out the web side of the search views; only the local part is measured.
+
+    Every cache alias is also swapped for a private local-memory cache, so
+    a shared backend's fragments and search results are neither served
+    from nor overwritten with the throwaway database's data.
+    """
+    private_caches = {
+        alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'benchmark-{alias}'}
+        for alias in settings.CACHES
+    }
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(override_settings(CACHES=private_caches))
+        # Local-memory caches outlive the override; start each use empty
+        for alias in private_caches:
+            caches[alias].clear()
+        stack.enter_context(mock.patch.object(SearchJobs, 'start', return_value=('benchmark', None)))
+        stack.enter_context(mock.patch.object(RecipeScraper, 'search_recipes', return_value=[]))
+        stack.enter_context(mock.patch.object(RecipeScraper, 'get_recipe_details', return_value=None))
+        # Views print scraper diagnostics and failing views log tracebacks;
+        # keep both out of the report
+        stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+        stack.enter_context(mock.patch.object(logging.getLogger('django.request'), 'disabled', True))
+        yield
+
+
+def fetch(client, path):
+    """GET path and read the whole body (streamed responses included)"""
+    response = client.get(path, QUERY)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    else:
+        response.content
+    return response
+
+
+def clear_caches():
+    for cache in caches.all():
+        cache.clear()
+
+
+def measure(client, path, repeat, cold=False):
+    """Latency percentiles and query count of repeat GETs, plus one traced GET.
+
+    A warm-up request fills caches first unless cold is set, in which case
+    every cache is cleared before each request. The query count is the
+    QueryBudgetMiddleware count of the last timed request.
+    """
+    if not cold:
+        fetch(client, path)
+
+    timings = []
+    for _ in range(repeat):
+        if cold:
+            clear_caches()
+        started = time.perf_counter()
+        response = fetch(client, path)
+        timings.append(time.perf_counter() - started)
+
+    if cold:
+        clear_caches()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fetch(client, path)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'status': response.status_code,
+        'queries': getattr(response, 'query_count', None),
+        'mean_ms': statistics.fmean(timings) * 1000,
+        'p50_ms': percentile(timings, 0.50) * 1000,
+        'p95_ms': percentile(timings, 0.95) * 1000,
+        'p99_ms': percentile(timings, 0.99) * 1000,
+        'peak_kib': (peak - baseline) / 1024,
+    }
+
+
+def run(repeat=30, only=None, cold=False, anonymous=False):
+    """Benchmark every URL against the current database; returns a list of result dicts.
+
+    A view that raises is reported with an ``error`` instead of timings.
+    """
+    client = Client()
+    results = []
+    with local_only():
+        if not anonymous:
+            client.force_login(benchmark_user())
+        for view_name, path in targets(only):
+            row = {'view': view_name, 'path': path}
+            try:
+                row.update(measure(client, path, repeat, cold))
+            except Exception as e:
+                row['error'] = f'{type(e).__name__}: {e}'
+            results.append(row)
+    return results
+
+
+def database_size():
+    return {
+        'users': User.objects.count(),
+        'categories': Category.objects.count(),
+        'recipes': Recipe.objects.count(),
+        'likes': Recipe.likes.through.objects.count(),
+    }
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .utils.categories import CategoryCache
+from .utils.fragments import FragmentCache
+
+
+def fragment_cache(request):
+    """Expose fragment cache versions to {% cache %} blocks in templates"""
+    return {
+        'fragment_versions': SimpleLazyObject(FragmentCache.versions),
+        'fragment_cache_ttl': getattr(settings, 'FRAGMENT_CACHE_TTL', 600),
+    }
+
+
+def categories(request):
+    """Every category, from the in-process CategoryCache"""
+    return {'categories': SimpleLazyObject(CategoryCache.all)}
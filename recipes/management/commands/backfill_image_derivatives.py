@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.utils.images import DERIVATIVE_FIELDS, ImageDerivatives
+
+
+class Command(BaseCommand):
+    help = "Generate missing or stale image derivatives for recipes and profiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild even up-to-date derivatives')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        built = 0
+        for model, (image_field, derivatives_field, kind) in DERIVATIVE_FIELDS.items():
+            rows = (
+                model.objects.exclude(**{image_field: ''}).exclude(**{f'{image_field}__isnull': True})
+                .only('pk', image_field, derivatives_field).order_by('pk')
+            )
+            for instance in rows.iterator(chunk_size=200):
+                field_file = getattr(instance, image_field)
+                if ImageDerivatives.is_placeholder(field_file):
+                    continue
+                if not options['force'] and ImageDerivatives.is_current(field_file, getattr(instance, derivatives_field)):
+                    continue
+                if ImageDerivatives.process(model, instance.pk, force=options['force']):
+                    built += 1
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'Built derivatives for {built} image(s) in {elapsed:.1f}s'))
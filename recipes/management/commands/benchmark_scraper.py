@@ -0,0 +1,65 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from recipes.benchmarks import scraper as benchmark
+
+
+class Command(BaseCommand):
+    help = "Benchmark the scrapers offline against saved pages (time, peak and retained memory per entry point)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50, help='Timed runs per case')
+        parser.add_argument('--case', action='append', help='Only cases whose name contains this (repeatable)')
+        parser.add_argument('--parser', choices=['lxml', 'html.parser'], help='Override SCRAPER_HTML_PARSER')
+        parser.add_argument('--fixtures', default=str(benchmark.FIXTURES_DIR), help='Directory of saved pages')
+        parser.add_argument('--json', dest='json_path', help="Write the results as JSON ('-' for stdout)")
+        parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+        parser.add_argument('--record', metavar='QUERY',
+                            help='Re-record the search page fixtures from the live sites, then exit')
+
+    def handle(self, *args, **options):
+        if options['record']:
+            failed = benchmark.record(options['record'], options['fixtures'])
+            for source_name in failed:
+                self.stderr.write(f"Could not fetch {source_name}; kept its old fixture")
+            self.stdout.write(self.style.SUCCESS(f"Recorded {len(benchmark.SEARCH_FIXTURES) - len(failed)} fixtures"))
+            return
+
+        baseline = {}
+        if options['baseline']:
+            try:
+                with open(options['baseline'], encoding='utf-8') as f:
+                    baseline = {row['case']: row for row in json.load(f)['results']}
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f"Cannot read baseline: {e}")
+
+        overrides = {'SCRAPER_HTML_PARSER': options['parser']} if options['parser'] else {}
+        with override_settings(**overrides):
+            from recipes.utils.parsing import HtmlParser
+            parser_name = HtmlParser.parser_name()
+            results = benchmark.run(options['repeat'], options['fixtures'], options['case'])
+
+        if options['json_path']:
+            report = json.dumps({'parser': parser_name, 'repeat': options['repeat'], 'results': results}, indent=2)
+            if options['json_path'] == '-':
+                self.stdout.write(report)
+                return
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                f.write(report)
+
+        self.stdout.write(f"parser={parser_name} repeat={options['repeat']}")
+        for row in results:
+            line = (
+                f"{row['case']:<32} {row['bytes'] / 1024:>6.0f}KiB  n={row['results']:<2} "
+                f"median={row['median_ms']:7.2f}ms p95={row['p95_ms']:7.2f}ms "
+                f"peak={row['peak_kib']:8.0f}KiB retained={row['retained_kib']:6.0f}KiB"
+            )
+            before = baseline.get(row['case'])
+            if before:
+                line += (
+                    f"  Δmedian={(row['median_ms'] / before['median_ms'] - 1):+.0%}"
+                    f" Δpeak={(row['peak_kib'] / before['peak_kib'] - 1):+.0%}"
+                )
+            self.stdout.write(line)
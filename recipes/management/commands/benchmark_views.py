@@ -0,0 +1,88 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from recipes.benchmarks import views as benchmark
+from recipes.benchmarks.seed import SeedData
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Seed a throwaway database and benchmark every recipes URL (latency percentiles, queries, peak memory)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--categories', type=int, default=12)
+        parser.add_argument('--recipes', type=int, default=5000)
+        parser.add_argument('--likes', type=int, default=20000)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the generated data')
+        parser.add_argument('--db', help='File for the throwaway SQLite database (default: in memory)')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the --db file and reuse it (without re-seeding) on the next run')
+        parser.add_argument('--repeat', type=int, default=30, help='Timed requests per URL')
+        parser.add_argument('--view', action='append', help='Only URL names containing this (repeatable)')
+        parser.add_argument('--cold', action='store_true', help='Clear every cache before each request')
+        parser.add_argument('--anonymous', action='store_true', help='Request as an anonymous visitor')
+        parser.add_argument('--json', dest='json_path', help="Write the results as JSON ('-' for stdout)")
+        parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+
+    def handle(self, *args, **options):
+        if options['keepdb'] and not options['db']:
+            raise CommandError('--keepdb needs --db; an in-memory database cannot be kept')
+        baseline = {}
+        if options['baseline']:
+            try:
+                with open(options['baseline'], encoding='utf-8') as f:
+                    baseline = {row['view']: row for row in json.load(f)['results']}
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f"Cannot read baseline: {e}")
+
+        if options['db']:
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = options['db']
+        setup_test_environment()
+        # Never touches the configured database: Django's test database machinery
+        # creates (and migrates) a separate one
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False, keepdb=options['keepdb'],
+        )
+        try:
+            if Recipe.objects.exists():
+                self.stderr.write('Reusing the existing benchmark database')
+            else:
+                SeedData(
+                    users=options['users'], categories=options['categories'], recipes=options['recipes'],
+                    likes=options['likes'], seed=options['seed'], stdout=self.stderr,
+                ).run()
+            size = benchmark.database_size()
+            results = benchmark.run(options['repeat'], options['view'], options['cold'], options['anonymous'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        if options['json_path']:
+            report = json.dumps({
+                'database': size, 'repeat': options['repeat'], 'cold': options['cold'],
+                'anonymous': options['anonymous'], 'results': results,
+            }, indent=2)
+            if options['json_path'] == '-':
+                self.stdout.write(report)
+                return
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                f.write(report)
+
+        self.stdout.write(' '.join(f'{kind}={count}' for kind, count in size.items()))
+        for row in results:
+            if 'error' in row:
+                self.stdout.write(self.style.ERROR(f"{row['view']:<22} {row['error']}"))
+                continue
+            line = (
+                f"{row['view']:<22} {row['status']} q={row['queries']!s:<3} "
+                f"p50={row['p50_ms']:7.2f}ms p95={row['p95_ms']:7.2f}ms p99={row['p99_ms']:7.2f}ms "
+                f"peak={row['peak_kib']:7.0f}KiB"
+            )
+            before = baseline.get(row['view'])
+            if before and 'error' not in before:
+                line += f"  Δp50={(row['p50_ms'] / before['p50_ms'] - 1):+.0%} Δq={row['queries'] - before['queries']:+d}"
+            self.stdout.write(line)
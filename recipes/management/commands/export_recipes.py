@@ -0,0 +1,49 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand
+
+from recipes.utils.export import RecipeExport
+
+
+class Command(BaseCommand):
+    help = "Stream every recipe (with category, author and like count) as JSONL or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(RecipeExport.FORMATS), default='jsonl')
+        parser.add_argument('--output', '-o', help='File to write (default: stdout)')
+        parser.add_argument('--after-id', type=int, help='Only recipes with a larger id (resume point)')
+        parser.add_argument('--until-id', type=int, help='Only recipes up to and including this id')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        rows = RecipeExport.rows(
+            after_id=options['after_id'], until_id=options['until_id'], chunk_size=options['chunk_size'],
+        )
+        stats = {'count': 0, 'last_id': None}
+
+        def tracked():
+            for row in rows:
+                stats['count'] += 1
+                stats['last_id'] = row['id']
+                yield row
+
+        path = options['output']
+        # Resuming adds to what the interrupted run wrote, header included
+        append = bool(path) and options['after_id'] is not None and os.path.exists(path) and os.path.getsize(path) > 0
+        if options['format'] == 'jsonl':
+            lines = RecipeExport.jsonl(tracked())
+        else:
+            lines = RecipeExport.csv(tracked(), header=not append)
+        output = open(path, 'a' if append else 'w', encoding='utf-8', newline='') if path else sys.stdout
+        try:
+            for line in lines:
+                output.write(line)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+            # Progress goes to stderr so stdout stays a clean export
+            self.stderr.write(
+                f"Exported {stats['count']} recipes (last id {stats['last_id']}, pass it to --after-id to resume)"
+                if stats['last_id'] is not None else 'No recipes exported'
+            )
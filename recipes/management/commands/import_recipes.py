@@ -0,0 +1,52 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.utils.importer import RecipeImporter, iter_json, iter_jsonl, iter_recipe_objects
+
+
+class Command(BaseCommand):
+    help = "Stream recipes from JSONL or schema.org JSON files into the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help="Files to import ('-' reads stdin)")
+        parser.add_argument('--user', required=True, help='Username recorded as the author of imported recipes')
+        parser.add_argument('--format', choices=['auto', 'jsonl', 'json'], default='auto',
+                            help='Input format; auto uses the file extension (.jsonl/.ndjson vs .json)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk insert / transaction')
+        parser.add_argument('--category', help='Category for rows that have none')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['user']!r} does not exist")
+
+        importer = RecipeImporter(
+            user, batch_size=options['batch_size'],
+            default_category=options['category'], stdout=self.stdout,
+        )
+        for path in options['paths']:
+            fmt = options['format']
+            if fmt == 'auto':
+                fmt = 'jsonl' if path.endswith(('.jsonl', '.ndjson')) or path == '-' else 'json'
+            stream = sys.stdin if path == '-' else open(path, encoding='utf-8')
+            try:
+                if fmt == 'jsonl':
+                    rows = iter_jsonl(stream)
+                else:
+                    rows = (recipe for item in iter_json(stream) for recipe in iter_recipe_objects(item))
+                importer.run(rows)
+            except ValueError as e:
+                raise CommandError(f'{path}: invalid JSON ({e})')
+            finally:
+                if stream is not sys.stdin:
+                    stream.close()
+
+        stats = importer.stats
+        rate = stats['read'] / stats['seconds'] if stats['seconds'] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {stats['read']} rows in {stats['seconds']:.1f}s ({rate:.0f} rows/s): "
+            f"{stats['created']} created, {stats['duplicates']} duplicates, {stats['invalid']} invalid"
+        ))
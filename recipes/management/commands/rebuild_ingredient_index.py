@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.utils.ingredients import IngredientIndex
+
+
+class Command(BaseCommand):
+    help = "Re-normalize every recipe's ingredients and rebuild the ingredient index"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        processed = IngredientIndex.rebuild(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'Indexed {processed} recipes in {elapsed:.1f}s'))
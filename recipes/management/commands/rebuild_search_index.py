@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import Recipe
+from recipes.utils.search import RecipeSearch
+
+
+class Command(BaseCommand):
+    help = "Rebuild the SQLite FTS5 index used for local recipe search"
+
+    def handle(self, *args, **options):
+        if not RecipeSearch.is_available():
+            raise CommandError('Full-text index is only available on SQLite')
+        RecipeSearch.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {Recipe.objects.count()} recipes'))
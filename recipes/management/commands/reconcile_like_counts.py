@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F
+
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Recompute Recipe.like_count from the likes table and fix any drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        drifted = (
+            Recipe.objects.annotate(actual=Count('likes'))
+            .exclude(like_count=F('actual'))
+            .values_list('pk', 'like_count', 'actual')
+        )
+        fixed = 0
+        for pk, stored, actual in drifted.iterator():
+            self.stdout.write(f"Recipe {pk}: like_count={stored} actual={actual}")
+            if not options['dry_run']:
+                Recipe.objects.filter(pk=pk).update(like_count=actual)
+            fixed += 1
+
+        verb = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {fixed} drifted recipe(s)'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from recipes.utils.cache import SearchCache
+
+
+class Command(BaseCommand):
+    help = "Show web search cache hit/miss counters (shared backends only; locmem is per process)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them')
+
+    def handle(self, *args, **options):
+        stats = SearchCache.stats()
+        self.stdout.write(
+            f"hits={stats['hits']} misses={stats['misses']} hit_ratio={stats['hit_ratio']:.1%}"
+        )
+        if options['reset']:
+            SearchCache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from recipes.utils.health import SourceHealth
+from recipes.utils.scraper import RecipeScraper
+
+
+class Command(BaseCommand):
+    help = "Show circuit breaker state and latency of each web source (shared cache backends only)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Forget all health data and close every circuit')
+
+    def handle(self, *args, **options):
+        for row in SourceHealth.snapshot(RecipeScraper.SEARCH_URLS):
+            rate = '-' if row['success_rate'] is None else f"{row['success_rate']:.0%}"
+            p50 = '-' if row['p50'] is None else f"{row['p50']:.2f}s"
+            p95 = '-' if row['p95'] is None else f"{row['p95']:.2f}s"
+            self.stdout.write(
+                f"{row['source']:<16} {row['state']:<9} success={rate} p50={p50} p95={p95} "
+                f"timeout={row['timeout']:.1f}s samples={row['samples']}"
+            )
+        if options['reset']:
+            SourceHealth.reset(RecipeScraper.SEARCH_URLS)
+            self.stdout.write(self.style.SUCCESS('Health data reset'))
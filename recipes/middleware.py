@@ -0,0 +1,163 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from .routers import read_only_request
+
+logger = logging.getLogger('recipes.queries')
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised in strict mode when a view issues more queries than its budget"""
+
+
+class QueryRecorder:
+    """Database execute wrapper that counts and times every statement"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            self.statements.append((elapsed, sql))
+
+    def slowest(self, limit):
+        return sorted(self.statements, key=lambda item: item[0], reverse=True)[:limit]
+
+
+class QueryBudgetMiddleware:
+    """Record query count and SQL time per request and enforce per-view budgets.
+
+    Budgets come from ``QUERY_BUDGETS`` (URL name -> max queries) with
+    ``QUERY_BUDGET_DEFAULT`` for everything else. Going over budget raises
+    ``QueryBudgetExceeded`` when ``QUERY_BUDGET_STRICT`` is on (tests) and
+    logs a warning otherwise.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with self.wrap_connections(recorder):
+            response = self.get_response(request)
+        return self.finish(request, response, recorder, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        # Connections are per thread; ORM calls from async views run in the
+        # request's sync_to_async thread, so install the wrappers there
+        stack = await sync_to_async(self.wrap_connections)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, recorder, time.perf_counter() - start)
+
+    def finish(self, request, response, recorder, elapsed):
+        view_name = self.view_name(request)
+        budget = self.budget_for(view_name)
+        response.query_count = recorder.count
+
+        if getattr(settings, 'QUERY_BUDGET_HEADERS', settings.DEBUG):
+            response['X-Query-Count'] = str(recorder.count)
+            response['Server-Timing'] = (
+                f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries", '
+                f'total;dur={elapsed * 1000:.1f}'
+            )
+
+        record = {
+            'view': view_name,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'budget': budget,
+            'sql_ms': round(recorder.duration * 1000, 2),
+            'total_ms': round(elapsed * 1000, 2),
+            'slowest': [
+                {'ms': round(duration * 1000, 2), 'sql': sql[:300]}
+                for duration, sql in recorder.slowest(getattr(settings, 'QUERY_BUDGET_SLOWEST', 3))
+            ],
+        }
+
+        if budget is not None and recorder.count > budget:
+            message = f"{view_name} issued {recorder.count} queries (budget {budget})"
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
+
+        return response
+
+    @staticmethod
+    def view_name(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return None
+        return match.view_name
+
+    @staticmethod
+    def budget_for(view_name):
+        budgets = getattr(settings, 'QUERY_BUDGETS', {})
+        return budgets.get(view_name, getattr(settings, 'QUERY_BUDGET_DEFAULT', None))
+
+    @staticmethod
+    def wrap_connections(recorder):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        return stack
+
+
+class ReadOnlyRequestMiddleware:
+    """Mark safe-method requests so ReadWriteRouter can serve their reads from the read alias"""
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = read_only_request.set(request.method in self.SAFE_METHODS)
+        try:
+            return self.get_response(request)
+        finally:
+            read_only_request.reset(token)
+
+    async def __acall__(self, request):
+        # sync_to_async copies the context, so ORM threads see the flag too
+        token = read_only_request.set(request.method in self.SAFE_METHODS)
+        try:
+            return await self.get_response(request)
+        finally:
+            read_only_request.reset(token)
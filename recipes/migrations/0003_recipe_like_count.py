@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:20
+
+from django.db import migrations, models
+from django.db.models import Count
+
+from recipes.utils.search import RecipeSearch
+
+
+def populate_like_count(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    recipes = Recipe.objects.annotate(num_likes=Count("likes")).filter(num_likes__gt=0)
+    for recipe in recipes.iterator():
+        Recipe.objects.filter(pk=recipe.pk).update(like_count=recipe.num_likes)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0002_recipe_fts"),
+    ]
+
+    # Adding (or, when unapplying, removing) the column rebuilds
+    # recipes_recipe on SQLite, which drops the FTS triggers
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, RecipeSearch.restore_after_rebuild),
+        migrations.AddField(
+            model_name="recipe",
+            name="like_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_like_count, migrations.RunPython.noop),
+        migrations.RunPython(RecipeSearch.restore_after_rebuild, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from recipes.utils.ingredients import normalize_ingredients
+
+
+def index_existing_recipes(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    Ingredient = apps.get_model("recipes", "Ingredient")
+    RecipeIngredient = apps.get_model("recipes", "RecipeIngredient")
+    ids = {}
+    for recipe in Recipe.objects.only("pk", "ingredients").iterator():
+        rows = []
+        for name in normalize_ingredients(recipe.ingredients):
+            if name not in ids:
+                ids[name] = Ingredient.objects.get_or_create(name=name)[0].pk
+            rows.append(RecipeIngredient(recipe_id=recipe.pk, ingredient_id=ids[name]))
+        RecipeIngredient.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0003_recipe_like_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Ingredient",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="RecipeIngredient",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "ingredient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="recipe_index",
+                        to="recipes.ingredient",
+                    ),
+                ),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ingredient_index",
+                        to="recipes.recipe",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["ingredient", "recipe"], name="recipe_ingredient_lookup"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("recipe", "ingredient"), name="unique_recipe_ingredient"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(index_existing_recipes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:32
+
+from django.db import migrations, models
+
+from recipes.utils.search import RecipeSearch
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0004_ingredient_index"),
+    ]
+
+    # Adding (or, when unapplying, removing) image_derivatives rebuilds
+    # recipes_recipe on SQLite, which drops the FTS triggers
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, RecipeSearch.restore_after_rebuild),
+        migrations.AddField(
+            model_name="profile",
+            name="profile_pic_derivatives",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="image_derivatives",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(RecipeSearch.restore_after_rebuild, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:37
+
+from django.db import migrations, models
+
+from recipes.utils.importer import content_hash
+from recipes.utils.search import RecipeSearch
+
+
+def hash_existing_recipes(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    recipes = Recipe.objects.only("pk", "title", "ingredients", "instructions")
+    for recipe in recipes.iterator():
+        Recipe.objects.filter(pk=recipe.pk).update(
+            content_hash=content_hash(recipe.title, recipe.ingredients, recipe.instructions)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0005_image_derivatives"),
+    ]
+
+    # Adding (or, when unapplying, removing) the column rebuilds
+    # recipes_recipe on SQLite, which drops the FTS triggers
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, RecipeSearch.restore_after_rebuild),
+        migrations.AddField(
+            model_name="recipe",
+            name="content_hash",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=64
+            ),
+        ),
+        migrations.RunPython(hash_existing_recipes, migrations.RunPython.noop),
+        migrations.RunPython(RecipeSearch.restore_after_rebuild, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0006_recipe_content_hash"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["-created_date", "-id"], name="recipe_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["category", "-created_date", "-id"],
+                name="recipe_category_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["created_by", "-created_date", "-id"],
+                name="recipe_author_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.2 on 2026-10-18 09:12
+
+from django.db import migrations, models
+from django.db.models import Count
+
+from recipes.utils.search import RecipeSearch
+
+
+def populate_ingredient_count(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    RecipeIngredient = apps.get_model("recipes", "RecipeIngredient")
+    counts = (
+        RecipeIngredient.objects.values("recipe_id")
+        .annotate(total=Count("ingredient_id"))
+        .values_list("recipe_id", "total")
+    )
+    for recipe_id, total in counts.iterator():
+        Recipe.objects.filter(pk=recipe_id).update(ingredient_count=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0007_recipe_listing_indexes"),
+    ]
+
+    # Adding (or, when unapplying, removing) the column rebuilds
+    # recipes_recipe on SQLite, which drops the FTS triggers
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, RecipeSearch.restore_after_rebuild),
+        migrations.AddField(
+            model_name="recipe",
+            name="ingredient_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_ingredient_count, migrations.RunPython.noop),
+        migrations.RunPython(RecipeSearch.restore_after_rebuild, migrations.RunPython.noop),
+    ]
@@ -24,6 +24,8 @@ class Recipe(models.Model):
 
     # Image upload
     image = models.ImageField(upload_to='recipe_pics/', blank=True, null=True)
+    # Resized copies of image, written in the background (see utils/images.py)
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
 
     # Relationships
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True)
@@ -35,22 +37,58 @@ class Recipe(models.Model):
 
     # Features
     likes = models.ManyToManyField(User, related_name='liked_recipes', blank=True)
+    # Denormalized len(likes), kept in step by like_recipe
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    # sha256 of the normalized title/ingredients/instructions, for import dedup
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+    # Denormalized number of ingredient_index rows, kept in step by IngredientIndex
+    ingredient_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.title
 
     @property
     def total_likes(self):
-        return self.likes.count()
+        return self.like_count
 
     class Meta:
         ordering = ['-created_date']
+        # Every listing pages through (-created_date, -id) (see utils/pagination.py),
+        # optionally narrowed to one category or author; these let each page
+        # be read straight off an index instead of sorted in a temp B-tree
+        indexes = [
+            models.Index(fields=['-created_date', '-id'], name='recipe_created_idx'),
+            models.Index(fields=['category', '-created_date', '-id'], name='recipe_category_created_idx'),
+            models.Index(fields=['created_by', '-created_date', '-id'], name='recipe_author_created_idx'),
+        ]
+
+class Ingredient(models.Model):
+    """Canonical ingredient name, e.g. "tomato" """
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+class RecipeIngredient(models.Model):
+    """Inverted index row: which normalized ingredients a recipe uses"""
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='ingredient_index')
+    ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE, related_name='recipe_index')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['recipe', 'ingredient'], name='unique_recipe_ingredient'),
+        ]
+        indexes = [
+            # Covering index for "recipes using these ingredients"
+            models.Index(fields=['ingredient', 'recipe'], name='recipe_ingredient_lookup'),
+        ]
 
 class Profile(models.Model):
     """Extended user profile"""
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     bio = models.TextField(max_length=500, blank=True)
     profile_pic = models.ImageField(upload_to='profile_pics/', default='default.jpg', blank=True)
+    profile_pic_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     location = models.CharField(max_length=100, blank=True)
     favorite_food = models.CharField(max_length=200, blank=True)
 
@@ -0,0 +1,40 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Set by ReadOnlyRequestMiddleware while a GET/HEAD/OPTIONS request is handled
+read_only_request = ContextVar('read_only_request', default=False)
+
+
+class ReadWriteRouter:
+    """Send reads made while serving safe requests to ``SQLITE_READ_ALIAS``.
+
+    The read alias is a second (read-only) connection to the same SQLite
+    file, so with WAL its queries never wait on the writer. Everything else
+    uses the default alias: writes, reads outside safe requests and reads
+    inside a transaction on the default alias, which must see that
+    transaction's own uncommitted rows.
+    """
+
+    def read_alias(self):
+        alias = getattr(settings, 'SQLITE_READ_ALIAS', None)
+        return alias if alias in settings.DATABASES else None
+
+    def db_for_read(self, model, **hints):
+        alias = self.read_alias()
+        if not alias or not read_only_request.get():
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases are the same database
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != self.read_alias()
@@ -0,0 +1,76 @@
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Category, Profile, Recipe
+from .utils.fragments import FragmentCache
+from .utils.images import DERIVATIVE_FIELDS, ImageDerivatives
+from .utils.importer import content_hash
+from .utils.ingredients import IngredientIndex
+from .utils.sqlite import SqliteProfile
+
+
+@receiver(pre_save, sender=Recipe)
+def set_recipe_content_hash(sender, instance, raw=False, **kwargs):
+    """Keep Recipe.content_hash current so imports can skip duplicates"""
+    if not raw:
+        instance.content_hash = content_hash(instance.title, instance.ingredients, instance.instructions)
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe_ingredients(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Keep the ingredient inverted index in step with Recipe.ingredients"""
+    if raw or (update_fields is not None and 'ingredients' not in update_fields):
+        return
+    IngredientIndex.update(instance)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Profile)
+def queue_image_derivatives(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Build resized copies of a newly uploaded image off the request path"""
+    image_field, derivatives_field, kind = DERIVATIVE_FIELDS[sender]
+    if raw or (update_fields is not None and image_field not in update_fields):
+        return
+    field_file = getattr(instance, image_field)
+    if not field_file or ImageDerivatives.is_placeholder(field_file):
+        return
+    if not ImageDerivatives.is_current(field_file, getattr(instance, derivatives_field)):
+        ImageDerivatives.schedule(instance)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe_fragments(sender, raw=False, **kwargs):
+    if not raw:
+        FragmentCache.bump('recipes')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_fragments(sender, raw=False, **kwargs):
+    if not raw:
+        FragmentCache.bump('categories')
+
+
+@receiver(m2m_changed, sender=Recipe.likes.through)
+def invalidate_like_fragments(sender, action, **kwargs):
+    # Cards show the like count
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        FragmentCache.bump('recipes')
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_fragments(sender, update_fields=None, raw=False, **kwargs):
+    # Cards show the author's username; logins only touch last_login
+    if raw or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    FragmentCache.bump('recipes')
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """WAL and the other SQLITE_PRAGMAS on every new connection (SQLITE_PRODUCTION)"""
+    if connection.vendor == 'sqlite' and SqliteProfile.enabled():
+        SqliteProfile.apply(connection)
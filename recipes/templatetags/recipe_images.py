@@ -0,0 +1,40 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(field_file, sizes='100vw', **attrs):
+    """Render an uploaded image as <picture> using its derivatives.
+
+    {% responsive_image recipe.image sizes="(min-width: 768px) 33vw, 100vw" class="card-img-top" alt=recipe.title %}
+
+    Falls back to a plain <img> of the original until the background job
+    has written the derivatives.
+    """
+    if not field_file:
+        return ''
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+    extra = format_html_join('', ' {}="{}"', sorted(attrs.items()))
+
+    manifest = getattr(field_file.instance, f'{field_file.field.name}_derivatives', None) or {}
+    formats = manifest.get('formats') if manifest.get('source') == field_file.name else None
+    if not formats or 'image/jpeg' not in formats:
+        return format_html('<img src="{}"{}>', field_file.url, extra)
+
+    storage = field_file.storage
+
+    def srcset(variants):
+        return ', '.join(f'{storage.url(name)} {width}w' for width, name in variants)
+
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        ((mime, srcset(variants), sizes) for mime, variants in formats.items() if mime != 'image/jpeg'),
+    )
+    jpeg = formats['image/jpeg']
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        sources, storage.url(jpeg[-1][1]), srcset(jpeg), sizes, extra,
+    )
@@ -1,3 +1,1095 @@
-from django.test import TestCase
+import asyncio
+import base64
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from bs4 import BeautifulSoup
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.template import Context, Template, TemplateDoesNotExist
+from django.core.cache import cache, caches
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import async_views, urls
+from .benchmarks import scraper as scraper_benchmark
+from .benchmarks import views as view_benchmark
+from .benchmarks.seed import SeedData
+from .middleware import QueryBudgetMiddleware
+from .routers import ReadWriteRouter, read_only_request
+from .models import Category, Profile, Recipe
+from .utils.async_scraper import AsyncRecipeScraper
+from .utils.cache import DetailCache, SearchCache
+from .utils.categories import CategoryCache
+from .utils.fragments import FragmentCache
+from .utils import http
+from .utils.health import CLOSED, HALF_OPEN, OPEN, SourceHealth
+from .utils.images import ImageDerivatives
+from .utils.importer import RecipeImporter, iter_json, iter_recipe_objects
+from .utils.ingredients import IngredientIndex
+from .utils.jobs import SearchJobs
+from .utils.pagination import KeysetPaginator
+from .utils.parsing import JsonLdScanner
+from .utils.ranking import ResultMerger, url_key
+from .utils.search import RecipeSearch
+from .utils.scraper import RecipeScraper
+from .utils.sqlite import SqliteProfile
+
+# The 'shared' cache is a directory on disk; tests that write to it get a private one
+ISOLATED_CACHES = dict(settings.CACHES, shared={
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'tests-shared',
+})
+
+
+def make_recipes(user, category, count):
+    return Recipe.objects.bulk_create([
+        Recipe(
+            title=f'Recipe {i}', description='Tasty', ingredients='salt, pepper',
+            instructions='Cook it', preparation_time=10, cooking_time=20,
+            category=category, created_by=user,
+        )
+        for i in range(count)
+    ])
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+@mock.patch.object(SearchJobs, 'start', return_value=('job', None))
+@mock.patch.object(RecipeScraper, 'search_recipes', return_value=[])
+@mock.patch.object(RecipeScraper, 'get_recipe_details', return_value=None)
+class QueryBudgetTests(TestCase):
+    """Every URL in recipes/urls.py must stay within its QUERY_BUDGETS entry"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('cook', password='secret-pass-123')
+        Profile.objects.create(user=cls.user)
+        cls.category = Category.objects.create(name='Dinner')
+        Category.objects.create(name='Lunch')
+        cls.recipes = make_recipes(cls.user, cls.category, 30)
+        for recipe in Recipe.objects.all()[:10]:
+            recipe.likes.add(cls.user)
+
+    def url_kwargs(self, pattern):
+        values = {'pk': self.recipes[0].pk, 'category_id': self.category.pk, 'job_id': 'job'}
+        return {name: values[name] for name in pattern.pattern.converters}
+
+    def assertWithinQueryBudget(self, url, view_name):
+        try:
+            response = self.client.get(url, {'q': 'recipe', 'url': 'https://example.com/r'})
+        except TemplateDoesNotExist as e:
+            self.skipTest(f'{view_name}: template {e} is missing')
+        budget = QueryBudgetMiddleware.budget_for(view_name)
+        self.assertIsNotNone(budget, f'{view_name} has no query budget')
+        self.assertLessEqual(response.query_count, budget)
+
+    def test_every_url_within_budget(self, *mocks):
+        self.client.force_login(self.user)
+        for pattern in urls.urlpatterns:
+            url = reverse(pattern.name, kwargs=self.url_kwargs(pattern))
+            with self.subTest(view=pattern.name):
+                self.assertWithinQueryBudget(url, pattern.name)
+
+    def test_listing_query_count_is_constant(self, *mocks):
+        self.client.force_login(self.user)
+        # The first request may load the in-process category list; compare warm requests
+        self.client.get(reverse('recipe_list'))
+        before = self.client.get(reverse('recipe_list')).query_count
+        make_recipes(self.user, self.category, 20)
+        self.assertEqual(self.client.get(reverse('recipe_list')).query_count, before)
+
+
+class QueryPlanTests(TestCase):
+    """EXPLAIN QUERY PLAN of each listing's page query: no full scans, no sorts.
+
+    The page query is the SELECT on recipes_recipe with an ORDER BY; a plan
+    fails on a bare ``SCAN <table>`` or a ``USE TEMP B-TREE`` step.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('planner', password='secret-pass-123')
+        Profile.objects.create(user=cls.user)
+        cls.category = Category.objects.create(name='Dinner')
+        recipes = make_recipes(cls.user, cls.category, 30)
+        for recipe in recipes[:10]:
+            recipe.likes.add(cls.user)
+        cls.cursor = KeysetPaginator.encode_cursor('n', recipes[15].created_date, recipes[15].pk)
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Plans are checked against SQLite')
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def page_queries(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries, view_benchmark.local_only():
+            # The query has already run when a missing template is reached
+            with contextlib.suppress(TemplateDoesNotExist):
+                self.client.get(url, params)
+        return [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and ' FROM "recipes_recipe"' in query['sql']
+            and ' ORDER BY ' in query['sql']
+        ]
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertIndexedPlan(self, url, params=None, allow_sort=False):
+        page_queries = self.page_queries(url, params)
+        self.assertTrue(page_queries, f'{url} ran no recipe listing query')
+        for sql in page_queries:
+            plan = self.plan(sql)
+            for step in plan:
+                self.assertNotRegex(step, r'^SCAN \S+$', f'full scan in {plan}')
+                if not allow_sort:
+                    self.assertNotIn('USE TEMP B-TREE', step, f'sort in {plan}')
+
+    def test_listings_read_pages_off_an_index(self):
+        cases = [
+            ('home', {}),
+            ('recipe_list', {}),
+            ('recipe_list', {'category': self.category.pk}),
+            ('recipe_list', {'cursor': self.cursor}),
+            ('recipe_list', {'cursor': 'p' + self.cursor[1:]}),
+            ('category_recipes', {}),
+        ]
+        for view_name, params in cases:
+            url = reverse(view_name, args=[self.category.pk] if view_name == 'category_recipes' else [])
+            with self.subTest(view=view_name, params=params):
+                self.assertIndexedPlan(url, params)
+
+    def test_admin_changelist_filters_use_an_index(self):
+        url = reverse('admin:recipes_recipe_changelist')
+        self.assertIndexedPlan(url, {'created_date__gte': '2000-01-01 00:00:00+00:00', 'created_date__lt': '2100-01-01 00:00:00+00:00'})
+        self.assertIndexedPlan(url, {'category__id__exact': self.category.pk})
+
+    def test_liked_recipes_are_found_by_user(self):
+        # A user's likes are searched by user_id, then that (bounded) set is
+        # sorted; ordering it off an index would need created_date on the likes table
+        self.assertIndexedPlan(reverse('saved_recipes'), allow_sort=True)
+        self.assertIndexedPlan(reverse('profile'), allow_sort=True)
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class FragmentCacheTests(TestCase):
+    """Cached home fragments are served without queries and never go stale"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('baker', password='secret-pass-123')
+        cls.category = Category.objects.create(name='Dessert')
+        make_recipes(cls.user, cls.category, 3)
+
+    def setUp(self):
+        cache.clear()
+        # A private in-memory 'shared' cache; versions must not outlive the test's rows
+        FragmentCache.get_cache().clear()
+
+    def test_anonymous_home_is_query_free_once_cached(self):
+        self.client.get(reverse('home'))
+        with self.assertNumQueries(0):
+            self.client.get(reverse('home'))
+
+    def test_changes_invalidate_fragments(self):
+        self.client.get(reverse('home'))
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = make_recipes(self.user, self.category, 1)[0]
+            recipe.title = 'Fresh Pavlova'
+            recipe.save()
+            Category.objects.create(name='Brunch')
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Fresh Pavlova')
+        self.assertContains(response, 'Brunch')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.likes.add(self.user)
+            Recipe.objects.filter(pk=recipe.pk).update(like_count=1)
+        self.assertEqual(self.home_like_counts()['Fresh Pavlova'], 1)
+
+    def home_like_counts(self):
+        """{title: like count} as rendered in the home recipe cards"""
+        soup = BeautifulSoup(self.client.get(reverse('home')).content, 'html.parser')
+        counts = {}
+        for card in soup.select('.card-body'):
+            heart = card.select_one('.fa-heart')
+            if heart is not None:
+                counts[card.select_one('.card-title').get_text(strip=True)] = int(heart.next_sibling.strip())
+        return counts
+
+    def test_categories_context_served_from_memory(self):
+        self.client.get(reverse('recipe_list'))
+        with self.assertNumQueries(0):
+            names = [c.name for c in CategoryCache.all()]
+        self.assertEqual(names, ['Dessert'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.delete()
+        self.assertEqual(CategoryCache.all(), [])
+
+
+class LikeToggleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('fan', password='secret-pass-123')
+        cls.recipe = make_recipes(cls.user, Category.objects.create(name='Dinner'), 1)[0]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_json_toggle_flips_state_and_count(self):
+        url = reverse('like_recipe_toggle', args=[self.recipe.pk])
+        liked, unliked = self.client.post(url), self.client.post(url)
+        self.assertEqual(liked.json(), {'liked': True, 'likes': 1})
+        self.assertEqual(unliked.json(), {'liked': False, 'likes': 0})
+        budget = QueryBudgetMiddleware.budget_for('like_recipe_toggle')
+        self.assertLessEqual(max(liked.query_count, unliked.query_count), budget)
+        self.recipe.refresh_from_db()
+        self.assertEqual((self.recipe.like_count, self.recipe.likes.count()), (0, 0))
+        self.assertEqual(self.client.get(url).status_code, 405)
+
+    def test_missing_recipe_is_rolled_back(self):
+        response = self.client.post(reverse('like_recipe_toggle', args=[self.recipe.pk + 1]))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Recipe.likes.through.objects.exists())
+
+    def test_form_post_still_redirects(self):
+        response = self.client.post(reverse('like_recipe', args=[self.recipe.pk]))
+        self.assertRedirects(response, reverse('recipe_detail', args=[self.recipe.pk]), fetch_redirect_response=False)
+        self.assertTrue(self.recipe.likes.filter(pk=self.user.pk).exists())
+
+class SearchPageParsingTests(SimpleTestCase):
+
+    def test_cards_with_several_classes_survive_the_strainer(self):
+        html = (
+            '<html><body><article class="post type-post has-post-thumbnail">'
+            '<h2 class="entry-title"><a href="https://example.com/soup/">Soup</a></h2>'
+            '<img class="attachment-medium wp-post-image" src="soup.jpg"></article></body></html>'
+        ).encode()
+        for parser in ('html.parser', 'lxml'):
+            with self.subTest(parser=parser), override_settings(SCRAPER_HTML_PARSER=parser):
+                recipes = RecipeScraper.parse_search_page('RecipeTin Eats', html, 'utf-8')
+                self.assertEqual([(r['title'], r['image']) for r in recipes], [('Soup', 'soup.jpg')])
+
+    def test_benchmark_fixtures_are_served_offline_and_parsed(self):
+        results = {row['case']: row for row in scraper_benchmark.run(repeat=1)}
+        self.assertEqual(len(results), len(scraper_benchmark.SEARCH_FIXTURES) + len(scraper_benchmark.DETAIL_FIXTURES))
+        for case, row in results.items():
+            with self.subTest(case=case):
+                # More than the single placeholder line of a fallback recipe
+                self.assertGreater(row['results'], 1)
+
+    def test_record_keeps_whole_pages_and_skips_the_breaker(self):
+        page = b'<html><body>' + b'x' * 4096 + b'</body></html>'
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(scraper_benchmark.offline(dict.fromkeys(scraper_benchmark.load_pages(), page)))
+        self.enterContext(override_settings(SCRAPER_MAX_PAGE_BYTES=1024))
+        # Cleanups run last-in first-out, so the breakers close before offline() exits
+        source_names = list(scraper_benchmark.SEARCH_FIXTURES)
+        self.addCleanup(SourceHealth.reset, source_names)
+        for source_name in source_names:
+            SourceHealth.save(source_name, {'samples': [], 'failures': 3, 'opened_at': time.time()})
+
+        self.assertEqual(scraper_benchmark.record('soup', directory), [])
+        for source_name, filename in scraper_benchmark.SEARCH_FIXTURES.items():
+            with self.subTest(source=source_name):
+                self.assertEqual((Path(directory) / filename).read_bytes(), page)
+                self.assertEqual(SourceHealth.load(source_name)['samples'], [])
+
+
+class JsonLdScannerTests(SimpleTestCase):
+    RECIPE = {'@type': 'Recipe', 'name': 'Lentil Soup', 'recipeIngredient': ['lentils', 'stock']}
+
+    def page(self, *blocks, body=''):
+        scripts = ''.join(f'<script type="application/ld+json">{json.dumps(block)}</script>' for block in blocks)
+        return f'<html><head><script>var a = "<b>";</script>{scripts}</head><body>{body}</body></html>'.encode()
+
+    def test_blocks_split_across_chunks_are_reassembled(self):
+        page = self.page({'@type': 'WebSite'}, self.RECIPE)
+        for size in (1, 7, 64):
+            with self.subTest(chunk_size=size):
+                scanner = JsonLdScanner()
+                blocks = [block for i in range(0, len(page), size) for block in scanner.feed(page[i:i + size])]
+                self.assertEqual([json.loads(block) for block in blocks], [{'@type': 'WebSite'}, self.RECIPE])
+
+    def test_reading_stops_at_the_first_recipe(self):
+        chunks = iter([self.page(self.RECIPE)[:-14], b'</body></html>', b'<p>never read</p>'])
+        recipe = RecipeScraper.parse_recipe_stream(chunks, 'utf-8')
+        self.assertEqual(recipe['title'], 'Lentil Soup')
+        self.assertEqual(list(chunks), [b'</body></html>', b'<p>never read</p>'])
+
+    @override_settings(SCRAPER_MAX_PAGE_BYTES=400)
+    def test_pages_without_schema_fall_back_to_the_dom_within_the_cap(self):
+        body = '<h1>Pea Soup</h1><ul class="ingredients"><li>peas</li><li>mint</li></ul>'
+        chunks = iter([self.page(body=body), b'<p>' + b'x' * 400 + b'</p>', b'<p>never read</p>'])
+        recipe = RecipeScraper.parse_recipe_stream(chunks, 'utf-8')
+        self.assertEqual((recipe['title'], recipe['ingredients']), ('Pea Soup', ['peas', 'mint']))
+        self.assertEqual(list(chunks), [b'<p>never read</p>'])
+
+        scanner = JsonLdScanner()
+        scanner.feed(b'x' * 500)
+        self.assertTrue(scanner.full)
+        self.assertEqual(len(scanner.body), 400)
+
+    def test_graph_and_list_wrapped_recipes_are_found(self):
+        wrapped = {
+            'graph': {'@context': 'https://schema.org', '@graph': [{'@type': 'WebPage'}, self.RECIPE]},
+            'list': [{'@type': 'Organization'}, dict(self.RECIPE, **{'@type': ['Recipe', 'NewsArticle']})],
+        }
+        for name, data in wrapped.items():
+            with self.subTest(wrapper=name):
+                recipe = RecipeScraper.schema_recipe_from_json(json.dumps(data).encode())
+                self.assertEqual((recipe['title'], recipe['ingredients']), ('Lentil Soup', ['lentils', 'stock']))
+        self.assertIsNone(RecipeScraper.schema_recipe_from_json(b'{"@graph": [{"@type": "WebPage"}]}'))
+
+
+class RecipeImportTests(TestCase):
+
+    def test_streams_schema_json_and_skips_duplicates(self):
+        user = User.objects.create_user('importer')
+        items = [{'@type': 'WebPage'}] + [
+            {'@type': 'Recipe', 'name': f'Soup {i % 3}', 'recipeIngredient': ['2 cups water', 'salt'],
+             'recipeInstructions': [{'@type': 'HowToStep', 'text': 'Boil'}], 'prepTime': 'PT1H5M',
+             'recipeCategory': 'Soups'}
+            for i in range(5)
+        ]
+        stream = io.StringIO(json.dumps(items))
+        rows = (row for item in iter_json(stream, chunk_size=16) for row in iter_recipe_objects(item))
+        stats = RecipeImporter(user, batch_size=2).run(rows)
+
+        self.assertEqual((stats['created'], stats['duplicates']), (3, 2))
+        recipe = Recipe.objects.get(title='Soup 0')
+        self.assertEqual(recipe.preparation_time, 65)
+        self.assertEqual(recipe.category.name, 'Soups')
+        self.assertEqual(recipe.ingredient_index.count(), 2)
+
+
+class RecipeExportCommandTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipes = make_recipes(User.objects.create_user('exporter'), Category.objects.create(name='Soups'), 4)
+
+    def export(self, path, fmt, **options):
+        call_command('export_recipes', format=fmt, output=path, stderr=io.StringIO(), **options)
+
+    def test_resumed_export_appends_to_the_output_file(self):
+        middle = self.recipes[1].pk
+        with tempfile.TemporaryDirectory() as directory:
+            for fmt in ('jsonl', 'csv'):
+                with self.subTest(format=fmt):
+                    whole, resumed = os.path.join(directory, f'whole.{fmt}'), os.path.join(directory, f'resumed.{fmt}')
+                    self.export(whole, fmt)
+                    self.export(resumed, fmt, until_id=middle)
+                    self.export(resumed, fmt, after_id=middle)
+                    with open(whole, encoding='utf-8') as a, open(resumed, encoding='utf-8') as b:
+                        self.assertEqual(b.read(), a.read())
+
+
+class ViewBenchmarkTests(TestCase):
+
+    def test_seeds_consistent_data_and_reports_every_url(self):
+        created = SeedData(users=5, categories=3, recipes=40, likes=60, batch_size=16).run()
+        self.assertEqual(created['recipes'], Recipe.objects.count())
+        like_total = sum(Recipe.objects.values_list('like_count', flat=True))
+        self.assertEqual(like_total, Recipe.likes.through.objects.count())
+        self.assertTrue(Profile.objects.filter(user__username='bench0').exists())
+
+        results = view_benchmark.run(repeat=1, only=['home', 'recipe_list', 'pantry'])
+        self.assertEqual([row['view'] for row in results], ['home', 'recipe_list', 'pantry_search'])
+        for row in results:
+            self.assertEqual(row['status'], 200)
+            self.assertLessEqual(row['queries'], QueryBudgetMiddleware.budget_for(row['view']))
+
+
+class SqliteProductionTests(SimpleTestCase):
+
+    databases = {'default'}
+
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout': 1234})
+    def test_profile_applies_pragmas_with_overrides(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+        SqliteProfile.apply(connection)
+        status = SqliteProfile.status(connection)
+        self.assertEqual(status['busy_timeout'], 1234)
+        self.assertEqual(status['synchronous'], 1)
+        self.assertEqual(status['temp_store'], 2)
+
+    @override_settings(SQLITE_READ_ALIAS='default')
+    def test_router_reads_from_alias_only_for_safe_requests_outside_transactions(self):
+        router = ReadWriteRouter()
+        self.assertIsNone(router.db_for_read(Recipe))
+
+        token = read_only_request.set(True)
+        try:
+            with mock.patch.object(connection, 'in_atomic_block', False):
+                self.assertEqual(router.db_for_read(Recipe), 'default')
+            with mock.patch.object(connection, 'in_atomic_block', True):
+                self.assertIsNone(router.db_for_read(Recipe))
+        finally:
+            read_only_request.reset(token)
+        self.assertEqual(router.db_for_write(Recipe), 'default')
+
+
+@override_settings(RECIPES_PER_PAGE=2)
+@mock.patch.object(RecipeScraper, 'search_recipes', return_value=[
+    {'title': 'Dinner Traybake', 'source': 'Tasty', 'url': 'https://tasty.co/recipe/traybake'},
+])
+class CategoryRecipesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Dinner')
+        make_recipes(User.objects.create_user('chef'), cls.category, 5)
+
+    def kinds(self, response):
+        return [result['kind'] for result in response.context['results']]
+
+    def test_web_recipes_are_merged_into_the_first_page_only(self, search):
+        url = reverse('category_recipes', args=[self.category.pk])
+        first = self.client.get(url)
+        self.assertEqual(sorted(self.kinds(first)), ['local', 'local', 'web'])
+        search.reset_mock()
+
+        second = self.client.get(url, {'cursor': first.context['page'].next_cursor})
+        self.assertEqual(self.kinds(second), ['local', 'local'])
+        search.assert_not_called()
+
+        # Coming back to page 1 through a backward cursor brings them back
+        back = self.client.get(url, {'cursor': second.context['page'].previous_cursor})
+        self.assertFalse(back.context['page'].has_previous)
+        self.assertIn('web', self.kinds(back))
+
+    def test_async_view_searches_the_web_for_the_first_page_only(self, search):
+        url = reverse('category_recipes', args=[self.category.pk])
+        next_cursor = self.client.get(url).context['page'].next_cursor
+        view = async_to_sync(async_views.category_recipes)
+        with mock.patch.object(AsyncRecipeScraper, 'search_recipes', new_callable=mock.AsyncMock,
+                               return_value=search.return_value) as web_search:
+            for params, searched in (({}, True), ({'cursor': next_cursor}, False)):
+                request = RequestFactory().get(url, params)
+                request.user = AnonymousUser()
+                web_search.reset_mock()
+                with self.subTest(params=params):
+                    self.assertEqual(view(request, self.category.pk).status_code, 200)
+                    self.assertEqual(web_search.await_count, int(searched))
+
+
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        recipes = make_recipes(User.objects.create_user('pager'), None, 7)
+        # Several rows share a created_date, so only the id breaks the tie
+        stamps = [timezone.now() - timedelta(days=i // 3) for i in range(7)]
+        for recipe, stamp in zip(recipes, stamps):
+            recipe.created_date = stamp
+        Recipe.objects.bulk_update(recipes, ['created_date'])
+        cls.expected = list(Recipe.objects.order_by('-created_date', '-id').values_list('pk', flat=True))
+
+    def paginate(self, cursor=None):
+        request = RequestFactory().get('/', {'cursor': cursor} if cursor else {})
+        return KeysetPaginator.paginate(Recipe.objects.all(), request, per_page=2)
+
+    def test_cursors_round_trip_over_duplicate_sort_keys(self):
+        pages = [self.paginate()]
+        while pages[-1].has_next:
+            pages.append(self.paginate(pages[-1].next_cursor))
+        self.assertEqual([recipe.pk for page in pages for recipe in page], self.expected)
+        self.assertFalse(pages[0].has_previous)
+
+        # And back again through the previous cursors
+        page, seen = pages[-1], []
+        while page.has_previous:
+            page = self.paginate(page.previous_cursor)
+            seen.insert(0, [recipe.pk for recipe in page])
+        self.assertEqual(seen, [[recipe.pk for recipe in page] for page in pages[:-1]])
+
+    def test_tampered_cursors_fall_back_to_the_first_page(self):
+        def encode(raw):
+            return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+        stamp = timezone.now().isoformat()
+        first_page = [recipe.pk for recipe in self.paginate()]
+        for cursor in [
+            'garbage', '!!!!', 'a', 'été', encode('x|' + stamp + '|5'), encode('n|yesterday|5'),
+            encode('n|' + stamp + '|five'), encode('n|' + stamp), encode('n|' + stamp + '|' + '9' * 30),
+            encode('n|2026-01-01T00:00:00|5'),
+        ]:
+            with self.subTest(cursor=cursor):
+                self.assertEqual(KeysetPaginator.decode_cursor(cursor), ('n', None))
+                self.assertEqual([recipe.pk for recipe in self.paginate(cursor)], first_page)
+                self.assertEqual(self.client.get(reverse('recipe_list'), {'cursor': cursor}).status_code, 200)
+
+
+def jpeg_bytes(size=(800, 400)):
+    """A small JPEG carrying camera and GPS EXIF tags"""
+    exif = Image.Exif()
+    exif[0x010F] = 'Test Camera'
+    exif[0x8825] = {1: 'N', 2: (51.0, 30.0, 0.0)}
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'orange').save(buffer, 'JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+@override_settings(
+    CACHES=ISOLATED_CACHES,
+    IMAGE_DERIVATIVE_WIDTHS={'recipe': (200, 400, 1600), 'avatar': (32,)},
+    IMAGE_DERIVATIVES_ASYNC=False,
+)
+class ImageDerivativeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('photographer')
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+
+    def make_recipe(self, data):
+        return Recipe.objects.create(
+            title='Orange', description='', ingredients='orange', instructions='Peel',
+            preparation_time=1, cooking_time=0, created_by=self.user,
+            image=SimpleUploadedFile('orange.jpg', data, content_type='image/jpeg'),
+        )
+
+    def test_derivatives_are_resized_reencoded_and_stripped(self):
+        data = jpeg_bytes()
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = self.make_recipe(data)
+        recipe.refresh_from_db()
+        manifest = recipe.image_derivatives
+        self.assertEqual(manifest['source'], recipe.image.name)
+        self.assertEqual((manifest['width'], manifest['height']), (800, 400))
+
+        digest = hashlib.sha256(data).hexdigest()[:20]
+        extensions = {'image/avif': 'avif', 'image/webp': 'webp', 'image/jpeg': 'jpg'}
+        self.assertEqual(
+            set(manifest['formats']), {mime for mime, *_ in ImageDerivatives.formats()},
+        )
+        for mime, variants in manifest['formats'].items():
+            # Never upscaled past the 800px original
+            self.assertEqual([width for width, name in variants], [200, 400, 800])
+            for width, name in variants:
+                with self.subTest(mime=mime, width=width):
+                    self.assertEqual(name, f'derivatives/{digest[:2]}/{digest}-{width}w.{extensions[mime]}')
+                    with default_storage.open(name) as handle, Image.open(handle) as image:
+                        self.assertEqual(image.get_format_mimetype(), mime)
+                        self.assertEqual(image.size, (width, width // 2))
+                        self.assertEqual(dict(image.getexif()), {})
+
+    def test_responsive_image_markup(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = self.make_recipe(jpeg_bytes())
+        recipe.refresh_from_db()
+        template = Template('{% load recipe_images %}{% responsive_image recipe.image sizes="50vw" alt=recipe.title %}')
+        soup = BeautifulSoup(template.render(Context({'recipe': recipe})), 'html.parser')
+
+        sources = {source['type']: source for source in soup.picture.find_all('source')}
+        self.assertEqual(set(sources), set(recipe.image_derivatives['formats']) - {'image/jpeg'})
+        for source in sources.values():
+            self.assertEqual(source['sizes'], '50vw')
+            self.assertEqual([entry.split()[1] for entry in source['srcset'].split(', ')], ['200w', '400w', '800w'])
+        img = soup.picture.img
+        self.assertTrue(img['src'].endswith('-800w.jpg'))
+        self.assertIn('-200w.jpg 200w', img['srcset'])
+        self.assertEqual((img['alt'], img['loading'], img['sizes']), ('Orange', 'lazy', '50vw'))
+
+        # Until the derivatives exist the original is served as a plain <img>
+        recipe.image_derivatives = {}
+        soup = BeautifulSoup(template.render(Context({'recipe': recipe})), 'html.parser')
+        self.assertIsNone(soup.picture)
+        self.assertEqual(soup.img['src'], recipe.image.url)
+
+    def test_backfill_rebuilds_stale_derivatives(self):
+        # on_commit never fires here, so nothing is built on save
+        recipe = self.make_recipe(jpeg_bytes())
+        Recipe.objects.filter(pk=recipe.pk).update(image_derivatives={'source': 'recipe_pics/old.jpg', 'formats': {}})
+        out = io.StringIO()
+        call_command('backfill_image_derivatives', stdout=out)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_derivatives['source'], recipe.image.name)
+        self.assertEqual(len(recipe.image_derivatives['formats']['image/jpeg']), 3)
+        self.assertIn('Built derivatives for 1 image(s)', out.getvalue())
+
+    def test_default_avatar_is_left_alone(self):
+        with mock.patch.object(ImageDerivatives, 'schedule') as schedule:
+            profile = Profile.objects.create(user=self.user)
+            profile.bio = 'Takes pictures'
+            profile.save()
+        self.assertEqual(profile.profile_pic.name, 'default.jpg')
+        schedule.assert_not_called()
+        with mock.patch('builtins.print') as printed:
+            self.assertIsNone(ImageDerivatives.process(Profile, profile.pk, force=True))
+        printed.assert_not_called()
+
+
+@override_settings(SCRAPER_POOL_MAXSIZE=4)
+class SessionPoolTests(SimpleTestCase):
+
+    def setUp(self):
+        # Start from an empty pool and leave the process-wide one untouched
+        sessions = mock.patch.dict(http._sessions, clear=True)
+        sessions.start()
+        self.addCleanup(sessions.stop)
+
+    def test_one_host_reuses_one_session_and_adapter(self):
+        response = requests.Response()
+        response.status_code = 200
+        with mock.patch.object(HTTPAdapter, 'send', autospec=True, return_value=response) as send, \
+                mock.patch.object(http.SessionPool, 'build_session', wraps=http.SessionPool.build_session) as build:
+            http.SessionPool.get('https://a.test/recipes/one')
+            http.SessionPool.get('https://A.test/recipes/two?page=2')
+            http.SessionPool.get('https://b.test/recipes/one')
+        self.assertEqual(build.call_count, 2)
+        first, second, other = [call.args[0] for call in send.call_args_list]
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(first._pool_maxsize, 4)
+        self.assertIs(http.SessionPool.session_for('https://a.test/'), http._sessions['a.test'])
+
+
+@override_settings(SCRAPER_SEARCH_CACHE_TTL=600, SCRAPER_SEARCH_NEGATIVE_TTL=30)
+class SearchCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        # 'scraper' is in-process local memory, so clearing it touches nothing on disk
+        SearchCache.get_cache().clear()
+
+    def test_query_normalization(self):
+        for variant in ['Chicken Curry', '  chicken   curry ', 'CURRY chicken', 'curry, chicken curry']:
+            with self.subTest(variant=variant):
+                self.assertEqual(SearchCache.normalize_query(variant), 'chicken curry')
+                self.assertEqual(SearchCache.make_key(variant), SearchCache.make_key('chicken curry'))
+        self.assertNotEqual(SearchCache.make_key('chicken curry'), SearchCache.make_key('chicken'))
+
+    def test_empty_and_partial_results_get_the_negative_ttl(self):
+        cache = SearchCache.get_cache()
+        cases = [
+            ([{'title': 'Pie'}], False, 600),
+            ([], False, 30),
+            ([{'title': 'Pie'}], True, 30),
+        ]
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            for results, partial, timeout in cases:
+                with self.subTest(results=results, partial=partial):
+                    SearchCache.set('pie', results, partial=partial)
+                    self.assertEqual(cache_set.call_args.args[2], timeout)
+        self.assertEqual(SearchCache.get('pie'), [{'title': 'Pie'}])
+
+    def test_hit_and_miss_counters(self):
+        search = mock.Mock(return_value=([{'title': 'Pie'}], True))
+        SearchCache.get_or_search('apple pie', search)
+        SearchCache.get_or_search('Pie  Apple', search)
+        SearchCache.get_or_search('APPLE PIE', search)
+        search.assert_called_once_with('apple pie')
+        self.assertEqual(SearchCache.stats(), {'hits': 2, 'misses': 1, 'hit_ratio': 2 / 3})
+
+        out = io.StringIO()
+        call_command('search_cache_stats', '--reset', stdout=out)
+        self.assertIn('hits=2 misses=1 hit_ratio=66.7%', out.getvalue())
+        self.assertEqual(SearchCache.stats(), {'hits': 0, 'misses': 0, 'hit_ratio': 0.0})
+
+
+class SearchAllSourcesTests(SimpleTestCase):
+
+    def setUp(self):
+        cache_set = mock.patch.object(SearchCache, 'set', wraps=SearchCache.set)
+        self.cache_set = cache_set.start()
+        self.addCleanup(cache_set.stop)
+
+    def stub(self, name, recipes):
+        return name, lambda query: recipes if recipes is None else [dict(recipe, source=name) for recipe in recipes]
+
+    def test_failed_source_is_cached_as_partial(self):
+        sources = [self.stub('a', [{'title': 'Pie'}]), self.stub('b', None)]
+        with mock.patch.object(RecipeScraper, 'get_sources', return_value=sources):
+            results = RecipeScraper.search_recipes('partial pie')
+        self.assertEqual([recipe['title'] for recipe in results], ['Pie'])
+        self.cache_set.assert_called_once_with('partial pie', results, partial=True)
+
+    def test_complete_search_is_cached_for_the_full_ttl(self):
+        sources = [self.stub('a', [{'title': 'Pie'}]), self.stub('b', [])]
+        with mock.patch.object(RecipeScraper, 'get_sources', return_value=sources):
+            RecipeScraper.search_recipes('complete pie')
+        self.cache_set.assert_called_once_with('complete pie', mock.ANY, partial=False)
+
+    def test_slow_source_is_dropped_at_the_deadline(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def slow(query):
+            release.wait(5)
+            return [{'title': 'Late', 'source': 'slow'}]
+
+        sources = [self.stub('a', [{'title': 'First'}]), ('slow', slow), self.stub('c', [{'title': 'Third'}])]
+        executor = ThreadPoolExecutor(max_workers=3)
+        self.addCleanup(executor.shutdown, wait=False)
+        with mock.patch.object(RecipeScraper, 'get_sources', return_value=sources), \
+                mock.patch.object(RecipeScraper, 'get_executor', return_value=executor):
+            started = time.monotonic()
+            results, complete = RecipeScraper.search_all_sources('deadline pie', deadline=0.3)
+            elapsed = time.monotonic() - started
+        self.assertLess(elapsed, 2)
+        self.assertFalse(complete)
+        # The fast sources keep their priority order around the gap
+        self.assertEqual([(recipe['source'], recipe['title']) for recipe in results], [('a', 'First'), ('c', 'Third')])
+
+    def test_async_search_reports_failed_sources(self):
+        async def scrape_source(name, query):
+            return None if name == 'Tasty' else [{'title': f'{query} from {name}'}]
+
+        with mock.patch.object(AsyncRecipeScraper, 'scrape_source', scrape_source):
+            results = async_to_sync(AsyncRecipeScraper.search_recipes)('async pie')
+        self.assertEqual(len(results), len(RecipeScraper.SEARCH_URLS) - 1)
+        self.cache_set.assert_called_once_with('async pie', results, partial=True)
+
+
+@mock.patch.object(SearchJobs, 'start', return_value=('job', None))
+@mock.patch.object(AsyncRecipeScraper, 'search_recipes', new_callable=mock.AsyncMock, return_value=[])
+class AsyncSearchViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        make_recipes(User.objects.create_user('asyncer'), Category.objects.create(name='Soups'), 2)
+
+    def search(self, **params):
+        request = RequestFactory().get(reverse('search'), {'q': 'recipe', **params})
+        request.user = AnonymousUser()
+        return async_to_sync(async_views.search_recipes)(request)
+
+    def test_web_search_runs_as_a_background_job(self, web_search, start):
+        response = self.search()
+        self.assertContains(response, reverse('search_job_status', args=['job']))
+        start.assert_called_once_with('recipe', mock.ANY)
+        self.assertCountEqual(start.call_args.args[1], ['Recipe 0', 'Recipe 1'])
+        web_search.assert_not_awaited()
+
+    def test_wait_searches_inline(self, web_search, start):
+        self.assertEqual(self.search(wait='1').status_code, 200)
+        web_search.assert_awaited_once_with('recipe')
+        start.assert_not_called()
+
+
+class ResultMergerTests(TestCase):
+
+    WEB = [
+        {'title': 'Easy Chicken Tikka Masala', 'source': 'Allrecipes',
+         'url': 'https://www.allrecipes.com//recipe/1/chicken-tikka/?utm_source=feed'},
+        {'title': 'Beef Stew', 'source': 'Tasty', 'url': 'https://tasty.co/recipe/beef-stew'},
+        {'title': 'Chicken Tikka Masala Recipe', 'source': 'Food Network',
+         'url': 'https://www.foodnetwork.com/recipes/chicken-tikka-masala'},
+        {'title': 'Chicken Tikka Masala', 'source': 'Allrecipes',
+         'url': 'http://allrecipes.com/recipe/1/chicken-tikka'},
+        {'title': 'Chicken Curry', 'source': 'BBC Good Food', 'url': 'https://www.bbcgoodfood.com/recipes/curry'},
+    ]
+
+    def test_urls_of_the_same_page_share_a_key(self):
+        self.assertEqual(
+            url_key('https://www.allrecipes.com//recipe/1/?utm_source=x#top'),
+            url_key('http://allrecipes.com/recipe/1'),
+        )
+        self.assertNotEqual(url_key('https://a.com/recipe/1'), url_key('https://a.com/recipe/2'))
+
+    def test_web_duplicates_collapse_and_rank_by_relevance(self):
+        results = ResultMerger.merge('chicken tikka masala', web=self.WEB)
+        titles = [result['recipe']['title'] for result in results]
+        self.assertEqual(titles, ['Easy Chicken Tikka Masala', 'Chicken Curry', 'Beef Stew'])
+        self.assertEqual(results[0]['also_on'], ['Food Network'])
+
+    def test_local_recipe_absorbs_web_copies_but_never_another_local_one(self):
+        user = User.objects.create_user('merger')
+        category = Category.objects.create(name='Dinner')
+        local = make_recipes(user, category, 2)
+        Recipe.objects.filter(pk__in=[r.pk for r in local]).update(title='Chicken Tikka Masala')
+        local = list(Recipe.objects.select_related('category').order_by('pk'))
+
+        results = ResultMerger.merge('tikka masala', local, self.WEB, web_limit=1)
+        self.assertEqual([result['kind'] for result in results], ['local', 'local', 'web'])
+        self.assertEqual(results[0]['also_on'], ['Allrecipes', 'Food Network'])
+        self.assertEqual(results[1]['also_on'], [])
+
+
+class DetailRevalidationTests(SimpleTestCase):
+
+    def test_not_modified_response_replaces_the_validators(self):
+        url = 'https://www.example.com/recipes/soup/'
+        canonical = DetailCache.canonical_url(url)
+        recipe = {'title': 'Soup', 'ingredients': ['water'], 'instructions': ['Boil']}
+        DetailCache.set(canonical, recipe, '"v1"', 'Mon, 01 Jan 2024 00:00:00 GMT')
+        not_modified = mock.Mock(status_code=304, headers={'ETag': '"v2"'})
+
+        with override_settings(SCRAPER_DETAIL_FRESH_FOR=0), \
+                mock.patch('recipes.utils.scraper.SessionPool.get', return_value=not_modified):
+            self.assertEqual(RecipeScraper.get_recipe_details(url), recipe)
+
+        entry = DetailCache.get(canonical)
+        self.assertEqual(entry['etag'], '"v2"')
+        self.assertEqual(entry['last_modified'], 'Mon, 01 Jan 2024 00:00:00 GMT')
+
+    def test_failed_refresh_serves_the_stale_recipe_and_backs_off(self):
+        recipe = {'title': 'Stew', 'ingredients': ['beef'], 'instructions': ['Simmer']}
+        empty_page = mock.Mock(status_code=200, headers={}, iter_content=lambda size: iter([b'<html></html>']))
+        for name, response in (('error', mock.Mock(status_code=503, headers={})), ('unparsable', empty_page)):
+            url = f'https://www.example.com/recipes/stew-{name}/'
+            canonical = DetailCache.canonical_url(url)
+            DetailCache.set(canonical, recipe, '"v1"')
+            with self.subTest(response=name), override_settings(SCRAPER_DETAIL_FRESH_FOR=0), \
+                    mock.patch('recipes.utils.scraper.SessionPool.get', return_value=response) as get:
+                self.assertEqual(RecipeScraper.get_recipe_details(url), recipe)
+                self.assertEqual(RecipeScraper.get_recipe_details(url), recipe)
+                self.assertEqual(get.call_count, 1)
+                self.assertIsNone(DetailCache.get_fallback(canonical))
+
+
+@override_settings(SCRAPER_BREAKER_FAILURES=3, SCRAPER_BREAKER_COOLDOWN=60, CACHES=ISOLATED_CACHES)
+class SourceHealthTests(SimpleTestCase):
+    source = 'Food Network'
+
+    def setUp(self):
+        SourceHealth.reset([self.source])
+
+    def state(self):
+        return SourceHealth.state(SourceHealth.load(self.source))
+
+    def cool_down(self):
+        health = SourceHealth.load(self.source)
+        health['opened_at'] -= 60
+        SourceHealth.save(self.source, health)
+
+    def test_header_retries_count_as_one_failure(self):
+        blocked = mock.Mock(status_code=403)
+        with mock.patch('recipes.utils.scraper.SessionPool.get', return_value=blocked) as get:
+            self.assertIsNone(RecipeScraper.fetch_search_page(self.source, 'pie'))
+        self.assertEqual(get.call_count, len(RecipeScraper.FOODNETWORK_HEADERS))
+        self.assertEqual(SourceHealth.load(self.source)['failures'], 1)
+        self.assertEqual(self.state(), CLOSED)
+        # Every worker process reads the same breaker
+        self.assertEqual(caches['shared'].get(SourceHealth.key(self.source))['failures'], 1)
+
+    def test_async_header_retries_count_as_one_failure(self):
+        blocked = mock.AsyncMock(return_value=(mock.Mock(status_code=403), b'', None))
+        with mock.patch.object(AsyncRecipeScraper, 'fetch', blocked):
+            self.assertIsNone(asyncio.run(AsyncRecipeScraper.fetch_search_page(self.source, 'pie')))
+        self.assertEqual(blocked.await_count, len(RecipeScraper.FOODNETWORK_HEADERS))
+        self.assertEqual(SourceHealth.load(self.source)['failures'], 1)
+
+    def test_breaker_opens_probes_and_closes(self):
+        for _ in range(2):
+            SourceHealth.record(self.source, False, 0.1)
+        self.assertEqual(self.state(), CLOSED)
+        SourceHealth.record(self.source, False, 0.1)
+        self.assertEqual(self.state(), OPEN)
+        self.assertFalse(SourceHealth.allow(self.source))
+
+        # After the cooldown exactly one caller gets to probe
+        self.cool_down()
+        self.assertEqual(self.state(), HALF_OPEN)
+        self.assertTrue(SourceHealth.allow(self.source))
+        self.assertFalse(SourceHealth.allow(self.source))
+        SourceHealth.record(self.source, True, 0.1)
+        self.assertEqual(self.state(), CLOSED)
+        self.assertTrue(SourceHealth.allow(self.source))
+
+    def test_failed_probe_reopens_the_breaker(self):
+        for _ in range(3):
+            SourceHealth.record(self.source, False, 0.1)
+        self.cool_down()
+        self.assertTrue(SourceHealth.allow(self.source))
+        SourceHealth.record(self.source, False, 0.1)
+        self.assertEqual(self.state(), OPEN)
+        self.assertFalse(SourceHealth.allow(self.source))
+        # The next cooldown gets a fresh probe
+        self.cool_down()
+        self.assertTrue(SourceHealth.allow(self.source))
+
+
+class FullTextSyncTests(TestCase):
+    """The FTS index follows recipes_recipe on the fully migrated schema"""
+
+    def setUp(self):
+        if not RecipeSearch.is_available():
+            self.skipTest('FTS5 index is SQLite only')
+
+    def test_index_follows_create_update_and_delete(self):
+        user = User.objects.create_user('indexer')
+        recipe = Recipe.objects.create(
+            title='Saffron risotto', description='Creamy', ingredients='rice, saffron',
+            instructions='Stir', preparation_time=5, cooking_time=25, created_by=user,
+        )
+        self.assertEqual(RecipeSearch.ranked_ids('saffron'), [recipe.pk])
+
+        recipe.title, recipe.ingredients = 'Mushroom risotto', 'rice, mushrooms'
+        recipe.save()
+        self.assertEqual(RecipeSearch.ranked_ids('saffron'), [])
+        self.assertEqual(RecipeSearch.ranked_ids('mushroom'), [recipe.pk])
+
+        recipe.delete()
+        self.assertEqual(RecipeSearch.ranked_ids('mushroom'), [])
+
+
+class MigrationFullTextTests(TransactionTestCase):
+    """Every migration that rebuilds recipes_recipe leaves the FTS index in sync"""
+
+    def setUp(self):
+        if not RecipeSearch.is_available():
+            self.skipTest('FTS5 index is SQLite only')
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate([('recipes', '0002_recipe_fts')])
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def assertNewRecipeIsSearchable(self, migration, title):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('recipes', migration)])
+        apps = executor.loader.project_state(('recipes', migration)).apps
+        user = apps.get_model('auth', 'User').objects.create(username=f'user-{migration}')
+        recipe = apps.get_model('recipes', 'Recipe').objects.create(
+            title=title, description='', ingredients='', instructions='',
+            preparation_time=1, cooking_time=1, created_by_id=user.pk,
+        )
+        self.assertEqual(RecipeSearch.ranked_ids(title), [recipe.pk])
+
+    def test_index_is_kept_after_each_table_rebuild(self):
+        # setUp unapplied everything down to 0002, rebuilding the table each time
+        self.assertNewRecipeIsSearchable('0002_recipe_fts', 'Okra')
+        self.assertNewRecipeIsSearchable('0003_recipe_like_count', 'Pistachio')
+        self.assertNewRecipeIsSearchable('0005_image_derivatives', 'Quince')
+        self.assertNewRecipeIsSearchable('0006_recipe_content_hash', 'Rhubarb')
+
+
+class PantrySearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('pantry')
+        fields = dict(description='', instructions='Cook', preparation_time=5, cooking_time=5, created_by=user)
+        cls.plain = Recipe.objects.create(title='Salted water', ingredients='salt', **fields)
+        cls.fancy = Recipe.objects.create(
+            title='Stew', ingredients='salt, beef, carrot, onion, celery, thyme', **fields,
+        )
+
+    def test_fewest_missing_ingredients_win_before_the_limit(self):
+        response = self.client.get(reverse('pantry_search'), {'ingredients': 'salt', 'limit': 1})
+        results = response.json()['results']
+        self.assertEqual([row['id'] for row in results], [self.plain.pk])
+        self.assertEqual(results[0]['missing'], 0)
+
+    def test_ingredient_count_follows_the_index(self):
+        self.fancy.refresh_from_db()
+        self.assertEqual(self.fancy.ingredient_count, 6)
+        self.fancy.ingredients = 'salt, beef'
+        self.fancy.save()
+        self.fancy.refresh_from_db()
+        self.assertEqual(self.fancy.ingredient_count, 2)
+        fields = dict(description='', instructions='Cook', preparation_time=5, cooking_time=5,
+                      created_by=self.plain.created_by)
+        bulk = Recipe.objects.bulk_create([
+            Recipe(title='Toast', ingredients='bread, butter', **fields),
+            Recipe(title='Soup', ingredients='salt, leek, potato', **fields),
+        ])
+        IngredientIndex.update_many(bulk)
+        self.assertEqual(
+            dict(Recipe.objects.filter(pk__in=[r.pk for r in bulk]).values_list('title', 'ingredient_count')),
+            {'Toast': 2, 'Soup': 3},
+        )
+
+    def test_match_ranks_without_a_per_recipe_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            _, rows = IngredientIndex.match(['salt', 'beef'])
+        self.assertEqual(
+            [(row['recipe_id'], row['matched'], row['missing']) for row in rows],
+            [(self.fancy.pk, 2, 4), (self.plain.pk, 1, 0)],
+        )
+        self.assertEqual(queries[-1]['sql'].upper().count('SELECT'), 1)
+
+    def test_bad_limits_are_clamped(self):
+        for limit in ['-1', '0', 'abc', '1000']:
+            with self.subTest(limit=limit):
+                response = self.client.get(reverse('pantry_search'), {'ingredients': 'salt', 'limit': limit})
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.json()['results'])
+
+
+@override_settings(SCRAPER_SEARCH_DEADLINE=2, CACHES=ISOLATED_CACHES)
+class SearchJobTests(SimpleTestCase):
+
+    def run_jobs(self, sources, queries):
+        executor = ThreadPoolExecutor(max_workers=2)
+        with mock.patch.object(RecipeScraper, 'get_executor', return_value=executor), \
+                mock.patch.object(RecipeScraper, 'get_sources', return_value=sources), \
+                mock.patch.object(SearchCache, 'set', wraps=SearchCache.set) as cache_set:
+            job_ids = [SearchJobs.start(query)[0] for query in queries]
+            executor.shutdown(wait=True)
+        return job_ids, cache_set
+
+    def source(self, name):
+        return name, lambda query: [{'title': f'{query} {name}', 'url': f'https://{name}.test/{query}', 'source': name}]
+
+    def test_concurrent_jobs_do_not_starve_their_sources(self):
+        # More jobs than pool workers: a blocking finisher per job would
+        # hold every worker while the source tasks sat queued
+        queries = [f'stew {i}' for i in range(4)]
+        job_ids, cache_set = self.run_jobs([self.source('a'), self.source('b')], queries)
+        for job_id, query in zip(job_ids, queries):
+            # Kept where every worker process can poll it
+            self.assertIsNotNone(caches['shared'].get(SearchJobs.PREFIX + job_id))
+            self.assertEqual(SearchJobs.status(job_id)['status'], 'done')
+            self.assertEqual(len(SearchCache.get(query)), 2)
+        self.assertFalse(any(call.kwargs['partial'] for call in cache_set.call_args_list))
+
+    def test_web_copies_of_local_recipes_are_left_out(self):
+        def source(query):
+            return [
+                {'title': 'Easy Chicken Pot Pie', 'url': 'https://a.test/pie', 'source': 'a'},
+                {'title': 'Beef Stew', 'url': 'https://a.test/stew', 'source': 'a'},
+            ]
+        executor = ThreadPoolExecutor(max_workers=1)
+        with mock.patch.object(RecipeScraper, 'get_executor', return_value=executor), \
+                mock.patch.object(RecipeScraper, 'get_sources', return_value=[('a', source)]):
+            job_id, _ = SearchJobs.start('pot pie', ['Chicken Pot Pie'])
+            executor.shutdown(wait=True)
+        status = SearchJobs.status(job_id)
+        self.assertEqual([recipe['title'] for recipe in status['sources']['a']], ['Beef Stew'])
+        self.assertEqual([recipe['title'] for recipe in status['results']], ['Beef Stew'])
+        # The cached answer keeps everything; the search view merges it with the local hits
+        self.assertEqual(len(SearchCache.get('pot pie')), 2)
+
+    def test_failed_source_is_cached_as_partial(self):
+        # A real scraper whose fetch fails reports the failure, not an empty page
+        self.addCleanup(SourceHealth.reset, ['Tasty'])
+        with mock.patch('recipes.utils.scraper.SessionPool.get', side_effect=ConnectionError('down')):
+            (job_id,), cache_set = self.run_jobs([self.source('a'), ('Tasty', RecipeScraper.scrape_tasty)], ['pie'])
+        cache_set.assert_called_once_with('pie', mock.ANY, partial=True)
+        self.assertEqual(len(cache_set.call_args.args[1]), 1)
+        finished = SearchJobs.get_cache().get(SearchJobs.source_key(job_id, 1))
+        self.assertEqual(finished['status'], 'error')
@@ -1,6 +1,13 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Scrape-bound views: async under ASGI, blocking under WSGI
+if getattr(settings, 'RECIPES_ASYNC_VIEWS', False):
+    from . import async_views as scrape_views
+else:
+    scrape_views = views
+
 urlpatterns = [
     path('', views.home, name='home'),
     path('recipes/', views.recipe_list, name='recipe_list'),
@@ -9,12 +16,18 @@ urlpatterns = [
     path('recipe/<int:pk>/edit/', views.recipe_update, name='recipe_update'),
     path('recipe/<int:pk>/delete/', views.recipe_delete, name='recipe_delete'),
     path('recipe/<int:pk>/like/', views.like_recipe, name='like_recipe'),
+    path('recipe/<int:pk>/like/toggle/', views.like_recipe_toggle, name='like_recipe_toggle'),
     path('profile/', views.profile, name='profile'),
     path('profile/update/', views.profile_update, name='profile_update'),
     path('signup/', views.signup, name='signup'),
-    path('search/', views.search_recipes, name='search'),
-    path('category/<int:category_id>/', views.category_recipes, name='category_recipes'),
-    path('recipe/external/', views.recipe_detail_external, name='recipe_external'),
+    path('search/', scrape_views.search_recipes, name='search'),
+    path('search/jobs/<str:job_id>/', views.search_job_status, name='search_job_status'),
+    path('search/sources/', views.source_health, name='source_health'),
+    path('category/<int:category_id>/', scrape_views.category_recipes, name='category_recipes'),
+    path('recipe/external/', scrape_views.recipe_detail_external, name='recipe_external'),
+    path('recipes/export/', views.export_recipes, name='export_recipes'),
+    path('pantry/', views.pantry_search, name='pantry_search'),
+    path('ingredients/suggest/', views.ingredient_suggest, name='ingredient_suggest'),
     # ===== NEW URL =====
     path('saved-recipes/', views.saved_recipes, name='saved_recipes'),  # 👈 Add this line
     path('about/', views.about, name='about'),
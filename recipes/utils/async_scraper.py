@@ -0,0 +1,233 @@
+import asyncio
+import time
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .cache import DetailCache, SearchCache
+from .health import SourceHealth
+from .parsing import HtmlParser, JsonLdScanner
+from .scraper import RecipeScraper
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# One keep-alive client per event loop (clients can't be shared across loops)
+_clients = weakref.WeakKeyDictionary()
+
+
+class AsyncRecipeScraper:
+    """asyncio counterpart of RecipeScraper for ASGI deployments.
+
+    Network I/O runs on the event loop through a pooled ``httpx.AsyncClient``;
+    HTML parsing reuses RecipeScraper's parsers in a worker thread so it
+    never blocks the loop. Requires ``httpx``.
+    """
+
+    @staticmethod
+    def get_client():
+        if httpx is None:
+            raise ImproperlyConfigured('The async scraper requires httpx (pip install httpx)')
+        loop = asyncio.get_running_loop()
+        client = _clients.get(loop)
+        if client is None:
+            pool_size = getattr(settings, 'SCRAPER_POOL_MAXSIZE', 10)
+            transport = httpx.AsyncHTTPTransport(
+                retries=getattr(settings, 'SCRAPER_HTTP_RETRIES', 1),
+                limits=httpx.Limits(
+                    max_connections=pool_size * len(RecipeScraper.SEARCH_URLS),
+                    max_keepalive_connections=pool_size * len(RecipeScraper.SEARCH_URLS),
+                ),
+            )
+            client = httpx.AsyncClient(transport=transport, follow_redirects=True)
+            _clients[loop] = client
+        return client
+
+    @staticmethod
+    async def fetch(url, headers=None, timeout=10):
+        """Stream url, returning (response, body, encoding).
+
+        The body is only read for 200 responses, and at most
+        ``SCRAPER_MAX_PAGE_BYTES`` of it.
+        """
+        client = AsyncRecipeScraper.get_client()
+        async with client.stream('GET', url, headers=headers, timeout=timeout) as response:
+            if response.status_code != 200:
+                return response, None, None
+            limit = HtmlParser.max_bytes()
+            body = bytearray()
+            async for chunk in response.aiter_bytes(64 * 1024):
+                body += chunk
+                if len(body) >= limit:
+                    print(f"✂️ Page truncated at {limit} bytes")
+                    del body[limit:]
+                    break
+        return response, bytes(body), HtmlParser.declared_encoding(response.headers.get('Content-Type'))
+
+    @staticmethod
+    async def fetch_recipe_page(url, headers=None, timeout=10):
+        """Stream a recipe page, returning (response, recipe).
+
+        Reading stops at the first schema.org Recipe in the JSON-LD; pages
+        without one are DOM-parsed in a worker thread. recipe is None for
+        non-200 responses.
+        """
+        client = AsyncRecipeScraper.get_client()
+        scanner = JsonLdScanner()
+        async with client.stream('GET', url, headers=headers, timeout=timeout) as response:
+            if response.status_code != 200:
+                return response, None
+            encoding = HtmlParser.declared_encoding(response.headers.get('Content-Type'))
+            async for chunk in response.aiter_bytes(64 * 1024):
+                for block in scanner.feed(chunk):
+                    recipe = RecipeScraper.schema_recipe_from_json(block, encoding)
+                    if recipe:
+                        return response, recipe
+                if scanner.full:
+                    break
+        recipe = await asyncio.to_thread(RecipeScraper.parse_recipe_page, bytes(scanner.body), encoding)
+        return response, recipe
+
+    @staticmethod
+    async def search_recipes(query, deadline=None, use_cache=True):
+        """Search recipes from multiple sources, served from SearchCache when possible"""
+        if use_cache:
+            cached = await sync_to_async(SearchCache.get)(query)
+            if cached is not None:
+                return cached
+        results, complete = await AsyncRecipeScraper.search_all_sources(query, deadline)
+        if use_cache:
+            await sync_to_async(SearchCache.set)(query, results, partial=not complete)
+        return results
+
+    @staticmethod
+    async def search_all_sources(query, deadline=None):
+        """Query every source concurrently; sources past the deadline are cancelled.
+
+        Returns (results, complete); complete is False when a source missed
+        the deadline or could not be searched.
+        """
+        if deadline is None:
+            deadline = getattr(settings, 'SCRAPER_SEARCH_DEADLINE', 12)
+
+        names = list(RecipeScraper.SEARCH_URLS)
+        tasks = [
+            asyncio.create_task(AsyncRecipeScraper.scrape_source(name, query))
+            for name in names
+        ]
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+            print(f"⏱️ {names[tasks.index(task)]} missed the {deadline}s deadline")
+
+        results = []
+        complete = not pending
+        for task in tasks:
+            if task not in done:
+                continue
+            recipes = None if task.exception() else task.result()
+            if recipes is None:
+                complete = False
+            else:
+                results.extend(recipes)
+        print(f"📊 Total recipes found: {len(results)}")
+        return results, complete
+
+    @staticmethod
+    async def fetch_search_page(source_name, query):
+        """Return the search page as (bytes, encoding), or None if every attempt failed.
+
+        Like RecipeScraper.fetch_search_page, the fetch is recorded once in
+        SourceHealth however many header sets it tried.
+        """
+        url = RecipeScraper.search_url(source_name, query)
+        header_sets = RecipeScraper.search_headers(source_name)
+        timeout = await sync_to_async(SourceHealth.timeout)(source_name)
+        started = time.monotonic()
+        page = error = None
+        for attempt, headers in enumerate(header_sets, 1):
+            remaining = timeout - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            try:
+                response, body, encoding = await AsyncRecipeScraper.fetch(url, headers=headers, timeout=remaining)
+            except Exception as e:
+                if attempt == len(header_sets):
+                    error = e
+                continue
+            if response.status_code == 200:
+                page = body, encoding
+                break
+        await sync_to_async(SourceHealth.record)(source_name, page is not None, time.monotonic() - started)
+        if error is not None:
+            raise error
+        return page
+
+    @staticmethod
+    async def scrape_source(source_name, query):
+        """Fetch one source's search page and parse it off the event loop.
+
+        Like RecipeScraper.scrape_source, returns None when the source
+        could not be searched.
+        """
+        if not await sync_to_async(SourceHealth.allow)(source_name):
+            print(f"🔌 Skipping {source_name}: circuit open")
+            return None
+        try:
+            page = await AsyncRecipeScraper.fetch_search_page(source_name, query)
+            if page is None:
+                return None
+            return await asyncio.to_thread(RecipeScraper.parse_search_page, source_name, *page)
+        except Exception as e:
+            print(f"{source_name} error: {e}")
+            return None
+
+    @staticmethod
+    async def get_recipe_details(url):
+        """Async get_recipe_details, sharing DetailCache with the sync scraper"""
+        if not url:
+            return None
+
+        canonical = DetailCache.canonical_url(url)
+        entry = await sync_to_async(DetailCache.get)(canonical)
+        if entry and DetailCache.is_fresh(entry):
+            return entry['recipe']
+        if not entry:
+            fallback = await sync_to_async(DetailCache.get_fallback)(canonical)
+            if fallback:
+                return fallback
+
+        try:
+            headers = RecipeScraper.HEADERS.copy()
+            if entry:
+                headers.update(DetailCache.conditional_headers(entry))
+            response, recipe = await AsyncRecipeScraper.fetch_recipe_page(url, headers=headers)
+
+            if response.status_code == 304 and entry:
+                await sync_to_async(DetailCache.revalidated)(canonical, entry, response.headers)
+                return entry['recipe']
+
+            if response.status_code != 200:
+                return await sync_to_async(RecipeScraper.stale_or_fallback)(canonical, url, entry)
+
+            if entry and recipe and not (recipe.get('ingredients') or recipe.get('instructions')):
+                # The page stopped parsing; keep the recipe we already have
+                recipe = None
+
+            if recipe:
+                recipe['source_url'] = url
+                await sync_to_async(DetailCache.set)(
+                    canonical, recipe,
+                    response.headers.get('ETag'), response.headers.get('Last-Modified')
+                )
+                return recipe
+
+            return await sync_to_async(RecipeScraper.stale_or_fallback)(canonical, url, entry)
+
+        except Exception as e:
+            print(f"Error fetching recipe details: {e}")
+            return await sync_to_async(RecipeScraper.stale_or_fallback)(canonical, url, entry)
@@ -0,0 +1,198 @@
+import hashlib
+import re
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class SearchCache:
+    """Cache of web search results keyed by normalized query.
+
+    Backed by Django's cache framework (alias ``SCRAPER_CACHE_ALIAS``), so
+    any configured backend works. Size and eviction come from the backend's
+    ``MAX_ENTRIES``; the local-memory backend evicts least recently used.
+    """
+
+    KEY_PREFIX = 'search:v1:'
+    HITS_KEY = 'search:stats:hits'
+    MISSES_KEY = 'search:stats:misses'
+
+    @staticmethod
+    def get_cache():
+        return caches[getattr(settings, 'SCRAPER_CACHE_ALIAS', 'default')]
+
+    @staticmethod
+    def normalize_query(query):
+        """Lowercase, collapse whitespace and ignore word order"""
+        words = re.findall(r'\w+', (query or '').casefold())
+        return ' '.join(sorted(set(words)))
+
+    @staticmethod
+    def make_key(query):
+        normalized = SearchCache.normalize_query(query)
+        digest = hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+        return SearchCache.KEY_PREFIX + digest
+
+    @staticmethod
+    def get(query):
+        """Return cached results for query, or None on a miss"""
+        cache = SearchCache.get_cache()
+        results = cache.get(SearchCache.make_key(query))
+        SearchCache.incr(SearchCache.HITS_KEY if results is not None else SearchCache.MISSES_KEY)
+        return results
+
+    @staticmethod
+    def set(query, results, partial=False):
+        """Store results; empty or partial result lists are kept for a shorter time"""
+        if results and not partial:
+            timeout = getattr(settings, 'SCRAPER_SEARCH_CACHE_TTL', 60 * 60)
+        else:
+            timeout = getattr(settings, 'SCRAPER_SEARCH_NEGATIVE_TTL', 5 * 60)
+        SearchCache.get_cache().set(SearchCache.make_key(query), list(results), timeout)
+
+    @staticmethod
+    def get_or_search(query, search_func):
+        """Return cached results, calling search_func(query) on a miss.
+
+        search_func returns (results, complete); results missing a source
+        are cached as partial.
+        """
+        results = SearchCache.get(query)
+        if results is None:
+            results, complete = search_func(query)
+            SearchCache.set(query, results, partial=not complete)
+        return results
+
+    @staticmethod
+    def incr(key):
+        cache = SearchCache.get_cache()
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(key, 1, None)
+
+    @staticmethod
+    def stats():
+        """Return hit/miss counters and the hit ratio"""
+        cache = SearchCache.get_cache()
+        hits = cache.get(SearchCache.HITS_KEY, 0)
+        misses = cache.get(SearchCache.MISSES_KEY, 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / total if total else 0.0,
+        }
+
+    @staticmethod
+    def reset_stats():
+        SearchCache.get_cache().delete_many([SearchCache.HITS_KEY, SearchCache.MISSES_KEY])
+
+
+class DetailCache:
+    """Cache of parsed external recipes keyed by canonical URL.
+
+    Each entry keeps the origin's ``ETag`` and ``Last-Modified`` so that,
+    once older than ``SCRAPER_DETAIL_FRESH_FOR``, it can be revalidated
+    with a conditional request. Fallback recipes live under their own keys
+    with a short TTL so a flaky origin is retried soon.
+    """
+
+    KEY_PREFIX = 'detail:v1:'
+    FALLBACK_PREFIX = 'detail:fallback:v1:'
+    TRACKING_PARAMS = ('utm_', 'fbclid', 'gclid', 'mc_')
+
+    @staticmethod
+    def canonical_url(url):
+        """Normalize scheme/host case, duplicate slashes, fragments and tracking params"""
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower() or 'https'
+        netloc = parts.netloc.lower()
+        if netloc.endswith(':80') and scheme == 'http':
+            netloc = netloc[:-3]
+        elif netloc.endswith(':443') and scheme == 'https':
+            netloc = netloc[:-4]
+        path = re.sub(r'/{2,}', '/', parts.path) or '/'
+        query = urlencode(sorted(
+            (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not key.lower().startswith(DetailCache.TRACKING_PARAMS)
+        ))
+        return urlunsplit((scheme, netloc, path, query, ''))
+
+    @staticmethod
+    def make_key(prefix, canonical):
+        return prefix + hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def get(canonical):
+        return SearchCache.get_cache().get(DetailCache.make_key(DetailCache.KEY_PREFIX, canonical))
+
+    @staticmethod
+    def set(canonical, recipe, etag=None, last_modified=None):
+        entry = {
+            'recipe': recipe,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': time.time(),
+        }
+        timeout = getattr(settings, 'SCRAPER_DETAIL_CACHE_TTL', 7 * 24 * 60 * 60)
+        SearchCache.get_cache().set(
+            DetailCache.make_key(DetailCache.KEY_PREFIX, canonical), entry, timeout
+        )
+
+    @staticmethod
+    def revalidated(canonical, entry, headers):
+        """Restart entry's freshness after a 304, taking any new validators the origin sent"""
+        DetailCache.set(
+            canonical, entry['recipe'],
+            headers.get('ETag') or entry['etag'],
+            headers.get('Last-Modified') or entry['last_modified'],
+        )
+
+    @staticmethod
+    def retry_later(canonical, entry):
+        """Keep serving a stale entry the origin failed to refresh.
+
+        The entry counts as fresh again for SCRAPER_FALLBACK_CACHE_TTL, so
+        the origin is retried then rather than on every view; it still
+        expires when it would have.
+        """
+        now = time.time()
+        timeout = getattr(settings, 'SCRAPER_DETAIL_CACHE_TTL', 7 * 24 * 60 * 60)
+        remaining = entry['fetched_at'] + timeout - now
+        if remaining > 0:
+            entry = dict(entry, retry_at=now + getattr(settings, 'SCRAPER_FALLBACK_CACHE_TTL', 10 * 60))
+            SearchCache.get_cache().set(
+                DetailCache.make_key(DetailCache.KEY_PREFIX, canonical), entry, remaining
+            )
+
+    @staticmethod
+    def is_fresh(entry):
+        fresh_for = getattr(settings, 'SCRAPER_DETAIL_FRESH_FOR', 60 * 60)
+        now = time.time()
+        return now - entry['fetched_at'] < fresh_for or now < entry.get('retry_at', 0)
+
+    @staticmethod
+    def conditional_headers(entry):
+        """Return If-None-Match / If-Modified-Since headers for a stale entry"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    @staticmethod
+    def get_fallback(canonical):
+        return SearchCache.get_cache().get(DetailCache.make_key(DetailCache.FALLBACK_PREFIX, canonical))
+
+    @staticmethod
+    def set_fallback(canonical, recipe):
+        timeout = getattr(settings, 'SCRAPER_FALLBACK_CACHE_TTL', 10 * 60)
+        SearchCache.get_cache().set(
+            DetailCache.make_key(DetailCache.FALLBACK_PREFIX, canonical), recipe, timeout
+        )
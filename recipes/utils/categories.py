@@ -0,0 +1,31 @@
+import threading
+
+from ..models import Category
+from .fragments import FragmentCache
+
+# (version, categories) for this process
+_categories = (None, [])
+_categories_lock = threading.Lock()
+
+
+class CategoryCache:
+    """Every Category, held in process memory.
+
+    The list is reloaded only when the ``categories`` version in
+    FragmentCache changes (bumped on Category save/delete by
+    recipes/signals.py). Because that version lives in the shared
+    FRAGMENT_CACHE_ALIAS cache, every process picks up edits on its next
+    request while serving the rest without a query.
+    """
+
+    @staticmethod
+    def all():
+        global _categories
+        version = FragmentCache.versions()['categories']
+        cached_version, categories = _categories
+        if cached_version == version:
+            return categories
+        with _categories_lock:
+            if _categories[0] != version:
+                _categories = (version, list(Category.objects.all()))
+            return _categories[1]
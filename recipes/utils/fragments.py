@@ -0,0 +1,50 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+class FragmentCache:
+    """Version numbers for the template fragments cached with {% cache %}.
+
+    Fragments include their group's version in the cache key, so bumping a
+    version makes every fragment of that group miss at once instead of
+    deleting keys one by one. Versions are timestamps, so a version lost to
+    eviction can never come back and match an old fragment.
+
+    The versions are read from FRAGMENT_CACHE_ALIAS, which must be a cache
+    shared by every worker process (file, database, Redis or Memcached).
+    With a per-process LocMemCache a bump reaches only the process that
+    made it. The fragments themselves may stay in a local cache, because
+    their keys carry the version.
+    """
+
+    PREFIX = 'fragments:version:'
+    GROUPS = ('recipes', 'categories')
+
+    @staticmethod
+    def get_cache():
+        return caches[getattr(settings, 'FRAGMENT_CACHE_ALIAS', 'default')]
+
+    @staticmethod
+    def versions():
+        """Return {group: version}, initialising missing versions"""
+        cache = FragmentCache.get_cache()
+        keys = {group: FragmentCache.PREFIX + group for group in FragmentCache.GROUPS}
+        found = cache.get_many(keys.values())
+        versions = {}
+        for group, key in keys.items():
+            if key not in found:
+                cache.add(key, time.time_ns(), None)
+                found[key] = cache.get(key)
+            versions[group] = found[key]
+        return versions
+
+    @staticmethod
+    def bump(*groups):
+        """Invalidate every fragment of the given groups once the transaction commits"""
+        def bump_now():
+            cache = FragmentCache.get_cache()
+            cache.set_many({FragmentCache.PREFIX + group: time.time_ns() for group in groups}, None)
+        transaction.on_commit(bump_now)
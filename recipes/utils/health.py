@@ -0,0 +1,143 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+class SourceHealth:
+    """Per-source success/latency tracking and circuit breaker.
+
+    Each source keeps its last ``SCRAPER_HEALTH_WINDOW`` fetches in
+    ``SCRAPER_HEALTH_CACHE_ALIAS`` (the 'shared' cache), so every worker
+    process sees the same state and the half-open probe is claimed once
+    across them (atomically on Redis/Memcached; the file cache's add() can
+    rarely let two through). After ``SCRAPER_BREAKER_FAILURES`` failures in a row the
+    breaker opens and the source is skipped for ``SCRAPER_BREAKER_COOLDOWN``
+    seconds; then one probe request is let through (half-open) and its
+    outcome closes or re-opens the breaker. Updates are read-modify-write,
+    so concurrent workers may occasionally drop a sample.
+    """
+
+    PREFIX = 'health:v1:'
+
+    @staticmethod
+    def get_cache():
+        return caches[getattr(settings, 'SCRAPER_HEALTH_CACHE_ALIAS', 'shared')]
+
+    @staticmethod
+    def key(source_name):
+        return SourceHealth.PREFIX + source_name.lower().replace(' ', '-')
+
+    @staticmethod
+    def load(source_name):
+        return SourceHealth.get_cache().get(SourceHealth.key(source_name)) or {
+            'samples': [],
+            'failures': 0,
+            'opened_at': None,
+        }
+
+    @staticmethod
+    def save(source_name, health):
+        SourceHealth.get_cache().set(SourceHealth.key(source_name), health, None)
+
+    @staticmethod
+    def state(health, now=None):
+        if health['opened_at'] is None:
+            return CLOSED
+        now = time.time() if now is None else now
+        cooldown = getattr(settings, 'SCRAPER_BREAKER_COOLDOWN', 5 * 60)
+        return OPEN if now - health['opened_at'] < cooldown else HALF_OPEN
+
+    @staticmethod
+    def allow(source_name):
+        """Whether source_name may be queried right now"""
+        health = SourceHealth.load(source_name)
+        state = SourceHealth.state(health)
+        if state == CLOSED:
+            return True
+        if state == OPEN:
+            return False
+        # Half-open: only one process gets to send the probe
+        probe_key = SourceHealth.key(source_name) + ':probe'
+        return SourceHealth.get_cache().add(probe_key, True, SourceHealth.max_timeout())
+
+    @staticmethod
+    def record(source_name, ok, latency):
+        """Record one fetch outcome and trip or reset the breaker"""
+        health = SourceHealth.load(source_name)
+        window = getattr(settings, 'SCRAPER_HEALTH_WINDOW', 50)
+        health['samples'] = (health['samples'] + [[time.time(), ok, round(latency, 3)]])[-window:]
+        state = SourceHealth.state(health)
+        if ok:
+            health['failures'] = 0
+            health['opened_at'] = None
+        else:
+            health['failures'] += 1
+            threshold = getattr(settings, 'SCRAPER_BREAKER_FAILURES', 3)
+            if state == HALF_OPEN or (state == CLOSED and health['failures'] >= threshold):
+                health['opened_at'] = time.time()
+                print(f"🔌 Circuit opened for {source_name} after {health['failures']} failure(s)")
+        SourceHealth.save(source_name, health)
+        if state == HALF_OPEN:
+            SourceHealth.get_cache().delete(SourceHealth.key(source_name) + ':probe')
+
+    @staticmethod
+    def max_timeout():
+        return getattr(settings, 'SCRAPER_TIMEOUT', 10)
+
+    @staticmethod
+    def timeout(source_name, health=None):
+        """Request timeout derived from the source's recent latency.
+
+        Twice the p95 of successful fetches, clamped to
+        [SCRAPER_MIN_TIMEOUT, SCRAPER_TIMEOUT]; the maximum until there
+        are enough samples.
+        """
+        if health is None:
+            health = SourceHealth.load(source_name)
+        latencies = [latency for _, ok, latency in health['samples'] if ok]
+        maximum = SourceHealth.max_timeout()
+        if len(latencies) < 5:
+            return maximum
+        minimum = getattr(settings, 'SCRAPER_MIN_TIMEOUT', 2)
+        return max(minimum, min(maximum, 2 * percentile(latencies, 0.95)))
+
+    @staticmethod
+    def snapshot(source_names):
+        """Health summary of each source, for the status page"""
+        now = time.time()
+        cooldown = getattr(settings, 'SCRAPER_BREAKER_COOLDOWN', 5 * 60)
+        rows = []
+        for name in source_names:
+            health = SourceHealth.load(name)
+            samples = health['samples']
+            latencies = [latency for _, ok, latency in samples if ok]
+            state = SourceHealth.state(health, now)
+            rows.append({
+                'source': name,
+                'state': state,
+                'samples': len(samples),
+                'success_rate': sum(1 for _, ok, _ in samples if ok) / len(samples) if samples else None,
+                'p50': percentile(latencies, 0.5),
+                'p95': percentile(latencies, 0.95),
+                'timeout': SourceHealth.timeout(name, health),
+                'failures': health['failures'],
+                'retry_in': max(0, round(health['opened_at'] + cooldown - now)) if state == OPEN else None,
+                'last_seen': samples[-1][0] if samples else None,
+            })
+        return rows
+
+    @staticmethod
+    def reset(source_names):
+        keys = [SourceHealth.key(name) for name in source_names]
+        SourceHealth.get_cache().delete_many(keys + [key + ':probe' for key in keys])
@@ -0,0 +1,70 @@
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class SessionPool:
+    """Process-wide keep-alive HTTP sessions, one per host.
+
+    Each session carries the header set of the first source that used the
+    host and a connection pool of ``SCRAPER_POOL_MAXSIZE`` sockets, so
+    concurrent searches against the same site reuse warm connections.
+    urllib3's pools are thread-safe; creation is guarded by a lock.
+    """
+
+    @staticmethod
+    def get(url, headers=None, timeout=10, **kwargs):
+        """Drop-in replacement for requests.get using the pooled session"""
+        session = SessionPool.session_for(url, headers)
+        return session.get(url, headers=headers, timeout=timeout, **kwargs)
+
+    @staticmethod
+    def session_for(url, headers=None):
+        host = urlsplit(url).netloc.lower()
+        session = _sessions.get(host)
+        if session is None:
+            with _sessions_lock:
+                session = _sessions.get(host)
+                if session is None:
+                    session = SessionPool.build_session(headers)
+                    _sessions[host] = session
+        return session
+
+    @staticmethod
+    def build_session(headers=None):
+        retries = getattr(settings, 'SCRAPER_HTTP_RETRIES', 1)
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            backoff_factor=getattr(settings, 'SCRAPER_HTTP_BACKOFF', 0.3),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=getattr(settings, 'SCRAPER_POOL_MAXSIZE', 10),
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        if headers:
+            session.headers.update(headers)
+        return session
+
+    @staticmethod
+    def close_all():
+        with _sessions_lock:
+            for session in _sessions.values():
+                session.close()
+            _sessions.clear()
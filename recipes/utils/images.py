@@ -0,0 +1,165 @@
+import hashlib
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, features
+
+from ..models import Profile, Recipe
+from .fragments import FragmentCache
+
+# Derivatives are encoded off the request path on a small dedicated pool
+_executor = None
+_executor_lock = threading.Lock()
+
+# Output formats, best first; AVIF/WebP are skipped if Pillow lacks them
+FORMATS = [
+    ('image/avif', 'AVIF', 'avif', {'quality': 60}),
+    ('image/webp', 'WEBP', 'webp', {'quality': 80, 'method': 4}),
+    ('image/jpeg', 'JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+]
+CODECS = {'AVIF': 'avif', 'WEBP': 'webp'}
+
+# model -> (image field, derivatives field, IMAGE_DERIVATIVE_WIDTHS key)
+DERIVATIVE_FIELDS = {
+    Recipe: ('image', 'image_derivatives', 'recipe'),
+    Profile: ('profile_pic', 'profile_pic_derivatives', 'avatar'),
+}
+
+
+class ImageDerivatives:
+    """Resized, re-encoded copies of uploaded images for responsive markup.
+
+    For every width in ``IMAGE_DERIVATIVE_WIDTHS`` an AVIF, WebP and JPEG
+    copy is written under ``derivatives/``, named after a hash of the source
+    bytes so identical uploads share files and URLs can be cached forever.
+    Orientation is applied and EXIF/GPS metadata dropped. The resulting
+    manifest is stored on the model and read by ``{% responsive_image %}``.
+    """
+
+    @staticmethod
+    def widths(kind):
+        widths = getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', {})
+        return widths.get(kind, (320, 640, 1024))
+
+    @staticmethod
+    def formats():
+        return [
+            fmt for fmt in FORMATS
+            if fmt[1] not in CODECS or features.check(CODECS[fmt[1]])
+        ]
+
+    @staticmethod
+    def is_placeholder(field_file):
+        """True for the field default (the stock avatar), which is not an upload"""
+        return field_file.name == field_file.field.default
+
+    @staticmethod
+    def is_current(field_file, manifest):
+        return bool(manifest) and manifest.get('source') == field_file.name
+
+    @staticmethod
+    def build(field_file, widths):
+        """Write the derivatives of field_file and return their manifest"""
+        field_file.open('rb')
+        try:
+            data = field_file.read()
+        finally:
+            field_file.close()
+        digest = hashlib.sha256(data).hexdigest()[:20]
+        storage = field_file.storage
+
+        image = Image.open(io.BytesIO(data))
+        largest = max(widths)
+        # Let the JPEG decoder downscale while decoding when it can
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+        # Never upscale; a small original still gets one derivative
+        targets = sorted({min(width, image.width) for width in widths})
+        manifest = {
+            'source': field_file.name,
+            'width': image.width,
+            'height': image.height,
+            'formats': {},
+        }
+        for width in targets:
+            height = max(1, round(image.height * width / image.width))
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for mime, pil_format, ext, options in ImageDerivatives.formats():
+                name = f'derivatives/{digest[:2]}/{digest}-{width}w.{ext}'
+                if not storage.exists(name):
+                    frame = resized
+                    if pil_format == 'JPEG' and frame.mode == 'RGBA':
+                        frame = Image.new('RGB', frame.size, 'white')
+                        frame.paste(resized, mask=resized.getchannel('A'))
+                    buffer = io.BytesIO()
+                    frame.save(buffer, pil_format, **options)
+                    storage.save(name, ContentFile(buffer.getvalue()))
+                manifest['formats'].setdefault(mime, []).append([width, name])
+        return manifest
+
+    @staticmethod
+    def process(model, pk, force=False):
+        """Generate derivatives for one saved instance if they are missing or stale"""
+        image_field, derivatives_field, kind = DERIVATIVE_FIELDS[model]
+        instance = model.objects.filter(pk=pk).first()
+        if instance is None:
+            return None
+        field_file = getattr(instance, image_field)
+        if not field_file or ImageDerivatives.is_placeholder(field_file):
+            return None
+        if not force and ImageDerivatives.is_current(field_file, getattr(instance, derivatives_field)):
+            return None
+        try:
+            manifest = ImageDerivatives.build(field_file, ImageDerivatives.widths(kind))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not build derivatives for {field_file.name}: {e}")
+            return None
+        # Only store it if the image hasn't been replaced meanwhile
+        model.objects.filter(pk=pk, **{image_field: field_file.name}).update(
+            **{derivatives_field: manifest}
+        )
+        if model is Recipe:
+            # Cached recipe cards still point at the original upload
+            FragmentCache.bump('recipes')
+        print(f"🖼️ Built derivatives for {field_file.name}")
+        return manifest
+
+    @staticmethod
+    def process_in_background(model, pk):
+        try:
+            ImageDerivatives.process(model, pk)
+        except Exception as e:
+            print(f"⚠️ Image derivative job failed: {e}")
+        finally:
+            # Pool threads outlive requests; release their DB connection
+            close_old_connections()
+
+    @staticmethod
+    def schedule(instance):
+        """Queue derivative generation for instance once the transaction commits"""
+        model = type(instance)
+        if not getattr(settings, 'IMAGE_DERIVATIVES_ASYNC', True):
+            transaction.on_commit(lambda: ImageDerivatives.process(model, instance.pk))
+            return
+        transaction.on_commit(
+            lambda: ImageDerivatives.get_executor().submit(ImageDerivatives.process_in_background, model, instance.pk)
+        )
+
+    @staticmethod
+    def get_executor():
+        global _executor
+        if _executor is None:
+            with _executor_lock:
+                if _executor is None:
+                    _executor = ThreadPoolExecutor(
+                        max_workers=getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', 2),
+                        thread_name_prefix='image-derivatives',
+                    )
+        return _executor
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import re
+import time
+
+from django.db import transaction
+
+from ..models import Category, Recipe
+from .fragments import FragmentCache
+from .ingredients import IngredientIndex
+
+WHITESPACE_RE = re.compile(r'\s+')
+# ISO 8601 durations as used by schema.org, e.g. PT1H30M
+DURATION_RE = re.compile(r'P(?:(\d+)D)?T?(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?', re.I)
+NUMBER_RE = re.compile(r'\d+')
+
+
+def content_hash(title, ingredients, instructions):
+    """Fingerprint of a recipe's content, ignoring case and whitespace"""
+    parts = [WHITESPACE_RE.sub(' ', (part or '').strip().casefold()) for part in (title, ingredients, instructions)]
+    return hashlib.sha256('\x00'.join(parts).encode('utf-8')).hexdigest()
+
+
+def iter_jsonl(stream):
+    """Yield one object per non-blank line"""
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            raise ValueError(f'line {line_number}: {e}') from None
+
+
+def iter_json(stream, chunk_size=64 * 1024):
+    """Yield the objects of a JSON document one at a time.
+
+    A top-level array is decoded element by element from a sliding buffer,
+    so only one element is in memory at once. Any other document is
+    decoded whole and yielded as is.
+    """
+    decoder = json.JSONDecoder()
+    buffer = stream.read(chunk_size).lstrip()
+    if not buffer.startswith('['):
+        yield json.loads(buffer + stream.read())
+        return
+
+    buffer, eof = buffer[1:], False
+    while True:
+        buffer = buffer.lstrip().lstrip(',').lstrip()
+        if buffer.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except ValueError:
+            if eof:
+                raise
+            chunk = stream.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+            continue
+        yield item
+        buffer = buffer[end:]
+
+
+def iter_recipe_objects(item):
+    """Yield the recipes within a JSON item.
+
+    Walks lists and JSON-LD ``@graph``s, keeping schema.org Recipe objects
+    and plain rows (no ``@type``) and skipping other schema.org types.
+    """
+    if isinstance(item, list):
+        for child in item:
+            yield from iter_recipe_objects(child)
+    elif isinstance(item, dict):
+        if '@graph' in item:
+            yield from iter_recipe_objects(item['@graph'])
+        elif '@type' not in item or 'Recipe' in str(item['@type']):
+            yield item
+
+
+def parse_minutes(value):
+    if isinstance(value, (int, float)):
+        return int(value)
+    if not value:
+        return 0
+    match = DURATION_RE.fullmatch(str(value).strip())
+    if match and any(match.groups()):
+        days, hours, minutes, seconds = (int(group or 0) for group in match.groups())
+        return days * 1440 + hours * 60 + minutes + (1 if seconds >= 30 else 0)
+    number = NUMBER_RE.search(str(value))
+    return int(number.group()) if number else 0
+
+
+def parse_number(value, default):
+    if isinstance(value, (int, float)):
+        return int(value)
+    number = NUMBER_RE.search(str(value or ''))
+    return int(number.group()) if number else default
+
+
+def as_lines(value):
+    """Flatten a string / list / HowToStep / HowToSection value into lines"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value.strip()]
+    if isinstance(value, dict):
+        if 'itemListElement' in value:
+            return as_lines(value['itemListElement'])
+        text = value.get('text') or value.get('name') or ''
+        return [text.strip()] if text.strip() else []
+    lines = []
+    for part in value:
+        lines.extend(as_lines(part))
+    return lines
+
+
+class RecipeImporter:
+    """Bulk-load recipes from JSONL or schema.org JSON exports.
+
+    Rows are mapped onto Recipe, their category is resolved through an
+    in-memory name -> id map, and they are inserted with bulk_create in
+    transactions of ``batch_size``. Rows whose content hash already
+    exists (in the database or earlier in the file) are skipped. The FTS
+    index follows via its triggers; the ingredient index and cached
+    fragments are updated here, since bulk_create sends no signals.
+    """
+
+    def __init__(self, user, batch_size=1000, default_category=None, stdout=None):
+        self.user = user
+        self.batch_size = batch_size
+        self.default_category = default_category
+        self.stdout = stdout
+        self.categories = {name.casefold(): pk for pk, name in Category.objects.values_list('pk', 'name')}
+        self.hashes = set(
+            Recipe.objects.exclude(content_hash='').values_list('content_hash', flat=True).iterator()
+        )
+        self.stats = {'read': 0, 'created': 0, 'duplicates': 0, 'invalid': 0, 'seconds': 0.0}
+
+    def category_id(self, name):
+        name = WHITESPACE_RE.sub(' ', str(name or '').strip())[:100]
+        if not name:
+            return None
+        key = name.casefold()
+        if key not in self.categories:
+            self.categories[key] = Category.objects.create(name=name).pk
+        return self.categories[key]
+
+    def build(self, row):
+        """Map one input object (our field names or schema.org) onto a Recipe.
+
+        Returns (recipe, category name); the category is resolved only
+        once the row is known not to be a duplicate.
+        """
+        if 'Recipe' in str(row.get('@type', '')):
+            category = row.get('recipeCategory')
+            if isinstance(category, list):
+                category = category[0] if category else None
+            row = {
+                'title': row.get('name'),
+                'description': row.get('description'),
+                'ingredients': row.get('recipeIngredient'),
+                'instructions': row.get('recipeInstructions'),
+                'preparation_time': row.get('prepTime'),
+                'cooking_time': row.get('cookTime'),
+                'servings': row.get('recipeYield'),
+                'category': category,
+            }
+
+        title = WHITESPACE_RE.sub(' ', str(row.get('title') or '').strip())[:200]
+        ingredients = '\n'.join(as_lines(row.get('ingredients')))
+        instructions = '\n'.join(as_lines(row.get('instructions')))
+        if not title or not ingredients or not instructions:
+            return None, None
+
+        servings = row.get('servings')
+        if isinstance(servings, list):
+            servings = servings[0] if servings else None
+        recipe = Recipe(
+            title=title,
+            description=str(row.get('description') or '').strip(),
+            ingredients=ingredients,
+            instructions=instructions,
+            preparation_time=parse_minutes(row.get('preparation_time')),
+            cooking_time=parse_minutes(row.get('cooking_time')),
+            servings=parse_number(servings, 4),
+            created_by=self.user,
+            content_hash=content_hash(title, ingredients, instructions),
+        )
+        return recipe, row.get('category') or self.default_category
+
+    def run(self, rows):
+        """Import an iterable of input objects; returns the stats dict"""
+        started = time.perf_counter()
+        batch = []
+        for row in rows:
+            self.stats['read'] += 1
+            recipe, category = self.build(row) if isinstance(row, dict) else (None, None)
+            if recipe is None:
+                self.stats['invalid'] += 1
+                continue
+            if recipe.content_hash in self.hashes:
+                self.stats['duplicates'] += 1
+                continue
+            self.hashes.add(recipe.content_hash)
+            recipe.category_id = self.category_id(category)
+            batch.append(recipe)
+            if len(batch) >= self.batch_size:
+                self.flush(batch, started)
+                batch = []
+        if batch:
+            self.flush(batch, started)
+        if self.stats['created']:
+            FragmentCache.bump('recipes')
+        self.stats['seconds'] += time.perf_counter() - started
+        return self.stats
+
+    @transaction.atomic
+    def flush(self, batch, started):
+        created = Recipe.objects.bulk_create(batch)
+        IngredientIndex.update_many(created)
+        self.stats['created'] += len(created)
+        if self.stdout:
+            elapsed = self.stats['seconds'] + time.perf_counter() - started
+            self.stdout.write(
+                f"{self.stats['created']} created, {self.stats['duplicates']} duplicates "
+                f"({self.stats['read'] / elapsed:.0f} rows/s)"
+            )
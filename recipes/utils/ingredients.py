@@ -0,0 +1,190 @@
+import re
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from ..models import Ingredient, Recipe, RecipeIngredient
+
+# Words that describe an amount or preparation rather than the ingredient
+UNITS = {
+    'cup', 'cups', 'c', 'tablespoon', 'tablespoons', 'tbsp', 'tbs', 'tbl', 'teaspoon', 'teaspoons',
+    'tsp', 'g', 'gram', 'grams', 'kg', 'kilogram', 'kilograms', 'mg', 'ml', 'millilitre', 'milliliter',
+    'millilitres', 'milliliters', 'l', 'litre', 'liter', 'litres', 'liters', 'oz', 'ounce', 'ounces',
+    'lb', 'lbs', 'pound', 'pounds', 'pinch', 'pinches', 'dash', 'dashes', 'handful', 'handfuls',
+    'clove', 'cloves', 'can', 'cans', 'tin', 'tins', 'package', 'packages', 'pkg', 'packet', 'packets',
+    'slice', 'slices', 'piece', 'pieces', 'bunch', 'bunches', 'sprig', 'sprigs', 'stick', 'sticks',
+    'quart', 'quarts', 'qt', 'pint', 'pints', 'pt', 'jar', 'jars', 'bottle', 'bottles', 'x',
+}
+DESCRIPTORS = {
+    'of', 'a', 'an', 'and', 'or', 'to', 'taste', 'fresh', 'freshly', 'chopped', 'finely', 'roughly',
+    'diced', 'minced', 'sliced', 'grated', 'shredded', 'crushed', 'ground', 'peeled', 'large', 'small',
+    'medium', 'whole', 'optional', 'about', 'approx', 'approximately', 'divided', 'softened', 'melted',
+    'cooked', 'uncooked', 'raw', 'dried', 'packed', 'heaped', 'heaping', 'level', 'thinly', 'thickly',
+    'cubed', 'halved', 'quartered', 'beaten', 'room', 'temperature', 'for', 'serving', 'garnish',
+}
+IRREGULAR_PLURALS = {
+    'leaves': 'leaf', 'loaves': 'loaf', 'halves': 'half', 'knives': 'knife',
+}
+# Words ending in "s" that are already singular
+SINGULAR_S = {
+    'asparagus', 'couscous', 'hummus', 'molasses', 'swiss', 'citrus', 'octopus', 'hibiscus',
+    'lemongrass', 'grass', 'bass', 'brussels', 'grits',
+}
+
+QUANTITY_RE = re.compile(r'[\d¼-¾⅐-⅞]+(?:[./\-]\d+)?')
+PARENTHESES_RE = re.compile(r'\([^)]*\)')
+SPLIT_RE = re.compile(r'[,;\n]+')
+WORD_RE = re.compile(r"[a-z][a-z'\-]*")
+
+
+def singularize(word):
+    """Cheap English singularization good enough for ingredient names"""
+    if word in IRREGULAR_PLURALS:
+        return IRREGULAR_PLURALS[word]
+    if word in SINGULAR_S or len(word) <= 3:
+        return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith('oes') or word.endswith(('ches', 'shes', 'sses', 'xes', 'zes')):
+        return word[:-2]
+    if word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+
+def normalize_ingredient(text):
+    """Reduce one ingredient line to its canonical name.
+
+    "2 cups Chopped Tomatoes (ripe)" -> "tomato"
+    """
+    text = PARENTHESES_RE.sub(' ', text.lower())
+    text = QUANTITY_RE.sub(' ', text)
+    words = [
+        singularize(word.strip("'-"))
+        for word in WORD_RE.findall(text)
+        if word not in UNITS and word not in DESCRIPTORS
+    ]
+    return ' '.join(word for word in words if word)[:100]
+
+
+def normalize_ingredients(text):
+    """Split free-text ingredients and return the set of canonical names"""
+    names = set()
+    for part in SPLIT_RE.split(text or ''):
+        name = normalize_ingredient(part)
+        if name:
+            names.add(name)
+    return names
+
+
+class IngredientIndex:
+    """Maintains and queries the Ingredient / RecipeIngredient inverted index"""
+
+    @staticmethod
+    def get_or_create_ids(names):
+        """Return {name: id}, creating missing Ingredient rows in one insert"""
+        if not names:
+            return {}
+        Ingredient.objects.bulk_create(
+            [Ingredient(name=name) for name in names], ignore_conflicts=True
+        )
+        return dict(Ingredient.objects.filter(name__in=names).values_list('name', 'id'))
+
+    @staticmethod
+    @transaction.atomic
+    def update(recipe):
+        """Sync the index rows of one recipe with its ingredients text"""
+        wanted = set(IngredientIndex.get_or_create_ids(normalize_ingredients(recipe.ingredients)).values())
+        current = set(
+            RecipeIngredient.objects.filter(recipe=recipe).values_list('ingredient_id', flat=True)
+        )
+        stale = current - wanted
+        if stale:
+            RecipeIngredient.objects.filter(recipe=recipe, ingredient_id__in=stale).delete()
+        RecipeIngredient.objects.bulk_create(
+            [RecipeIngredient(recipe=recipe, ingredient_id=pk) for pk in wanted - current],
+            ignore_conflicts=True,
+        )
+        # A queryset update skips save(), so neither signals nor the FTS
+        # triggers (which only watch the text columns) fire again
+        Recipe.objects.filter(pk=recipe.pk).update(ingredient_count=len(wanted))
+        recipe.ingredient_count = len(wanted)
+
+    @staticmethod
+    def update_many(recipes):
+        """Index freshly inserted recipes in bulk (they have no rows to diff against)"""
+        names = {recipe.pk: normalize_ingredients(recipe.ingredients) for recipe in recipes}
+        all_names = sorted(set().union(*names.values()))
+        ids = {}
+        for start in range(0, len(all_names), 500):
+            ids.update(IngredientIndex.get_or_create_ids(all_names[start:start + 500]))
+        RecipeIngredient.objects.bulk_create(
+            [
+                RecipeIngredient(recipe_id=pk, ingredient_id=ids[name])
+                for pk, recipe_names in names.items()
+                for name in recipe_names
+            ],
+            ignore_conflicts=True,
+        )
+        # One UPDATE per distinct count rather than one per recipe
+        by_count = {}
+        for pk, recipe_names in names.items():
+            by_count.setdefault(len(recipe_names), []).append(pk)
+        for count, pks in by_count.items():
+            for start in range(0, len(pks), 500):
+                Recipe.objects.filter(pk__in=pks[start:start + 500]).update(ingredient_count=count)
+        for recipe in recipes:
+            recipe.ingredient_count = len(names[recipe.pk])
+
+    @staticmethod
+    def rebuild(batch_size=1000):
+        """Re-index every recipe; returns the number processed"""
+        processed = 0
+        recipes = Recipe.objects.only('pk', 'ingredients').order_by('pk')
+        for recipe in recipes.iterator(chunk_size=batch_size):
+            IngredientIndex.update(recipe)
+            processed += 1
+        return processed
+
+    @staticmethod
+    def match(names, limit=20):
+        """Rank recipes by how many of the given ingredients they use.
+
+        Returns (normalized names, rows) where each row has the recipe id,
+        the number of matched ingredients and the recipe's total count.
+        """
+        wanted = set()
+        for name in names:
+            normalized = normalize_ingredient(name)
+            if normalized:
+                wanted.add(normalized)
+        ingredient_ids = list(Ingredient.objects.filter(name__in=wanted).values_list('id', flat=True))
+        if not ingredient_ids:
+            return wanted, []
+
+        # Intersect via the (ingredient, recipe) index, then group per recipe.
+        # Ties on overlap go to recipes needing fewer extra ingredients; that
+        # ordering happens in SQL so it holds across the whole result, not
+        # just within the page that survives the limit. The total comes from
+        # the denormalized Recipe.ingredient_count, one join per group
+        # instead of a correlated COUNT per candidate recipe
+        matches = list(
+            RecipeIngredient.objects.filter(ingredient_id__in=ingredient_ids)
+            .values('recipe_id')
+            .annotate(matched=Count('ingredient_id'), total=F('recipe__ingredient_count'))
+            .annotate(missing=F('total') - F('matched'))
+            .order_by('-matched', 'missing', '-recipe_id')[:limit]
+        )
+        return wanted, matches
+
+    @staticmethod
+    def suggest(prefix, limit=10):
+        """Ingredient names starting with prefix, as an index range scan"""
+        prefix = ' '.join(WORD_RE.findall((prefix or '').lower()))
+        if not prefix:
+            return []
+        return list(
+            Ingredient.objects.filter(name__gte=prefix, name__lt=prefix + '\uffff')
+            .order_by('name')
+            .values_list('name', flat=True)[:limit]
+        )
@@ -0,0 +1,183 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .cache import SearchCache
+from .ranking import ResultMerger
+from .scraper import RecipeScraper
+
+
+class SearchJobs:
+    """Web searches run in the background on the scraper thread pool.
+
+    Each source writes its own cache key as soon as it finishes, so a
+    polling client sees results arrive one source at a time. Job state
+    lives in ``SCRAPER_JOBS_CACHE_ALIAS`` (the 'shared' cache), so a poll
+    answered by any worker process sees the job that another one started.
+    """
+
+    PREFIX = 'searchjob:'
+    TTL = 10 * 60
+
+    @staticmethod
+    def get_cache():
+        return caches[getattr(settings, 'SCRAPER_JOBS_CACHE_ALIAS', 'shared')]
+
+    @staticmethod
+    def start(query, local_titles=()):
+        """Start (or join) a background search for query.
+
+        local_titles are the titles of the local recipes already shown for
+        query; web results duplicating them are left out of the job's
+        status. Returns (job_id, results). results is the cached list when
+        the query was already answered, in which case no job is started and
+        job_id is None.
+        """
+        cached = SearchCache.get(query)
+        if cached is not None:
+            return None, cached
+
+        cache = SearchJobs.get_cache()
+        deadline = getattr(settings, 'SCRAPER_SEARCH_DEADLINE', 12)
+        job_id = uuid.uuid4().hex
+        # Identical queries already in flight share one job
+        inflight_key = SearchJobs.PREFIX + 'inflight:' + SearchCache.make_key(query)
+        if not cache.add(inflight_key, job_id, deadline):
+            existing = cache.get(inflight_key)
+            if existing and cache.get(SearchJobs.PREFIX + existing):
+                return existing, None
+            cache.set(inflight_key, job_id, deadline)
+
+        sources = RecipeScraper.get_sources()
+        cache.set(SearchJobs.PREFIX + job_id, {
+            'query': query,
+            'status': 'running',
+            'started': time.time(),
+            'deadline': deadline,
+            'sources': [name for name, func in sources],
+            'local_titles': list(local_titles),
+        }, SearchJobs.TTL)
+
+        executor = RecipeScraper.get_executor()
+        progress = JobProgress(job_id, query, len(sources), time.time() + deadline, inflight_key)
+        for index, (name, func) in enumerate(sources):
+            future = executor.submit(SearchJobs.run_source, job_id, index, name, func, query, progress.deadline_at)
+            future.add_done_callback(lambda future, index=index: progress.source_done(index, future))
+        return job_id, None
+
+    @staticmethod
+    def run_source(job_id, index, name, func, query, deadline_at):
+        """Search one source; returns its recipes, or None if it never ran or failed"""
+        if time.time() > deadline_at:
+            # Queued behind other searches until the job was over
+            recipes, status = None, 'expired'
+        else:
+            try:
+                recipes = func(query)
+            except Exception as e:
+                print(f"⚠️ Error with {name}: {e}")
+                recipes = None
+            # Scrapers return None when the source could not be searched
+            status = 'error' if recipes is None else 'ok' if recipes else 'empty'
+        SearchJobs.get_cache().set(
+            SearchJobs.source_key(job_id, index),
+            {'source': name, 'status': status, 'recipes': recipes or []},
+            SearchJobs.TTL,
+        )
+        return recipes
+
+    @staticmethod
+    def finish(job_id, query, by_source, inflight_key):
+        """Publish the merged results once every source has reported.
+
+        Results missing a source (expired or failed) are only cached for
+        the short negative TTL, so the next search tries again soon.
+        """
+        results = []
+        complete = True
+        for recipes in by_source:
+            if recipes is None:
+                complete = False
+            else:
+                results.extend(recipes)
+
+        cache = SearchJobs.get_cache()
+        SearchCache.set(query, results, partial=not complete)
+        meta = cache.get(SearchJobs.PREFIX + job_id)
+        if meta:
+            meta['status'] = 'done'
+            cache.set(SearchJobs.PREFIX + job_id, meta, SearchJobs.TTL)
+        cache.delete(inflight_key)
+
+    @staticmethod
+    def source_key(job_id, index):
+        return f'{SearchJobs.PREFIX}{job_id}:{index}'
+
+    @staticmethod
+    def status(job_id):
+        """Return the job's progress, or None if it is unknown or expired.
+
+        ``sources`` maps each finished source to its recipes so a client can
+        render them as they arrive; ``pending`` lists the ones still running.
+        Once done, ``results`` holds every source's recipes deduplicated and
+        ranked against the query, each with the ``also_on`` sources it stands for.
+        Recipes duplicating one of the job's local titles are left out of both.
+        """
+        cache = SearchJobs.get_cache()
+        meta = cache.get(SearchJobs.PREFIX + job_id)
+        if meta is None:
+            return None
+
+        keys = [SearchJobs.source_key(job_id, index) for index in range(len(meta['sources']))]
+        finished = cache.get_many(keys)
+        local_titles = meta.get('local_titles', [])
+        sources, pending = {}, []
+        for key, name in zip(keys, meta['sources']):
+            if key in finished:
+                sources[name] = ResultMerger.without_local(local_titles, finished[key]['recipes'])
+            else:
+                pending.append(name)
+
+        expired = time.time() - meta['started'] > meta['deadline']
+        done = meta['status'] == 'done' or not pending or expired
+        status = {
+            'status': 'done' if done else 'running',
+            'sources': sources,
+            'pending': [] if done else pending,
+        }
+        if done:
+            recipes = [recipe for name in meta['sources'] for recipe in sources.get(name, [])]
+            status['results'] = [
+                dict(result['recipe'], also_on=result['also_on'])
+                for result in ResultMerger.merge(meta['query'], web=recipes)
+            ]
+        return status
+
+
+class JobProgress:
+    """Counts a job's finished sources; whichever finishes last publishes.
+
+    Driven by done callbacks, so no pool worker sits blocked waiting on
+    the others: the source tasks get every thread.
+    """
+
+    def __init__(self, job_id, query, total, deadline_at, inflight_key):
+        self.job_id = job_id
+        self.query = query
+        self.deadline_at = deadline_at
+        self.inflight_key = inflight_key
+        self.by_source = [None] * total
+        self.remaining = total
+        self.lock = threading.Lock()
+
+    def source_done(self, index, future):
+        recipes = None if future.cancelled() or future.exception() else future.result()
+        with self.lock:
+            self.by_source[index] = recipes
+            self.remaining -= 1
+            last = self.remaining == 0
+        if last:
+            SearchJobs.finish(self.job_id, self.query, self.by_source, self.inflight_key)
@@ -0,0 +1,77 @@
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.constants import OnConflict
+
+from ..models import Recipe
+from .fragments import FragmentCache
+
+
+class Likes:
+    """Race-free like toggling.
+
+    A toggle is one transaction: insert the like, ignoring the conflict if
+    it already exists; when nothing was inserted, delete it instead. The
+    unique (recipe, user) constraint makes concurrent double-clicks
+    serialize on the row rather than both reading "not liked" and both
+    adding. ``like_count`` moves by the same delta in the same transaction
+    and its new value is read back from the UPDATE where the database allows.
+    """
+
+    @staticmethod
+    def insert_or_ignore(recipe_id, user_id):
+        """Insert the like; returns False if it already existed"""
+        table = Recipe.likes.through._meta.db_table
+        ops = connection.ops
+        fields = Recipe.likes.through._meta.get_field('recipe'), Recipe.likes.through._meta.get_field('user')
+        sql = '{} {} ({}, {}) VALUES (%s, %s){}'.format(
+            ops.insert_statement(on_conflict=OnConflict.IGNORE),
+            ops.quote_name(table),
+            *(ops.quote_name(field.column) for field in fields),
+            ops.on_conflict_suffix_sql(fields, OnConflict.IGNORE, None, None) or '',
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [recipe_id, user_id])
+            return cursor.rowcount > 0
+
+    @staticmethod
+    def add_to_count(recipe_id, delta):
+        """Move like_count by delta; returns the new count, or None if there is no such recipe"""
+        returning = connection.vendor in ('postgresql', 'sqlite') and connection.features.can_return_columns_from_insert
+        if not returning:
+            recipes = Recipe.objects.filter(pk=recipe_id)
+            if not recipes.update(like_count=F('like_count') + delta):
+                return None
+            return recipes.values_list('like_count', flat=True).get()
+
+        # SQLite 3.35+ and PostgreSQL can hand the new value back from the UPDATE
+        ops = connection.ops
+        column = ops.quote_name(Recipe._meta.get_field('like_count').column)
+        sql = 'UPDATE {} SET {} = {} + %s WHERE {} = %s RETURNING {}'.format(
+            ops.quote_name(Recipe._meta.db_table), column, column,
+            ops.quote_name(Recipe._meta.pk.column), column,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [delta, recipe_id])
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def toggle(recipe_id, user_id):
+        """Like or unlike; returns (liked, like_count).
+
+        Raises Recipe.DoesNotExist (rolling everything back) when there is
+        no such recipe.
+        """
+        Like = Recipe.likes.through
+        with transaction.atomic():
+            if Likes.insert_or_ignore(recipe_id, user_id):
+                liked, delta = True, 1
+            else:
+                deleted, _ = Like.objects.filter(recipe_id=recipe_id, user_id=user_id).delete()
+                liked, delta = False, -deleted
+            like_count = Likes.add_to_count(recipe_id, delta)
+            if like_count is None:
+                raise Recipe.DoesNotExist(f'No recipe with id {recipe_id}')
+        # Raw SQL sends no m2m_changed, so invalidate the cards here
+        FragmentCache.bump('recipes')
+        return liked, like_count
@@ -0,0 +1,129 @@
+import base64
+import hashlib
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+
+class KeysetPage:
+    """One page of a keyset-paginated recipe queryset"""
+
+    def __init__(self, object_list, queryset, params, param, next_key=None, previous_key=None):
+        self.object_list = object_list
+        self.queryset = queryset
+        self.params = params
+        self.param = param
+        self.next_cursor = KeysetPaginator.encode_cursor('n', *next_key) if next_key else None
+        self.previous_cursor = KeysetPaginator.encode_cursor('p', *previous_key) if previous_key else None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    @property
+    def next_query(self):
+        return self.build_query(self.next_cursor)
+
+    @property
+    def previous_query(self):
+        return self.build_query(self.previous_cursor)
+
+    def build_query(self, cursor):
+        params = self.params.copy()
+        params[self.param] = cursor
+        return params.urlencode()
+
+    @property
+    def total(self):
+        """Row count of the whole queryset, cached briefly"""
+        if not hasattr(self, '_total'):
+            self._total = KeysetPaginator.cached_count(self.queryset)
+        return self._total
+
+
+class KeysetPaginator:
+    """Cursor pagination on (created_date, id), matching Recipe.Meta.ordering.
+
+    Each page is a single indexed range scan, so page N costs the same as
+    page 1 no matter how deep the user has scrolled.
+    """
+
+    ORDERING = ('-created_date', '-id')
+
+    @staticmethod
+    def paginate(queryset, request, param='cursor', per_page=None):
+        per_page = per_page or getattr(settings, 'RECIPES_PER_PAGE', 24)
+        queryset = queryset.order_by(*KeysetPaginator.ORDERING)
+        direction, key = KeysetPaginator.decode_cursor(request.GET.get(param))
+
+        if key and direction == 'p':
+            created, pk = key
+            newer = Q(created_date__gt=created) | Q(created_date=created, id__gt=pk)
+            rows = list(queryset.filter(newer).order_by('created_date', 'id')[:per_page + 1])
+            has_previous = len(rows) > per_page
+            rows = rows[:per_page][::-1]
+            has_next = True
+        else:
+            if key:
+                created, pk = key
+                older = Q(created_date__lt=created) | Q(created_date=created, id__lt=pk)
+                rows = list(queryset.filter(older)[:per_page + 1])
+            else:
+                rows = list(queryset[:per_page + 1])
+            has_next = len(rows) > per_page
+            rows = rows[:per_page]
+            has_previous = key is not None
+
+        next_key = (rows[-1].created_date, rows[-1].pk) if rows and has_next else None
+        previous_key = (rows[0].created_date, rows[0].pk) if rows and has_previous else None
+        return KeysetPage(rows, queryset, request.GET, param, next_key, previous_key)
+
+    @staticmethod
+    def encode_cursor(direction, created, pk):
+        raw = f"{direction}|{created.isoformat()}|{pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Return (direction, (created_date, id)); an invalid cursor means page 1"""
+        if not cursor:
+            return 'n', None
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, created, pk = base64.urlsafe_b64decode(padded).decode().split('|')
+            if direction not in ('n', 'p'):
+                raise ValueError(direction)
+            created, pk = datetime.fromisoformat(created), int(pk)
+            # encode_cursor never writes these; they only come from tampering
+            if settings.USE_TZ != (created.tzinfo is not None) or not 0 < pk < 2 ** 63:
+                raise ValueError(cursor)
+            return direction, (created, pk)
+        except (ValueError, UnicodeDecodeError):
+            return 'n', None
+
+    @staticmethod
+    def cached_count(queryset):
+        """COUNT(*) of queryset, cached per SQL text for RECIPES_COUNT_CACHE_TTL seconds"""
+        sql, params = queryset.order_by().query.sql_with_params()
+        key = 'count:' + hashlib.sha1(f"{sql}{params}".encode()).hexdigest()
+        total = cache.get(key)
+        if total is None:
+            total = queryset.count()
+            cache.set(key, total, getattr(settings, 'RECIPES_COUNT_CACHE_TTL', 60))
+        return total
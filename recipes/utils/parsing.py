@@ -0,0 +1,140 @@
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+from django.conf import settings
+
+try:
+    import lxml  # noqa: F401
+    DEFAULT_PARSER = 'lxml'
+except ImportError:
+    DEFAULT_PARSER = 'html.parser'
+
+CHARSET_RE = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+SCRIPT_OPEN_RE = re.compile(rb'<script\b([^>]*)>', re.I)
+SCRIPT_CLOSE_RE = re.compile(rb'</script\s*>', re.I)
+TYPE_ATTR_RE = re.compile(rb'\btype\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))', re.I)
+
+
+def css_class(name):
+    """Strainer pattern for one class among several.
+
+    bs4 >= 4.13 matches a strainer against the raw ``class`` string, so a
+    plain ``class_='post'`` would miss ``class="post type-post"``.
+    """
+    return re.compile(r'(?:^|\s)' + re.escape(name) + r'(?:\s|$)')
+
+
+class HtmlParser:
+    """Restricted, byte-level HTML parsing for the scrapers.
+
+    Pages are read as raw bytes up to ``SCRAPER_MAX_PAGE_BYTES`` and only
+    the elements a parser actually looks at are built into the tree (via
+    SoupStrainer), using lxml when it is installed.
+    """
+
+    # Elements each search page parser reads; everything else is skipped
+    SEARCH_STRAINERS = {
+        'RecipeTin Eats': SoupStrainer('article', class_=css_class('post')),
+        'Simply Recipes': SoupStrainer('a', class_=css_class('card')),
+        'BBC Good Food': SoupStrainer('article', class_=css_class('card')),
+        'Tasty': SoupStrainer('div', class_=css_class('search-result')),
+        'Allrecipes': SoupStrainer(['div', 'article'], class_=re.compile(r'(card|recipe|search-result)', re.I)),
+        'Food Network': SoupStrainer(['div', 'article'], class_=re.compile(r'(MediaBlock|card|result)', re.I)),
+    }
+
+    @staticmethod
+    def parser_name():
+        return getattr(settings, 'SCRAPER_HTML_PARSER', None) or DEFAULT_PARSER
+
+    @staticmethod
+    def max_bytes():
+        return getattr(settings, 'SCRAPER_MAX_PAGE_BYTES', 2 * 1024 * 1024)
+
+    @staticmethod
+    def make_soup(content, parse_only=None, encoding=None):
+        """Build a (possibly partial) tree straight from the response bytes"""
+        if isinstance(content, str):
+            encoding = None
+        return BeautifulSoup(
+            content, HtmlParser.parser_name(), parse_only=parse_only, from_encoding=encoding
+        )
+
+    @staticmethod
+    def declared_encoding(content_type):
+        """The charset from a Content-Type header, or None to let bs4 sniff it"""
+        match = CHARSET_RE.search(content_type or '')
+        return match.group(1) if match else None
+
+    @staticmethod
+    def read_capped(chunks, limit=None):
+        """Join byte chunks, stopping once limit bytes have been read"""
+        if limit is None:
+            limit = HtmlParser.max_bytes()
+        body = bytearray()
+        for chunk in chunks:
+            body += chunk
+            if len(body) >= limit:
+                print(f"✂️ Page truncated at {limit} bytes")
+                del body[limit:]
+                break
+        return bytes(body)
+
+    @staticmethod
+    def read_response(response):
+        """Return (body, encoding) for a streamed requests response"""
+        try:
+            body = HtmlParser.read_capped(response.iter_content(64 * 1024))
+        finally:
+            response.close()
+        return body, HtmlParser.declared_encoding(response.headers.get('Content-Type'))
+
+
+class JsonLdScanner:
+    """Pulls ``<script type="application/ld+json">`` bodies out of a byte stream.
+
+    Feed it response chunks as they arrive; each call returns the JSON-LD
+    blocks completed by that chunk, so the caller can stop reading as soon
+    as it finds what it needs. Everything read so far stays in ``body`` for
+    a DOM fallback, up to ``SCRAPER_MAX_PAGE_BYTES`` after which ``full``
+    is set.
+    """
+
+    def __init__(self, limit=None):
+        self.limit = HtmlParser.max_bytes() if limit is None else limit
+        self.body = bytearray()
+        self.pos = 0
+        self.full = False
+
+    def feed(self, chunk):
+        if self.full:
+            return []
+        self.body += chunk
+        if len(self.body) >= self.limit:
+            print(f"✂️ Page truncated at {self.limit} bytes")
+            del self.body[self.limit:]
+            self.full = True
+
+        blocks = []
+        while True:
+            opening = SCRIPT_OPEN_RE.search(self.body, self.pos)
+            if opening is None:
+                # Resume from a tag that may be cut off at the chunk boundary
+                last = self.body.rfind(b'<', self.pos)
+                self.pos = last if last != -1 else len(self.body)
+                break
+            closing = SCRIPT_CLOSE_RE.search(self.body, opening.end())
+            if closing is None:
+                self.pos = opening.start()
+                break
+            if JsonLdScanner.is_json_ld(opening.group(1)):
+                blocks.append(bytes(self.body[opening.end():closing.start()]))
+            self.pos = closing.end()
+        return blocks
+
+    @staticmethod
+    def is_json_ld(attrs):
+        match = TYPE_ATTR_RE.search(attrs)
+        if match is None:
+            return False
+        value = next(group for group in match.groups() if group is not None)
+        return value == b'application/ld+json'
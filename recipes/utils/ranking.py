@@ -0,0 +1,255 @@
+import functools
+import math
+import random
+import re
+import zlib
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from .cache import DetailCache
+
+# Words that say nothing about which dish a title is
+FILLER_WORDS = {
+    'a', 'an', 'and', 'the', 'of', 'with', 'in', 'on', 'for', 'to', 'my', 'our',
+    'recipe', 'recipes', 'easy', 'best', 'quick', 'simple', 'homemade', 'perfect',
+    'ultimate', 'classic', 'favorite', 'favourite', 'delicious',
+}
+
+
+def tokens(text):
+    """Lowercased words of text without filler, plurals folded to the singular"""
+    words = re.findall(r'\w+', (text or '').casefold())
+    return [
+        word[:-1] if len(word) > 3 and word.endswith('s') and not word.endswith('ss') else word
+        for word in words if word not in FILLER_WORDS
+    ]
+
+
+def shingles(title):
+    """Character trigrams of each title word, so word order and small spelling differences barely matter"""
+    grams = set()
+    for word in set(tokens(title)):
+        padded = f' {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def url_key(url):
+    """Key under which two links to the same page compare equal"""
+    parts = urlsplit(DetailCache.canonical_url(url))
+    host = parts.netloc.removeprefix('www.')
+    path = parts.path.rstrip('/')
+    return f'{host}{path}?{parts.query}' if parts.query else f'{host}{path}'
+
+
+# Universal hashes (a * x + b) mod a Mersenne prime stand in for the
+# MinHash permutations; the fixed seed keeps signatures stable between processes
+PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)
+
+
+class MinHash:
+    """MinHash signatures bucketed by LSH bands.
+
+    Each title is hashed once into ``BANDS`` buckets; only titles sharing a
+    bucket are compared, so finding near-duplicates is linear in the number
+    of results rather than quadratic. With 2 rows per band, titles whose
+    trigram Jaccard similarity is 0.6 share a bucket with probability ~0.999.
+    """
+
+    BANDS = 16
+    ROWS = 2
+    PERMUTATIONS = [(_rng.randrange(1, PRIME), _rng.randrange(PRIME)) for _ in range(BANDS * ROWS)]
+
+    @staticmethod
+    @functools.lru_cache(maxsize=8192)
+    def gram_hashes(gram):
+        # Food titles share a small trigram vocabulary, so most rows are cache hits
+        h = zlib.crc32(gram.encode('utf-8'))
+        return tuple((a * h + b) % PRIME for a, b in MinHash.PERMUTATIONS)
+
+    @staticmethod
+    def signature(grams):
+        return list(map(min, zip(*map(MinHash.gram_hashes, grams))))
+
+    @staticmethod
+    def band_keys(signature):
+        rows = MinHash.ROWS
+        return [(band, tuple(signature[band * rows:(band + 1) * rows])) for band in range(MinHash.BANDS)]
+
+
+class ResultMerger:
+    """Merge local and web search results into one ranked, deduplicated list.
+
+    Web results pointing at the same page (after URL normalization) are
+    collapsed first. Near-duplicate titles across all results are then
+    grouped with MinHash, confirmed by the exact trigram Jaccard similarity.
+    Each group's web copies are shown once, folded into its best local
+    recipe or else its best scoring web result; their sources are listed
+    on it as ``also_on`` and add a little to its score.
+    """
+
+    SIMILARITY = 0.6
+    # Relevance weights
+    TITLE_WEIGHT = 3.0
+    TEXT_WEIGHT = 1.0
+    PHRASE_BONUS = 1.0
+    RATING_WEIGHT = 0.5
+    LIKES_WEIGHT = 0.1
+    LOCAL_BONUS = 0.25
+    SOURCE_BONUS = 0.1
+
+    @staticmethod
+    def local_result(recipe):
+        return {
+            'kind': 'local', 'recipe': recipe, 'title': recipe.title,
+            # The category counts like the title: a category page's query is its name
+            'labels': recipe.category.name if recipe.category_id else '',
+            'text': f'{recipe.description} {recipe.ingredients}',
+            'source': 'local', 'sources': ['local'], 'url': None,
+        }
+
+    @staticmethod
+    def web_result(recipe):
+        source = recipe.get('source') or ''
+        return {
+            'kind': 'web', 'recipe': recipe, 'title': recipe.get('title', ''),
+            'text': recipe.get('description') or '', 'source': source, 'sources': [source],
+            'url': recipe.get('url') or '',
+        }
+
+    @staticmethod
+    def matches(query_words, words):
+        """Fraction of query words found in words (prefix match, like the FTS search)"""
+        if not query_words:
+            return 0.0
+        found = sum(1 for q in query_words if any(word.startswith(q) for word in words))
+        return found / len(query_words)
+
+    @staticmethod
+    def score(query_words, result):
+        labelled = tokens(result['title']) + tokens(result.get('labels'))
+        score = ResultMerger.TITLE_WEIGHT * ResultMerger.matches(query_words, labelled)
+        score += ResultMerger.TEXT_WEIGHT * ResultMerger.matches(query_words, tokens(result['text']))
+        if query_words and ' '.join(query_words) in ' '.join(labelled):
+            score += ResultMerger.PHRASE_BONUS
+        recipe = result['recipe']
+        if result['kind'] == 'local':
+            score += ResultMerger.LOCAL_BONUS + ResultMerger.LIKES_WEIGHT * math.log1p(recipe.like_count)
+        else:
+            try:
+                score += ResultMerger.RATING_WEIGHT * min(float(recipe.get('rating') or 0), 5) / 5
+            except (TypeError, ValueError):
+                pass
+        return score
+
+    @staticmethod
+    def near_duplicate_groups(results):
+        """Union-find over results whose titles are near-duplicates; returns each result's group root"""
+        parent = list(range(len(results)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        grams = [shingles(result['title']) for result in results]
+        buckets = defaultdict(list)
+        for i, result_grams in enumerate(grams):
+            if not result_grams:
+                continue
+            for key in MinHash.band_keys(MinHash.signature(result_grams)):
+                buckets[key].append(i)
+
+        # Members of a bucket are compared in a chain, not pairwise; true
+        # duplicates share most of their buckets, so the chains still meet
+        for members in buckets.values():
+            for previous, current in zip(members, members[1:]):
+                root, other_root = find(previous), find(current)
+                if root == other_root:
+                    continue
+                similarity = len(grams[previous] & grams[current]) / len(grams[previous] | grams[current])
+                if similarity >= ResultMerger.SIMILARITY:
+                    parent[other_root] = root
+        return [find(i) for i in range(len(results))]
+
+    @staticmethod
+    def without_local(local_titles, web):
+        """The web recipes whose titles are not near-duplicates of any local title.
+
+        Lets code that only has the titles of the local matches (a
+        background search job) drop the web copies of recipes already shown.
+        """
+        local_titles = list(local_titles)
+        results = [{'title': title} for title in local_titles] + [{'title': recipe.get('title', '')} for recipe in web]
+        roots = ResultMerger.near_duplicate_groups(results)
+        local_roots = set(roots[:len(local_titles)])
+        return [recipe for recipe, root in zip(web, roots[len(local_titles):]) if root not in local_roots]
+
+    @staticmethod
+    def merge(query, local=(), web=(), web_limit=None):
+        """One list of result dicts, best first.
+
+        Each result has ``kind`` ('local' or 'web'), ``recipe`` (the Recipe
+        or the scraped dict), ``score`` and ``also_on`` (sources of the
+        duplicates it stands for). Ties keep the input order: local
+        recipes as given, then web results in source priority order.
+        web_limit caps how many web results are kept.
+        """
+        results = [ResultMerger.local_result(recipe) for recipe in local]
+        same_page = {}
+        for recipe in web:
+            result = ResultMerger.web_result(recipe)
+            if not result['url']:
+                continue
+            key = url_key(result['url'])
+            if key in same_page:
+                same_page[key]['sources'].append(result['source'])
+                continue
+            same_page[key] = result
+            results.append(result)
+
+        query_words = tokens(query)
+        for order, result in enumerate(results):
+            result['order'] = order
+            result['score'] = ResultMerger.score(query_words, result)
+
+        groups = defaultdict(list)
+        for result, root in zip(results, ResultMerger.near_duplicate_groups(results)):
+            groups[root].append(result)
+
+        merged = []
+        for members in groups.values():
+            # Local recipes are never hidden, even when two look alike; web
+            # copies fold into the best local one, or else into the best web one
+            local_members = [member for member in members if member['kind'] == 'local']
+            kept = local_members or [max(members, key=lambda r: (r['score'], -r['order']))]
+            best = max(kept, key=lambda r: (r['score'], -r['order']))
+            for result in kept:
+                also_on = []
+                if result is best:
+                    for member in members:
+                        if member['kind'] == 'local' and member is not best:
+                            continue
+                        for source in member['sources']:
+                            if source != best['source'] and source not in also_on:
+                                also_on.append(source)
+                merged.append({
+                    'kind': result['kind'],
+                    'recipe': result['recipe'],
+                    'score': round(result['score'] + ResultMerger.SOURCE_BONUS * len(also_on), 4),
+                    'also_on': also_on,
+                    'order': result['order'],
+                })
+
+        merged.sort(key=lambda r: (-r['score'], r['order']))
+        kept, web_kept = [], 0
+        for result in merged:
+            del result['order']
+            if result['kind'] == 'web':
+                web_kept += 1
+                if web_limit is not None and web_kept > web_limit:
+                    continue
+            kept.append(result)
+        return kept
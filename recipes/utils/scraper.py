@@ -1,10 +1,21 @@
-import requests
-from bs4 import BeautifulSoup
 import json
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from urllib.parse import quote
 
+from django.conf import settings
+
+from .cache import DetailCache, SearchCache
+from .health import SourceHealth
+from .http import SessionPool
+from .parsing import HtmlParser, JsonLdScanner
+
+# Shared by every request so concurrent searches can't spawn unbounded threads
+_executor = None
+_executor_lock = threading.Lock()
+
 class RecipeScraper:
     """Recipe scraping utility"""
 
@@ -19,12 +30,73 @@ class RecipeScraper:
     }
 
     @staticmethod
-    def search_recipes(query):
-        """Search recipes from multiple sources"""
+    def search_recipes(query, deadline=None, use_cache=True):
+        """Search recipes from multiple sources, served from SearchCache when possible"""
+        if not use_cache:
+            return RecipeScraper.search_all_sources(query, deadline)[0]
+        return SearchCache.get_or_search(
+            query, lambda q: RecipeScraper.search_all_sources(q, deadline)
+        )
+
+    @staticmethod
+    def search_all_sources(query, deadline=None):
+        """Search recipes from multiple sources concurrently.
+
+        All sources are queried at once on a shared, bounded thread pool.
+        Whatever has come back when ``deadline`` seconds have passed is
+        returned in source priority order; sources still running are
+        abandoned and their queued work is cancelled. Returns (results,
+        complete); complete is False when a source missed the deadline or
+        could not be searched.
+        """
         results = []
         print(f"Searching for: {query}")
 
-        sources = [
+        if deadline is None:
+            deadline = getattr(settings, 'SCRAPER_SEARCH_DEADLINE', 12)
+
+        sources = RecipeScraper.get_sources()
+        executor = RecipeScraper.get_executor()
+        futures = {
+            executor.submit(source_func, query): index
+            for index, (source_name, source_func) in enumerate(sources)
+        }
+
+        done, pending = wait(futures, timeout=deadline)
+        for future in pending:
+            future.cancel()
+
+        complete = not pending
+        by_priority = {}
+        for future in done:
+            index = futures[future]
+            source_name = sources[index][0]
+            try:
+                recipes = future.result()
+            except Exception as e:
+                print(f"⚠️ Error with {source_name}: {e}")
+                recipes = None
+            if recipes is None:
+                complete = False
+            elif recipes:
+                print(f"✅ Found {len(recipes)} from {source_name}")
+                by_priority[index] = recipes
+            else:
+                print(f"❌ No recipes from {source_name}")
+
+        for future in pending:
+            print(f"⏱️ {sources[futures[future]][0]} missed the {deadline}s deadline")
+
+        for index in sorted(by_priority):
+            results.extend(by_priority[index])
+
+        print(f"📊 Total recipes found: {len(results)}")
+        return results, complete
+
+    @staticmethod
+    def get_sources():
+        """Return (name, scraper) pairs in priority order"""
+        return [
             ('RecipeTin Eats', RecipeScraper.scrape_recipetineats),
             ('Simply Recipes', RecipeScraper.scrape_simplyrecipes),
             ('BBC Good Food', RecipeScraper.scrape_bbcgoodfood),
@@ -33,334 +105,445 @@ class RecipeScraper:
             ('Food Network', RecipeScraper.scrape_foodnetwork)
         ]
 
-        for source_name, source_func in sources:
-            try:
-                print(f"Trying {source_name}...")
-                recipes = source_func(query)
-                if recipes:
-                    print(f"✅ Found {len(recipes)} from {source_name}")
-                    results.extend(recipes)
-                else:
-                    print(f"❌ No recipes from {source_name}")
-            except Exception as e:
-                print(f"⚠️ Error with {source_name}: {e}")
-            time.sleep(1)
+    @staticmethod
+    def get_executor():
+        """Return the process-wide thread pool used for source fan-out"""
+        global _executor
+        if _executor is None:
+            with _executor_lock:
+                if _executor is None:
+                    _executor = ThreadPoolExecutor(
+                        max_workers=getattr(settings, 'SCRAPER_MAX_WORKERS', 12),
+                        thread_name_prefix='recipe-scraper',
+                    )
+        return _executor
+
+    # Search page for each source; {} is the quoted query
+    SEARCH_URLS = {
+        'RecipeTin Eats': 'https://www.recipetineats.com/?s={}',
+        'Simply Recipes': 'https://www.simplyrecipes.com/search?q={}',
+        'BBC Good Food': 'https://www.bbcgoodfood.com/search?q={}',
+        'Tasty': 'https://tasty.co/search?q={}',
+        'Allrecipes': 'https://www.allrecipes.com/search?q={}',
+        'Food Network': 'https://www.foodnetwork.com/search/{}-',
+    }
 
-        print(f"📊 Total recipes found: {len(results)}")
-        return results
+    # Allrecipes blocks us without more browser-like headers
+    ALLRECIPES_HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.5',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'none',
+        'Sec-Fetch-User': '?1',
+        'Cache-Control': 'max-age=0'
+    }
 
-    @staticmethod
-    def scrape_recipetineats(query):
-        """Scrape from RecipeTin Eats (very reliable)"""
-        recipes = []
-        try:
-            url = f"https://www.recipetineats.com/?s={quote(query)}"
-            response = requests.get(url, headers=RecipeScraper.HEADERS, timeout=10)
+    # Food Network: rotate user agents until one gets through
+    FOODNETWORK_HEADERS = [
+        {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'},
+        {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'},
+        {'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36'}
+    ]
 
-            if response.status_code != 200:
-                return recipes
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Find recipe posts
-            articles = soup.find_all('article', class_='post')[:5]
-
-            for article in articles:
-                try:
-                    title_elem = article.find('h2', class_='entry-title')
-                    link_elem = title_elem.find('a') if title_elem else None
-                    img_elem = article.find('img', class_='wp-post-image')
-
-                    if title_elem and link_elem:
-                        recipe = {
-                            'title': title_elem.text.strip(),
-                            'url': link_elem['href'],
-                            'image': img_elem.get('src') if img_elem else None,
-                            'source': 'RecipeTin Eats',
-                            'description': 'Trusted recipes from RecipeTin Eats'
-                        }
-                        recipes.append(recipe)
-                except:
-                    continue
+    @staticmethod
+    def search_url(source_name, query):
+        return RecipeScraper.SEARCH_URLS[source_name].format(quote(query))
 
-        except Exception as e:
-            print(f"RecipeTin Eats error: {e}")
+    @staticmethod
+    def search_headers(source_name):
+        """Header sets to try, in order, for a source's search page"""
+        if source_name == 'Allrecipes':
+            return [RecipeScraper.ALLRECIPES_HEADERS]
+        if source_name == 'Food Network':
+            return RecipeScraper.FOODNETWORK_HEADERS
+        return [RecipeScraper.HEADERS]
 
-        return recipes
+    @staticmethod
+    def fetch_search_page(source_name, query):
+        """Return the search page as (bytes, encoding), or None if every attempt failed.
+
+        All attempts share one timeout adapted from the source's recent
+        latency. The fetch as a whole is recorded once in SourceHealth, so
+        header retries within it count as a single success or failure.
+        """
+        url = RecipeScraper.search_url(source_name, query)
+        header_sets = RecipeScraper.search_headers(source_name)
+        timeout = SourceHealth.timeout(source_name)
+        started = time.monotonic()
+        page = error = None
+        for attempt, headers in enumerate(header_sets, 1):
+            remaining = timeout - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            try:
+                response = SessionPool.get(url, headers=headers, timeout=remaining, stream=True)
+                if response.status_code == 200:
+                    page = HtmlParser.read_response(response)
+                    break
+            except Exception as e:
+                if attempt == len(header_sets):
+                    error = e
+                continue
+            response.close()
+        SourceHealth.record(source_name, page is not None, time.monotonic() - started)
+        if error is not None:
+            raise error
+        return page
 
     @staticmethod
-    def scrape_simplyrecipes(query):
-        """Scrape from Simply Recipes"""
-        recipes = []
+    def scrape_source(source_name, query):
+        """Fetch and parse one source's search results.
+
+        Returns None when the source could not be searched (circuit open,
+        fetch failed or parsing raised), so callers can tell a failure
+        from a search that found nothing.
+        """
+        if not SourceHealth.allow(source_name):
+            print(f"🔌 Skipping {source_name}: circuit open")
+            return None
         try:
-            url = f"https://www.simplyrecipes.com/search?q={quote(query)}"
-            response = requests.get(url, headers=RecipeScraper.HEADERS, timeout=10)
+            page = RecipeScraper.fetch_search_page(source_name, query)
+            if page is None:
+                return None
+            return RecipeScraper.parse_search_page(source_name, *page)
+        except Exception as e:
+            print(f"{source_name} error: {e}")
+            return None
 
-            if response.status_code != 200:
-                return recipes
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Find recipe cards
-            cards = soup.find_all('a', class_='card')[:5]
-
-            for card in cards:
-                try:
-                    title_elem = card.find('h3', class_='card__title')
-                    img_elem = card.find('img', class_='card__img')
-
-                    if title_elem:
-                        recipe = {
-                            'title': title_elem.text.strip(),
-                            'url': card['href'] if card.has_attr('href') else '#',
-                            'image': img_elem.get('src') if img_elem else None,
-                            'source': 'Simply Recipes',
-                            'description': 'Classic and trusted recipes'
-                        }
-                        recipes.append(recipe)
-                except:
-                    continue
+    @staticmethod
+    def parse_search_page(source_name, html, encoding=None):
+        """Parse a search page; only the source's result cards are built into the tree"""
+        parsers = {
+            'RecipeTin Eats': RecipeScraper.parse_recipetineats,
+            'Simply Recipes': RecipeScraper.parse_simplyrecipes,
+            'BBC Good Food': RecipeScraper.parse_bbcgoodfood,
+            'Tasty': RecipeScraper.parse_tasty,
+            'Allrecipes': RecipeScraper.parse_allrecipes,
+            'Food Network': RecipeScraper.parse_foodnetwork,
+        }
+        soup = HtmlParser.make_soup(html, HtmlParser.SEARCH_STRAINERS[source_name], encoding)
+        return parsers[source_name](soup)
 
-        except Exception as e:
-            print(f"Simply Recipes error: {e}")
+    @staticmethod
+    def scrape_recipetineats(query):
+        """Scrape from RecipeTin Eats (very reliable)"""
+        return RecipeScraper.scrape_source('RecipeTin Eats', query)
 
-        return recipes
+    @staticmethod
+    def scrape_simplyrecipes(query):
+        """Scrape from Simply Recipes"""
+        return RecipeScraper.scrape_source('Simply Recipes', query)
 
     @staticmethod
     def scrape_bbcgoodfood(query):
         """Scrape from BBC Good Food"""
-        recipes = []
-        try:
-            url = f"https://www.bbcgoodfood.com/search?q={quote(query)}"
-            response = requests.get(url, headers=RecipeScraper.HEADERS, timeout=10)
+        return RecipeScraper.scrape_source('BBC Good Food', query)
 
-            if response.status_code != 200:
-                return recipes
+    @staticmethod
+    def scrape_tasty(query):
+        """Scrape from Tasty"""
+        return RecipeScraper.scrape_source('Tasty', query)
 
-            soup = BeautifulSoup(response.text, 'html.parser')
+    @staticmethod
+    def scrape_allrecipes(query):
+        """Scrape from Allrecipes with better headers"""
+        return RecipeScraper.scrape_source('Allrecipes', query)
 
-            items = soup.find_all('article', class_='card')[:5]
+    @staticmethod
+    def scrape_foodnetwork(query):
+        """Scrape from Food Network"""
+        return RecipeScraper.scrape_source('Food Network', query)
 
-            for item in items:
-                try:
-                    title_elem = item.find('h2', class_='heading-4')
-                    link_elem = item.find('a', href=True)
-                    img_elem = item.find('img', class_='image')
-
-                    if title_elem and link_elem:
-                        link = link_elem['href']
-                        if not link.startswith('http'):
-                            link = 'https://www.bbcgoodfood.com' + link
-
-                        recipe = {
-                            'title': title_elem.text.strip(),
-                            'url': link,
-                            'image': img_elem.get('src') if img_elem else None,
-                            'source': 'BBC Good Food',
-                            'description': 'Recipes from BBC Good Food'
-                        }
-                        recipes.append(recipe)
-                except:
-                    continue
+    @staticmethod
+    def parse_recipetineats(soup):
+        recipes = []
 
-        except Exception as e:
-            print(f"BBC Good Food error: {e}")
+        # Find recipe posts
+        articles = soup.find_all('article', class_='post')[:5]
+
+        for article in articles:
+            try:
+                title_elem = article.find('h2', class_='entry-title')
+                link_elem = title_elem.find('a') if title_elem else None
+                img_elem = article.find('img', class_='wp-post-image')
+
+                if title_elem and link_elem:
+                    recipe = {
+                        'title': title_elem.text.strip(),
+                        'url': link_elem['href'],
+                        'image': img_elem.get('src') if img_elem else None,
+                        'source': 'RecipeTin Eats',
+                        'description': 'Trusted recipes from RecipeTin Eats'
+                    }
+                    recipes.append(recipe)
+            except:
+                continue
 
         return recipes
 
     @staticmethod
-    def scrape_tasty(query):
-        """Scrape from Tasty"""
+    def parse_simplyrecipes(soup):
         recipes = []
-        try:
-            url = f"https://tasty.co/search?q={quote(query)}"
-            response = requests.get(url, headers=RecipeScraper.HEADERS, timeout=10)
-
-            if response.status_code != 200:
-                return recipes
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            items = soup.find_all('div', class_='search-result')[:5]
 
-            for item in items:
-                try:
-                    title_elem = item.find('span', class_='result-name')
-                    link_elem = item.find('a', href=True)
-                    img_elem = item.find('img', class_='photo')
-
-                    if title_elem and link_elem:
-                        link = link_elem['href']
-                        if not link.startswith('http'):
-                            link = 'https://tasty.co' + link
-
-                        recipe = {
-                            'title': title_elem.text.strip(),
-                            'url': link,
-                            'image': img_elem.get('src') if img_elem else None,
-                            'source': 'Tasty',
-                            'description': 'Viral recipes from Tasty'
-                        }
-                        recipes.append(recipe)
-                except:
-                    continue
+        # Find recipe cards
+        cards = soup.find_all('a', class_='card')[:5]
 
-        except Exception as e:
-            print(f"Tasty error: {e}")
+        for card in cards:
+            try:
+                title_elem = card.find('h3', class_='card__title')
+                img_elem = card.find('img', class_='card__img')
+
+                if title_elem:
+                    recipe = {
+                        'title': title_elem.text.strip(),
+                        'url': card['href'] if card.has_attr('href') else '#',
+                        'image': img_elem.get('src') if img_elem else None,
+                        'source': 'Simply Recipes',
+                        'description': 'Classic and trusted recipes'
+                    }
+                    recipes.append(recipe)
+            except:
+                continue
 
         return recipes
 
     @staticmethod
-    def scrape_allrecipes(query):
-        """Scrape from Allrecipes with better headers"""
+    def parse_bbcgoodfood(soup):
         recipes = []
-        try:
-            url = f"https://www.allrecipes.com/search?q={quote(query)}"
-
-            # Use more browser-like headers
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Sec-Fetch-User': '?1',
-                'Cache-Control': 'max-age=0'
-            }
-
-            response = requests.get(url, headers=headers, timeout=10)
-
-            if response.status_code != 200:
-                return recipes
-
-            soup = BeautifulSoup(response.text, 'html.parser')
 
-            # Try multiple selectors
-            cards = soup.find_all(['div', 'article'], class_=re.compile(r'(card|recipe|search-result)', re.I))[:5]
+        items = soup.find_all('article', class_='card')[:5]
 
-            for card in cards:
-                try:
-                    title_elem = card.find(['h2', 'h3', 'h4'])
-                    link_elem = card.find('a', href=True)
-                    img_elem = card.find('img', src=True)
+        for item in items:
+            try:
+                title_elem = item.find('h2', class_='heading-4')
+                link_elem = item.find('a', href=True)
+                img_elem = item.find('img', class_='image')
+
+                if title_elem and link_elem:
+                    link = link_elem['href']
+                    if not link.startswith('http'):
+                        link = 'https://www.bbcgoodfood.com' + link
+
+                    recipe = {
+                        'title': title_elem.text.strip(),
+                        'url': link,
+                        'image': img_elem.get('src') if img_elem else None,
+                        'source': 'BBC Good Food',
+                        'description': 'Recipes from BBC Good Food'
+                    }
+                    recipes.append(recipe)
+            except:
+                continue
 
-                    if title_elem and link_elem:
-                        title = title_elem.text.strip()
-                        link = link_elem['href']
+        return recipes
 
-                        if not link.startswith('http'):
-                            link = 'https://www.allrecipes.com' + link
+    @staticmethod
+    def parse_tasty(soup):
+        recipes = []
 
-                        recipe = {
-                            'title': title,
-                            'url': link,
-                            'image': img_elem.get('src') if img_elem else None,
-                            'source': 'Allrecipes',
-                            'description': 'Recipes from Allrecipes'
-                        }
-                        recipes.append(recipe)
-                except:
-                    continue
+        items = soup.find_all('div', class_='search-result')[:5]
 
-        except Exception as e:
-            print(f"Allrecipes error: {e}")
+        for item in items:
+            try:
+                title_elem = item.find('span', class_='result-name')
+                link_elem = item.find('a', href=True)
+                img_elem = item.find('img', class_='photo')
+
+                if title_elem and link_elem:
+                    link = link_elem['href']
+                    if not link.startswith('http'):
+                        link = 'https://tasty.co' + link
+
+                    recipe = {
+                        'title': title_elem.text.strip(),
+                        'url': link,
+                        'image': img_elem.get('src') if img_elem else None,
+                        'source': 'Tasty',
+                        'description': 'Viral recipes from Tasty'
+                    }
+                    recipes.append(recipe)
+            except:
+                continue
 
         return recipes
 
     @staticmethod
-    def scrape_foodnetwork(query):
-        """Scrape from Food Network"""
+    def parse_allrecipes(soup):
         recipes = []
-        try:
-            url = f"https://www.foodnetwork.com/search/{quote(query)}-"
-
-            # Rotate user agents
-            user_agents = [
-                {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'},
-                {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'},
-                {'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36'}
-            ]
 
-            response = None
-            for headers in user_agents:
-                try:
-                    response = requests.get(url, headers=headers, timeout=10)
-                    if response.status_code == 200:
-                        break
-                except:
-                    continue
+        # Try multiple selectors
+        cards = soup.find_all(['div', 'article'], class_=re.compile(r'(card|recipe|search-result)', re.I))[:5]
 
-            if not response or response.status_code != 200:
-                return recipes
+        for card in cards:
+            try:
+                title_elem = card.find(['h2', 'h3', 'h4'])
+                link_elem = card.find('a', href=True)
+                img_elem = card.find('img', src=True)
+
+                if title_elem and link_elem:
+                    title = title_elem.text.strip()
+                    link = link_elem['href']
+
+                    if not link.startswith('http'):
+                        link = 'https://www.allrecipes.com' + link
+
+                    recipe = {
+                        'title': title,
+                        'url': link,
+                        'image': img_elem.get('src') if img_elem else None,
+                        'source': 'Allrecipes',
+                        'description': 'Recipes from Allrecipes'
+                    }
+                    recipes.append(recipe)
+            except:
+                continue
 
-            soup = BeautifulSoup(response.text, 'html.parser')
+        return recipes
 
-            # Try multiple selectors
-            items = soup.find_all(['div', 'article'], class_=re.compile(r'(MediaBlock|card|result)', re.I))[:5]
+    @staticmethod
+    def parse_foodnetwork(soup):
+        recipes = []
 
-            for item in items:
-                try:
-                    title_elem = item.find(['h2', 'h3', 'h4'])
-                    link_elem = item.find('a', href=True)
-                    img_elem = item.find('img', src=True)
-
-                    if title_elem and link_elem:
-                        title = title_elem.text.strip()
-                        link = link_elem['href']
-
-                        if not link.startswith('http'):
-                            link = 'https://www.foodnetwork.com' + link
-
-                        recipe = {
-                            'title': title,
-                            'url': link,
-                            'image': img_elem.get('src') if img_elem else None,
-                            'source': 'Food Network',
-                            'description': 'Recipes from Food Network'
-                        }
-                        recipes.append(recipe)
-                except:
-                    continue
+        # Try multiple selectors
+        items = soup.find_all(['div', 'article'], class_=re.compile(r'(MediaBlock|card|result)', re.I))[:5]
 
-        except Exception as e:
-            print(f"Food Network error: {e}")
+        for item in items:
+            try:
+                title_elem = item.find(['h2', 'h3', 'h4'])
+                link_elem = item.find('a', href=True)
+                img_elem = item.find('img', src=True)
+
+                if title_elem and link_elem:
+                    title = title_elem.text.strip()
+                    link = link_elem['href']
+
+                    if not link.startswith('http'):
+                        link = 'https://www.foodnetwork.com' + link
+
+                    recipe = {
+                        'title': title,
+                        'url': link,
+                        'image': img_elem.get('src') if img_elem else None,
+                        'source': 'Food Network',
+                        'description': 'Recipes from Food Network'
+                    }
+                    recipes.append(recipe)
+            except:
+                continue
 
         return recipes
 
     @staticmethod
     def get_recipe_details(url):
-        """Get detailed recipe from a URL"""
+        """Get detailed recipe from a URL.
+
+        Parsed recipes are cached per canonical URL. Once an entry is older
+        than the freshness window it is revalidated with the origin's
+        validators, and a 304 reuses the cached recipe without re-parsing.
+        """
         if not url:
             return None
 
+        canonical = DetailCache.canonical_url(url)
+        entry = DetailCache.get(canonical)
+        if entry and DetailCache.is_fresh(entry):
+            return entry['recipe']
+        if not entry:
+            fallback = DetailCache.get_fallback(canonical)
+            if fallback:
+                return fallback
+
         try:
             headers = RecipeScraper.HEADERS.copy()
-            response = requests.get(url, headers=headers, timeout=10)
+            if entry:
+                headers.update(DetailCache.conditional_headers(entry))
+            response = SessionPool.get(url, headers=headers, timeout=10, stream=True)
 
-            if response.status_code != 200:
-                return RecipeScraper.get_fallback_recipe(url)
+            if response.status_code == 304 and entry:
+                response.close()
+                DetailCache.revalidated(canonical, entry, response.headers)
+                return entry['recipe']
 
-            soup = BeautifulSoup(response.text, 'html.parser')
+            if response.status_code != 200:
+                response.close()
+                return RecipeScraper.stale_or_fallback(canonical, url, entry)
 
-            # Try schema.org first
-            recipe = RecipeScraper.extract_schema_recipe(soup)
+            try:
+                recipe = RecipeScraper.parse_recipe_stream(
+                    response.iter_content(64 * 1024),
+                    HtmlParser.declared_encoding(response.headers.get('Content-Type')),
+                )
+            finally:
+                response.close()
 
-            if not recipe:
-                recipe = RecipeScraper.extract_html_recipe(soup)
+            if entry and recipe and not (recipe.get('ingredients') or recipe.get('instructions')):
+                # The page stopped parsing; keep the recipe we already have
+                recipe = None
 
             if recipe:
                 recipe['source_url'] = url
+                DetailCache.set(
+                    canonical, recipe,
+                    response.headers.get('ETag'), response.headers.get('Last-Modified')
+                )
                 return recipe
 
-            return RecipeScraper.get_fallback_recipe(url)
+            return RecipeScraper.stale_or_fallback(canonical, url, entry)
 
         except Exception as e:
             print(f"Error fetching recipe details: {e}")
-            return RecipeScraper.get_fallback_recipe(url)
+            return RecipeScraper.stale_or_fallback(canonical, url, entry)
+
+    @staticmethod
+    def parse_recipe_page(html, encoding=None):
+        """Extract a recipe dict from a recipe page's HTML (str or bytes)"""
+        if isinstance(html, str):
+            html, encoding = html.encode('utf-8'), 'utf-8'
+        return RecipeScraper.parse_recipe_stream([html], encoding)
+
+    @staticmethod
+    def parse_recipe_stream(chunks, encoding=None):
+        """Extract a recipe dict from a page arriving as byte chunks.
+
+        schema.org JSON-LD is read straight off the byte stream and reading
+        stops at the first Recipe object, without building a DOM. Only
+        pages without one are parsed with BeautifulSoup.
+        """
+        scanner = JsonLdScanner()
+        for chunk in chunks:
+            for block in scanner.feed(chunk):
+                recipe = RecipeScraper.schema_recipe_from_json(block, encoding)
+                if recipe:
+                    return recipe
+            if scanner.full:
+                break
+
+        soup = HtmlParser.make_soup(bytes(scanner.body), encoding=encoding)
+        return RecipeScraper.extract_html_recipe(soup)
+
+    @staticmethod
+    def stale_or_fallback(canonical, url, entry):
+        """What to serve when the origin could not refresh url.
+
+        A stale cached recipe beats a placeholder, so it is served (and the
+        origin retried later); only a URL never parsed gets the fallback.
+        """
+        if entry:
+            DetailCache.retry_later(canonical, entry)
+            return entry['recipe']
+        return RecipeScraper.cache_fallback_recipe(canonical, url)
+
+    @staticmethod
+    def cache_fallback_recipe(canonical, url):
+        """Build the fallback recipe for url and cache it briefly"""
+        recipe = RecipeScraper.get_fallback_recipe(url)
+        DetailCache.set_fallback(canonical, recipe)
+        return recipe
 
     @staticmethod
     def extract_schema_recipe(soup):
@@ -369,18 +552,30 @@ class RecipeScraper:
             scripts = soup.find_all('script', type='application/ld+json')
 
             for script in scripts:
-                try:
-                    data = json.loads(script.string)
-
-                    if isinstance(data, list):
-                        for item in data:
-                            if isinstance(item, dict) and 'Recipe' in str(item.get('@type', '')):
-                                return RecipeScraper.parse_schema_item(item)
-                    elif isinstance(data, dict):
-                        if 'Recipe' in str(data.get('@type', '')):
-                            return RecipeScraper.parse_schema_item(data)
-                except:
-                    continue
+                recipe = RecipeScraper.schema_recipe_from_json(script.string)
+                if recipe:
+                    return recipe
+        except:
+            pass
+        return None
+
+    @staticmethod
+    def schema_recipe_from_json(text, encoding=None):
+        """Parse one JSON-LD block; returns the recipe if it holds a Recipe"""
+        try:
+            if isinstance(text, bytes):
+                text = text.decode(encoding or 'utf-8', 'replace')
+            data = json.loads(text)
+
+            items = data if isinstance(data, list) else [data]
+            # WordPress SEO plugins wrap every entity of the page in an @graph
+            items = [
+                entity for item in items if isinstance(item, dict)
+                for entity in [item, *(item.get('@graph') if isinstance(item.get('@graph'), list) else [])]
+            ]
+            for item in items:
+                if isinstance(item, dict) and 'Recipe' in str(item.get('@type', '')):
+                    return RecipeScraper.parse_schema_item(item)
         except:
             pass
         return None
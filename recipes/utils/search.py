@@ -0,0 +1,138 @@
+import re
+
+from django.db import DatabaseError, connection, connections
+from django.db.models import Case, IntegerField, Q, When
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'recipes_recipe_fts'
+# Keep the external-content index in step with recipes_recipe. SQLite drops
+# these whenever a migration rebuilds the table (e.g. adding a NOT NULL
+# column), so such migrations must call RecipeSearch.install_triggers().
+FTS_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON recipes_recipe BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description, ingredients)
+        VALUES (new.id, new.title, new.description, new.ingredients);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON recipes_recipe BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, ingredients)
+        VALUES ('delete', old.id, old.title, old.description, old.ingredients);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description, ingredients
+    ON recipes_recipe BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, ingredients)
+        VALUES ('delete', old.id, old.title, old.description, old.ingredients);
+        INSERT INTO {FTS_TABLE}(rowid, title, description, ingredients)
+        VALUES (new.id, new.title, new.description, new.ingredients);
+    END
+    """,
+]
+
+
+class RecipeSearch:
+    """Full-text search over local recipes using the SQLite FTS5 index.
+
+    Falls back to the ``icontains`` filters on databases without the index.
+    """
+
+    # bm25 column weights: title, description, ingredients
+    WEIGHTS = (10.0, 2.0, 5.0)
+    LIMIT = 200
+
+    @staticmethod
+    def is_available():
+        return connection.vendor == 'sqlite'
+
+    @staticmethod
+    def build_match(query):
+        """Turn free text into an FTS5 query: every word, prefix-matched"""
+        words = re.findall(r'\w+', query or '')
+        return ' '.join(f'"{word}"*' for word in words)
+
+    @staticmethod
+    def match_sql():
+        return f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+
+    @staticmethod
+    def ranked_ids(query, limit=None):
+        """Return recipe ids best match first"""
+        match = RecipeSearch.build_match(query)
+        if not match:
+            return []
+        weights = ', '.join(str(weight) for weight in RecipeSearch.WEIGHTS)
+        sql = (
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [match, limit or RecipeSearch.LIMIT])
+            return [row[0] for row in cursor.fetchall()]
+
+    @staticmethod
+    def search(queryset, query, limit=None):
+        """Filter queryset to recipes matching query, ordered by BM25 rank"""
+        if not RecipeSearch.is_available():
+            return RecipeSearch.search_like(queryset, query)
+        try:
+            ids = RecipeSearch.ranked_ids(query, limit)
+        except DatabaseError as e:
+            print(f"FTS search unavailable, falling back to LIKE: {e}")
+            return RecipeSearch.search_like(queryset, query)
+        if not ids:
+            return queryset.none()
+        rank = Case(
+            *[When(pk=pk, then=position) for position, pk in enumerate(ids)],
+            output_field=IntegerField(),
+        )
+        return queryset.filter(pk__in=ids).order_by(rank)
+
+    @staticmethod
+    def filter(queryset, query):
+        """Filter queryset to matching recipes without changing its ordering"""
+        match = RecipeSearch.build_match(query)
+        if not match:
+            return queryset.none()
+        if not RecipeSearch.is_available():
+            return RecipeSearch.search_like(queryset, query)
+        return queryset.filter(pk__in=RawSQL(RecipeSearch.match_sql(), [match]))
+
+    @staticmethod
+    def search_like(queryset, query):
+        return queryset.filter(
+            Q(title__icontains=query) |
+            Q(description__icontains=query) |
+            Q(ingredients__icontains=query)
+        ).distinct()
+
+    @staticmethod
+    def install_triggers(using=None):
+        """(Re)create the sync triggers if a table rebuild dropped them"""
+        conn = connections[using] if using else connection
+        with conn.cursor() as cursor:
+            for sql in FTS_TRIGGERS:
+                cursor.execute(sql)
+
+    @staticmethod
+    def restore_after_rebuild(apps, schema_editor):
+        """RunPython step for migrations that rebuild recipes_recipe.
+
+        SQLite remakes the table for changes such as adding a NOT NULL
+        column, dropping its triggers; reinstall them and repopulate the
+        index so it never misses rows written meanwhile.
+        """
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        RecipeSearch.install_triggers(schema_editor.connection.alias)
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+    @staticmethod
+    def rebuild():
+        """Recreate missing triggers and repopulate the index from the recipes table"""
+        RecipeSearch.install_triggers()
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
@@ -0,0 +1,58 @@
+from django.conf import settings
+
+# Defaults for SQLITE_PRAGMAS
+PRAGMAS = {
+    # Readers no longer block the writer (or each other)
+    'journal_mode': 'wal',
+    # Safe with WAL: a power cut can lose the last commits but never corrupts
+    'synchronous': 'normal',
+    # Wait this many ms for a lock instead of failing with "database is locked"
+    'busy_timeout': 5000,
+    # Page cache per connection; negative values are KiB
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'memory',
+}
+
+
+class SqliteProfile:
+    """Per-connection tuning for SQLite in production.
+
+    Applied from the connection_created signal when ``SQLITE_PRODUCTION``
+    is on, so with persistent connections (``CONN_MAX_AGE``) the pragmas
+    run once per connection rather than once per request.
+    ``journal_mode`` is a property of the database file and is skipped on
+    read-only connections, which cannot change it.
+    """
+
+    @staticmethod
+    def enabled():
+        return getattr(settings, 'SQLITE_PRODUCTION', False)
+
+    @staticmethod
+    def pragmas():
+        return {**PRAGMAS, **getattr(settings, 'SQLITE_PRAGMAS', {})}
+
+    @staticmethod
+    def is_read_only(connection):
+        return 'mode=ro' in str(connection.settings_dict['NAME'])
+
+    @staticmethod
+    def apply(connection):
+        read_only = SqliteProfile.is_read_only(connection)
+        with connection.cursor() as cursor:
+            for name, value in SqliteProfile.pragmas().items():
+                if name == 'journal_mode' and read_only:
+                    continue
+                cursor.execute(f'PRAGMA {name} = {value}')
+
+    @staticmethod
+    def status(connection):
+        """Current value of every configured pragma on connection"""
+        values = {}
+        with connection.cursor() as cursor:
+            for name in SqliteProfile.pragmas():
+                cursor.execute(f'PRAGMA {name}')
+                row = cursor.fetchone()
+                values[name] = row[0] if row else None
+        return values
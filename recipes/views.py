@@ -1,31 +1,41 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views.decorators.http import require_POST
 from .models import Recipe, Category, Profile
 from .forms import UserRegisterForm, UserUpdateForm, ProfileUpdateForm, RecipeForm
 from .utils.scraper import RecipeScraper
+from .utils.export import RecipeExport
+from .utils.health import SourceHealth
+from .utils.ingredients import IngredientIndex
+from .utils.likes import Likes
+from .utils.jobs import SearchJobs
+from .utils.pagination import KeysetPaginator
+from .utils.ranking import ResultMerger
+from .utils.search import RecipeSearch
 
 def home(request):
     """Home page with featured recipes"""
-    recent_recipes = Recipe.objects.all()[:6]
-    categories = Category.objects.all()
+    recent_recipes = Recipe.objects.select_related('created_by', 'category')[:6]
     context = {
         'recent_recipes': recent_recipes,
-        'categories': categories
     }
     return render(request, 'recipes/home.html', context)
 
 def recipe_list(request):
     """Show all recipes"""
-    recipes = Recipe.objects.all()
+    recipes = Recipe.objects.select_related('created_by', 'category')
     category = request.GET.get('category')
     if category:
         recipes = recipes.filter(category_id=category)
+    page = KeysetPaginator.paginate(recipes, request)
     context = {
-        'recipes': recipes,
-        'categories': Category.objects.all()
+        'recipes': page.object_list,
+        'page': page,
     }
     return render(request, 'recipes/recipe_list.html', context)
 
@@ -82,24 +92,39 @@ def recipe_delete(request, pk):
 
 @login_required
 def like_recipe(request, pk):
-    """Like/unlike recipe"""
-    recipe = get_object_or_404(Recipe, pk=pk)
-    if recipe.likes.filter(id=request.user.id).exists():
-        recipe.likes.remove(request.user)
-        messages.info(request, 'Recipe unliked')
-    else:
-        recipe.likes.add(request.user)
+    """Like/unlike recipe, then back to the recipe (for clients without JavaScript)"""
+    try:
+        liked, _ = Likes.toggle(pk, request.user.id)
+    except Recipe.DoesNotExist:
+        raise Http404('No Recipe matches the given query.')
+    if liked:
         messages.success(request, 'Recipe liked!')
-    return redirect('recipe_detail', pk=recipe.pk)
+    else:
+        messages.info(request, 'Recipe unliked')
+    return redirect('recipe_detail', pk=pk)
+
+@login_required
+@require_POST
+def like_recipe_toggle(request, pk):
+    """Like/unlike recipe in place; returns the new state and count (JSON)"""
+    try:
+        liked, like_count = Likes.toggle(pk, request.user.id)
+    except Recipe.DoesNotExist:
+        return JsonResponse({'error': 'Recipe not found'}, status=404)
+    return JsonResponse({'liked': liked, 'likes': like_count})
 
 @login_required
 def profile(request):
     """User profile page"""
-    user_recipes = Recipe.objects.filter(created_by=request.user)
-    liked_recipes = request.user.liked_recipes.all()
+    user_recipes = Recipe.objects.filter(created_by=request.user).select_related('created_by', 'category')
+    liked_recipes = request.user.liked_recipes.select_related('created_by', 'category')
+    user_page = KeysetPaginator.paginate(user_recipes, request)
+    liked_page = KeysetPaginator.paginate(liked_recipes, request, param='liked_cursor')
     context = {
-        'user_recipes': user_recipes,
-        'liked_recipes': liked_recipes
+        'user_recipes': user_page.object_list,
+        'liked_recipes': liked_page.object_list,
+        'user_page': user_page,
+        'liked_page': liked_page
     }
     return render(request, 'registration/profile.html', context)
 
@@ -144,61 +169,134 @@ def search_recipes(request):
     query = request.GET.get('q', '').strip()
     web_recipes = []
     local_recipes = []
+    search_job = None
 
     if query:
         
-        local_recipes = Recipe.objects.filter(
-            Q(title__icontains=query) |
-            Q(description__icontains=query) |
-            Q(ingredients__icontains=query)
-        ).distinct()
+        local_recipes = RecipeSearch.search(
+            Recipe.objects.select_related('created_by', 'category'), query
+        )
 
         
-        try:
-            scraper = RecipeScraper()
-            web_recipes = scraper.search_recipes(query)
-
-            # Debug information
-            print(f"Search query: '{query}'")
-            print(f"Local recipes found: {len(local_recipes)}")
-            print(f"Web recipes found: {len(web_recipes)}")
-
-        except AttributeError as e:
-            print(f"AttributeError in web search: {e}")
-            # Try alternative methods
+        if request.GET.get('wait'):
+            # Blocking search for clients without JavaScript
             try:
                 scraper = RecipeScraper()
+                web_recipes = scraper.search_recipes(query)
+
+                # Debug information
+                print(f"Search query: '{query}'")
+                print(f"Local recipes found: {len(local_recipes)}")
+                print(f"Web recipes found: {len(web_recipes)}")
+
+            except AttributeError as e:
+                print(f"AttributeError in web search: {e}")
+                # Try alternative methods
+                try:
+                    scraper = RecipeScraper()
+                    web_recipes = []
+
+                    # Try each method individually if they exist
+                    if hasattr(scraper, 'scrape_bbcgoodfood'):
+                        bbc_recipes = scraper.scrape_bbcgoodfood(query) or []
+                        web_recipes.extend(bbc_recipes)
+                        print(f"BBC Good Food: {len(bbc_recipes)} recipes")
+
+                    if hasattr(scraper, 'scrape_tasty'):
+                        tasty_recipes = scraper.scrape_tasty(query) or []
+                        web_recipes.extend(tasty_recipes)
+                        print(f"Tasty: {len(tasty_recipes)} recipes")
+
+                except Exception as alt_error:
+                    print(f"Alternative search error: {alt_error}")
+                    web_recipes = []
+
+            except Exception as e:
+                print(f"Web search error: {e}")
                 web_recipes = []
+        else:
+            # Answer from cache or hand off to a background job the page polls
+            try:
+                search_job, cached = SearchJobs.start(query, [recipe.title for recipe in local_recipes])
+                web_recipes = cached or []
+            except Exception as e:
+                print(f"Could not start web search job: {e}")
 
-                # Try each method individually if they exist
-                if hasattr(scraper, 'scrape_bbcgoodfood'):
-                    bbc_recipes = scraper.scrape_bbcgoodfood(query)
-                    web_recipes.extend(bbc_recipes)
-                    print(f"BBC Good Food: {len(bbc_recipes)} recipes")
-
-                if hasattr(scraper, 'scrape_tasty'):
-                    tasty_recipes = scraper.scrape_tasty(query)
-                    web_recipes.extend(tasty_recipes)
-                    print(f"Tasty: {len(tasty_recipes)} recipes")
-
-            except Exception as alt_error:
-                print(f"Alternative search error: {alt_error}")
-                web_recipes = []
-
-        except Exception as e:
-            print(f"Web search error: {e}")
-            web_recipes = []
-
+    results = ResultMerger.merge(query, local_recipes, web_recipes)
+    total_local = sum(1 for result in results if result['kind'] == 'local')
     context = {
-        'local_recipes': local_recipes,
-        'web_recipes': web_recipes,
+        'results': results,
+        'search_job': search_job,
         'query': query,
-        'total_local': len(local_recipes),
-        'total_web': len(web_recipes),
-        'has_results': len(local_recipes) > 0 or len(web_recipes) > 0
+        'total_local': total_local,
+        'total_web': len(results) - total_local,
+        'has_results': len(results) > 0 or search_job is not None
     }
     return render(request, 'recipes/search_results.html', context)
 
+def search_job_status(request, job_id):
+    """Progress of a background web search (JSON, polled by the search page)"""
+    status = SearchJobs.status(job_id)
+    if status is None:
+        return JsonResponse({'status': 'missing', 'sources': {}, 'pending': []}, status=404)
+    return JsonResponse(status)
+
+@staff_member_required
+def source_health(request):
+    """Circuit breaker state and latency of each web source (staff only)"""
+    sources = SourceHealth.snapshot(RecipeScraper.SEARCH_URLS)
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'sources': sources})
+    return render(request, 'recipes/source_health.html', {'sources': sources})
+
+@staff_member_required
+def export_recipes(request):
+    """Stream every recipe as JSONL or CSV; ?after=<id> resumes an export"""
+    fmt = request.GET.get('format', 'jsonl')
+    if fmt not in RecipeExport.FORMATS:
+        return HttpResponseBadRequest('format must be jsonl or csv')
+    try:
+        after_id = int(request.GET['after']) if request.GET.get('after') else None
+        until_id = int(request.GET['until']) if request.GET.get('until') else None
+    except ValueError:
+        return HttpResponseBadRequest('after and until must be recipe ids')
+
+    response = StreamingHttpResponse(
+        RecipeExport.lines(fmt, after_id=after_id, until_id=until_id),
+        content_type=RecipeExport.FORMATS[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="recipes.{fmt}"'
+    return response
+
+def external_fallback_recipe(url, failed=False):
+    """Placeholder shown when an external recipe can't be extracted"""
+    domain = url.split('/')[2] if '://' in url else 'website'
+    if failed:
+        description = 'Click the button below to view the original recipe on the source website.'
+        ingredients = ['📍 Visit original website for ingredients']
+        instructions = ['📍 Visit original website for instructions']
+    else:
+        description = 'This recipe is from an external website. Click the button below to view the original recipe.'
+        ingredients = ['📍 Please visit the original website for complete ingredients list']
+        instructions = ['📍 Please visit the original website for step-by-step instructions']
+    return {
+        'title': f'Recipe from {domain}',
+        'description': description,
+        'ingredients': ingredients,
+        'instructions': instructions,
+        'image': None,
+        'prep_time': '',
+        'cook_time': '',
+        'total_time': '',
+        'yield': ''
+    }
+
+def clean_external_url(url):
+    return (
+        url.replace('//www.foodnetwork.com//', '//www.foodnetwork.com/')
+        .replace('//www.allrecipes.com//', '//www.allrecipes.com/')
+    )
+
 def recipe_detail_external(request):
     """Show recipe from external URL"""
     url = request.GET.get('url')
@@ -206,54 +304,20 @@ def recipe_detail_external(request):
         messages.error(request, 'No URL provided')
         return redirect('search')
 
-    # Clean URL
-    url = url.replace('//www.foodnetwork.com//', '//www.foodnetwork.com/')
-    url = url.replace('//www.allrecipes.com//', '//www.allrecipes.com/')
+    url = clean_external_url(url)
 
     try:
         scraper = RecipeScraper()
-        recipe = scraper.get_recipe_details(url)
-
-        if not recipe:
-            # Fallback recipe
-            domain = url.split('/')[2] if '://' in url else 'website'
-            recipe = {
-                'title': f'Recipe from {domain}',
-                'description': 'This recipe is from an external website. Click the button below to view the original recipe.',
-                'ingredients': ['📍 Please visit the original website for complete ingredients list'],
-                'instructions': ['📍 Please visit the original website for step-by-step instructions'],
-                'image': None,
-                'prep_time': '',
-                'cook_time': '',
-                'total_time': '',
-                'yield': ''
-            }
-
-        context = {
-            'recipe': recipe,
-            'source_url': url
-        }
-        return render(request, 'recipes/external_recipe.html', context)
-
+        recipe = scraper.get_recipe_details(url) or external_fallback_recipe(url)
     except Exception as e:
         print(f"Error in recipe_detail_external: {e}")
-        # Fallback recipe
-        domain = url.split('/')[2] if '://' in url else 'website'
-        context = {
-            'recipe': {
-                'title': f'Recipe from {domain}',
-                'description': 'Click the button below to view the original recipe on the source website.',
-                'ingredients': ['📍 Visit original website for ingredients'],
-                'instructions': ['📍 Visit original website for instructions'],
-                'image': None,
-                'prep_time': '',
-                'cook_time': '',
-                'total_time': '',
-                'yield': ''
-            },
-            'source_url': url
-        }
-        return render(request, 'recipes/external_recipe.html', context)
+        recipe = external_fallback_recipe(url, failed=True)
+
+    context = {
+        'recipe': recipe,
+        'source_url': url
+    }
+    return render(request, 'recipes/external_recipe.html', context)
 
 # ===== UPDATED CATEGORY RECIPES FUNCTION =====
 def category_recipes(request, category_id):
@@ -261,46 +325,71 @@ def category_recipes(request, category_id):
     category = get_object_or_404(Category, pk=category_id)
 
 
-    local_recipes = Recipe.objects.filter(category=category)
+    local_page = KeysetPaginator.paginate(
+        Recipe.objects.filter(category=category).select_related('created_by', 'category'), request
+    )
+    local_recipes = local_page.object_list
 
-    
+    # Web recipes are merged into the first page only; later pages list ours
     web_recipes = []
-    try:
-        scraper = RecipeScraper()
-        
-        web_recipes = scraper.search_recipes(category.name)
-        print(f"Found {len(web_recipes)} web recipes for category '{category.name}'")
-
-        
-        seen_urls = set()
-        unique_recipes = []
-        for recipe in web_recipes:
-            if recipe['url'] not in seen_urls:
-                seen_urls.add(recipe['url'])
-                unique_recipes.append(recipe)
+    if not local_page.has_previous:
+        try:
+            scraper = RecipeScraper()
 
-        web_recipes = unique_recipes[:8]  # Max 8 web recipes
+            web_recipes = scraper.search_recipes(category.name)
+            print(f"Found {len(web_recipes)} web recipes for category '{category.name}'")
 
-    except Exception as e:
-        print(f"Error fetching web recipes for category: {e}")
-        web_recipes = []
+        except Exception as e:
+            print(f"Error fetching web recipes for category: {e}")
+            web_recipes = []
 
+    results = ResultMerger.merge(category.name, local_recipes, web_recipes, web_limit=8)
+    total_local = local_page.total
+    total_web = sum(1 for result in results if result['kind'] == 'web')
     context = {
         'category': category,
-        'local_recipes': local_recipes,
-        'web_recipes': web_recipes,
-        'total_local': len(local_recipes),
-        'total_web': len(web_recipes),
-        'has_recipes': len(local_recipes) > 0 or len(web_recipes) > 0
+        'results': results,
+        'page': local_page,
+        'total_local': total_local,
+        'total_web': total_web,
+        'has_recipes': total_local > 0 or total_web > 0
     }
     return render(request, 'recipes/category_recipes.html', context)
 
+def pantry_search(request):
+    """Rank recipes by how many of the given ingredients they use (JSON)"""
+    names = [name for name in request.GET.get('ingredients', '').split(',') if name.strip()]
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 20)), 100))
+    except (TypeError, ValueError):
+        limit = 20
+    normalized, matches = IngredientIndex.match(names, limit=limit)
+    titles = Recipe.objects.in_bulk([row['recipe_id'] for row in matches])
+    results = [
+        {
+            'id': row['recipe_id'],
+            'title': titles[row['recipe_id']].title,
+            'url': reverse('recipe_detail', args=[row['recipe_id']]),
+            'matched': row['matched'],
+            'missing': row['missing'],
+        }
+        for row in matches if row['recipe_id'] in titles
+    ]
+    return JsonResponse({'ingredients': sorted(normalized), 'results': results})
+
+def ingredient_suggest(request):
+    """Typeahead for pantry ingredient names (JSON)"""
+    return JsonResponse({'suggestions': IngredientIndex.suggest(request.GET.get('q', ''))})
+
 @login_required
 def saved_recipes(request):
     """Show user's saved/liked recipes"""
-    saved_recipes = request.user.liked_recipes.all()
+    page = KeysetPaginator.paginate(
+        request.user.liked_recipes.select_related('created_by', 'category'), request
+    )
     context = {
-        'saved_recipes': saved_recipes
+        'saved_recipes': page.object_list,
+        'page': page
     }
     return render(request, 'recipes/saved_recipes.html', context)
 